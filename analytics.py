@@ -0,0 +1,309 @@
+"""Precomputed admin dashboard analytics.
+
+The store keeps running aggregates for the department, hardware and
+failure-prediction panels. Complaint create/update/delete events update them
+as they happen, so rendering the dashboard only reads the aggregates. Other
+gunicorn workers' events are picked up by a full recompute on a background
+thread every ``rebuild_interval`` seconds, skipped when the ``version``
+callable (the change feed version) shows nothing was written since the last
+one. The recompute is column-wise (see ``analytics_frame``).
+
+Only the aggregates are kept between recomputes, not the complaints. Update
+and delete events carry the complaint's facts as they were before the
+change, and the store tells whether a complaint is already counted from the
+highest id the last recompute read plus the ids events added or removed
+since.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import analytics_frame
+
+
+class ComplaintFacts:
+    """The few complaint fields the analytics depend on"""
+    __slots__ = ('id', 'department', 'issue', 'status', 'employee_name', 'employee_department',
+                 'created_at', 'hardware')
+
+    def __init__(self, id, department, issue, status, employee_name, employee_department, created_at,
+                 hardware=None):
+        self.id = id
+        self.department = department
+        self.issue = issue or ''
+        self.status = status
+        self.employee_name = employee_name
+        self.employee_department = employee_department
+        self.created_at = created_at
+        self.hardware = hardware
+
+    @property
+    def order_key(self):
+        return (self.created_at or datetime.min, self.id)
+
+    @property
+    def repeat_key(self):
+        return (self.employee_name, self.employee_department, self.issue.lower())
+
+
+def risk_for(similar_issues):
+    risk_level = 'High' if similar_issues > 3 else 'Medium' if similar_issues > 1 else 'Low'
+    return {
+        'risk_level': risk_level,
+        'risk_level_color': 'danger' if risk_level == 'High' else 'warning' if risk_level == 'Medium' else 'success',
+        'predicted_failure': ('Within 30 days' if risk_level == 'High'
+                              else 'Within 90 days' if risk_level == 'Medium' else 'No immediate risk'),
+    }
+
+
+class AnalyticsStore:
+    def __init__(self, classify_hardware, loader=None, rebuild_interval=300, max_common_problems=10,
+                 version=None):
+        self.classify_hardware = classify_hardware
+        self.loader = loader
+        self.version = version
+        self.rebuild_interval = rebuild_interval
+        self.max_common_problems = max_common_problems
+
+        self._lock = threading.RLock()
+        self._thread = None
+        self._rebuild_requested = threading.Event()
+        self._loaded = False
+        self._replay = None     # events seen while a recompute reads, applied again after it
+        self._reset()
+        self._rebuilt_version = None
+        self.last_rebuild = None
+        self.skipped_rebuilds = 0
+
+    def _reset(self):
+        self._counted_through = 0  # highest complaint id read by the last recompute
+        self._added = set()     # ids counted by events since then
+        self._removed = set()   # ids discounted by events since then
+        self._departments = {}  # dept -> {'total', 'problems': Counter, 'latest': order_key}
+        self._hardware = {}     # hw -> {'total', 'resolved', 'problems': Counter}
+        self._repeats = Counter()
+        self._latest_by_employee = {}  # employee_name -> ComplaintFacts
+
+    # Events -----------------------------------------------------------------
+
+    def on_created(self, facts):
+        self._event(self._add, facts)
+
+    def on_updated(self, facts, status):
+        """``facts`` is the complaint as it was before its status changed to ``status``"""
+        self._event(self._update, facts, status)
+
+    def on_deleted(self, facts):
+        self._event(self._delete, facts)
+
+    def _event(self, apply, *args):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((apply, args))
+            apply(*args)
+
+    def _update(self, facts, status):
+        if not self._counted(facts.id) or facts.status == status:
+            return
+        self._classify(facts)
+        hardware = self._hardware.get(facts.hardware)
+        if hardware is not None:
+            hardware['resolved'] += (status == 'Resolved') - (facts.status == 'Resolved')
+
+    def _delete(self, facts):
+        if not self._counted(facts.id):
+            return
+        self._classify(facts)
+        self._added.discard(facts.id)
+        self._removed.add(facts.id)
+        self._discount(self._departments, facts.department, facts.issue)
+        self._discount(self._hardware, facts.hardware, facts.issue)
+        if facts.status == 'Resolved' and facts.hardware in self._hardware:
+            self._hardware[facts.hardware]['resolved'] -= 1
+        if facts.employee_name and facts.employee_department:
+            self._repeats[facts.repeat_key] -= 1
+            latest = self._latest_by_employee.get(facts.employee_name)
+            if latest is not None and latest.id == facts.id:
+                # The employee's previous complaint is not indexed; recompute soon
+                del self._latest_by_employee[facts.employee_name]
+                self.request_rebuild()
+
+    # Full recompute -----------------------------------------------------------
+
+    def rebuild(self, frame=None):
+        """Recompute every aggregate from a complaint frame (``analytics_frame.FRAME_COLUMNS``)
+
+        The frame is read without holding the lock, so events keep being applied
+        meanwhile. They are recorded from the start of the read, and the ones the
+        frame does not reflect are applied again on top of the new aggregates.
+        """
+        with self._lock:
+            self._replay = []
+        try:
+            frame, summary, latest_by_employee = self._summarize(frame if frame is not None else self.loader())
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        counted_through = int(frame['id'].max()) if len(frame) else 0
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._reset()
+            self._counted_through = counted_through
+            self._departments = summary['departments']
+            self._hardware = summary['hardware']
+            self._repeats = summary['repeats']
+            self._latest_by_employee = latest_by_employee
+            for apply, args in self._not_in_frame(replay, frame):
+                apply(*args)
+            self._loaded = True
+            self.last_rebuild = time.time()
+
+    def _not_in_frame(self, replay, frame):
+        """The recorded events whose change the frame was read without
+
+        An event's change may have been committed before the frame was read.
+        Updates count only when the frame has the status they changed from, and
+        deletes only when the frame still has the complaint; ``_add`` itself
+        skips complaints the frame counted.
+        """
+        rows = frame.loc[frame['id'].isin({args[0].id for _, args in replay}), ['id', 'status']]
+        statuses = dict(zip(rows['id'].tolist(), rows['status'].tolist()))
+        for apply, args in replay:
+            facts = args[0]
+            if apply == self._add:
+                statuses.setdefault(facts.id, facts.status)
+            elif apply == self._update:
+                if statuses.get(facts.id) != facts.status:
+                    continue
+                statuses[facts.id] = args[1]
+            elif statuses.pop(facts.id, None) is None:
+                continue
+            yield apply, args
+
+    def _summarize(self, frame):
+        if frame['hardware'].isna().any():
+            frame = frame.copy()
+            missing = frame['hardware'].isna()
+            frame.loc[missing, 'hardware'] = frame.loc[missing, 'issue'].map(self.classify_hardware)
+        summary = analytics_frame.summarize(frame)
+        latest_by_employee = {
+            facts.employee_name: facts
+            for facts in (ComplaintFacts(*record) for record in analytics_frame.records(summary['latest_by_employee']))
+        }
+        return frame, summary, latest_by_employee
+
+    def request_rebuild(self):
+        self._rebuild_requested.set()
+
+    def ensure_started(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    version = self.version() if self.version is not None else None
+                    self.rebuild()
+                    self._rebuilt_version = version
+        if self._thread is None and self.loader is not None and self.rebuild_interval:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='analytics-rebuild', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            requested = self._rebuild_requested.wait(self.rebuild_interval)
+            self._rebuild_requested.clear()
+            try:
+                version = self.version() if self.version is not None else None
+                if not requested and version is not None and version == self._rebuilt_version:
+                    # Nothing was written since the last recompute, here or in another worker
+                    self.skipped_rebuilds += 1
+                    continue
+                self.rebuild()
+                self._rebuilt_version = version
+            except Exception as e:
+                print(f"Error rebuilding dashboard analytics: {str(e)}")
+
+    # Reads --------------------------------------------------------------------
+
+    def dashboard(self):
+        """Return ``(departments, hardware_issues, predictions)`` for the template"""
+        self.ensure_started()
+        with self._lock:
+            departments = [{
+                'name': name,
+                'total_issues': dept['total'],
+                'common_problems': self._common(dept['problems']),
+                'trend': 'stable'
+            } for name, dept in sorted(self._departments.items(), key=lambda item: item[1]['latest'], reverse=True)
+                if dept['total'] > 0]
+
+            hardware_issues = [{
+                'type': hw_type,
+                'total_issues': hw['total'],
+                'common_problems': self._common(hw['problems']),
+                'resolution_rate': round(hw['resolved'] / hw['total'] * 100) if hw['total'] else 0
+            } for hw_type, hw in sorted(self._hardware.items(), key=lambda item: item[1]['latest'], reverse=True)
+                if hw['total'] > 0]
+
+            predictions = []
+            for facts in sorted(self._latest_by_employee.values(), key=lambda f: f.order_key, reverse=True):
+                prediction = {
+                    'employee': facts.employee_name,
+                    'department': facts.employee_department,
+                    'hardware': facts.hardware,
+                }
+                prediction.update(risk_for(self._repeats[facts.repeat_key]))
+                predictions.append(prediction)
+
+            return departments, hardware_issues, predictions
+
+    # Internals ----------------------------------------------------------------
+
+    def _counted(self, complaint_id):
+        """Whether the aggregates include this complaint"""
+        if complaint_id in self._removed:
+            return False
+        return complaint_id <= self._counted_through or complaint_id in self._added
+
+    def _classify(self, facts):
+        if facts.hardware is None:
+            facts.hardware = self.classify_hardware(facts.issue)
+
+    def _add(self, facts):
+        if self._counted(facts.id):
+            return  # already counted by the recompute
+        self._classify(facts)
+        self._added.add(facts.id)
+
+        dept = self._departments.setdefault(facts.department, {'total': 0, 'problems': Counter(), 'latest': (datetime.min, 0)})
+        dept['total'] += 1
+        dept['problems'][facts.issue] += 1
+        dept['latest'] = max(dept['latest'], facts.order_key)
+
+        hardware = self._hardware.setdefault(
+            facts.hardware, {'total': 0, 'resolved': 0, 'problems': Counter(), 'latest': (datetime.min, 0)})
+        hardware['total'] += 1
+        hardware['resolved'] += facts.status == 'Resolved'
+        hardware['problems'][facts.issue] += 1
+        hardware['latest'] = max(hardware['latest'], facts.order_key)
+
+        if facts.employee_name and facts.employee_department:
+            self._repeats[facts.repeat_key] += 1
+            latest = self._latest_by_employee.get(facts.employee_name)
+            if latest is None or facts.order_key > latest.order_key:
+                self._latest_by_employee[facts.employee_name] = facts
+
+    @staticmethod
+    def _discount(groups, key, issue):
+        group = groups.get(key)
+        if group is None:
+            return
+        group['total'] -= 1
+        group['problems'][issue] -= 1
+        if group['problems'][issue] <= 0:
+            del group['problems'][issue]
+
+    def _common(self, problems):
+        return [issue for issue, _ in problems.most_common(self.max_common_problems)]
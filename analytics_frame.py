@@ -0,0 +1,133 @@
+"""Column-wise dashboard analytics with pandas.
+
+The full recompute behind the admin dashboard panels reads the complaint
+columns it needs with one query and builds every aggregate with
+vectorized string operations and groupbys: hardware classification,
+per-department and per-hardware counts, resolution rates and repeat-issue
+counts. ``AnalyticsStore`` keeps these aggregates up to date between
+recomputes.
+"""
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+FRAME_COLUMNS = ['id', 'department', 'issue', 'status', 'employee_name', 'employee_department',
+                 'created_at', 'hardware']
+
+
+def read_complaints(statement, engine, hardware_matcher=None):
+    """Load complaints as a frame with ``FRAME_COLUMNS``.
+
+    ``statement`` selects id, employee_department, user_department, issue,
+    status, employee_name and created_at.
+    """
+    # Run through SQLAlchemy rather than pd.read_sql, which from pandas 2.2 on
+    # rejects SQLAlchemy 1.4 engines and connections
+    with engine.connect() as connection:
+        result = connection.execute(statement)
+        frame = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()), coerce_float=True)
+    frame['created_at'] = pd.to_datetime(frame['created_at'])
+    # An empty employee department falls back to the account's, as on the complaint pages
+    has_department = frame['employee_department'].notna() & (frame['employee_department'] != '')
+    frame['department'] = frame['employee_department'].where(has_department, frame['user_department'])
+    frame['issue'] = frame['issue'].fillna('')
+    frame['hardware'] = classify_issues(frame['issue'], hardware_matcher) if hardware_matcher else None
+    return frame[FRAME_COLUMNS]
+
+
+def classify_issues(issues, matcher, field='name'):
+    """Vectorized ``matcher.best(issue)[field]`` for a Series of issues"""
+    # Complaints repeat the same few issues, so only distinct texts are matched
+    codes, distinct = pd.factorize(issues.fillna('').str.lower())
+    labels = [category.get(field) for category in matcher.categories]
+    best_label = pd.Series(matcher.default.get(field), index=range(len(distinct)), dtype=object)
+
+    if matcher.pattern is not None and len(distinct):
+        hits = pd.Series(distinct).str.findall(matcher.pattern).explode().dropna()
+        if not hits.empty:
+            # A term can belong to several categories; every hit scores each of them
+            terms = pd.DataFrame([(term, matcher.rank(category_id))
+                                  for term, category_ids in matcher.term_categories.items()
+                                  for category_id in category_ids], columns=['term', 'rank'])
+            scored = pd.DataFrame({'row': hits.index, 'term': hits.values}).merge(terms, on='term')
+            scores = scored.groupby(['row', 'rank']).size().rename('score').reset_index()
+            # Highest score wins; ties go to the category listed first in the data file
+            best = (scores.sort_values(['row', 'score', 'rank'], ascending=[True, False, True])
+                    .drop_duplicates('row'))
+            best_label.iloc[best['row'].values] = [labels[rank] for rank in best['rank'].values]
+
+    return best_label.values.take(codes)
+
+
+def summarize(frame):
+    """Build the ``AnalyticsStore`` aggregates from a complaint frame.
+
+    Returns a dict with ``departments``, ``hardware``, ``repeats`` and
+    ``latest_by_employee`` (a frame with each employee's newest complaint).
+    Groups are listed newest first, and so are the problems inside a group,
+    so ``Counter.most_common`` breaks ties in favour of recent issues.
+    """
+    ordered = frame.sort_values(['created_at', 'id'], ascending=False, na_position='last')
+    resolved = (ordered['status'] == 'Resolved').astype(int)
+
+    departments = _groups(ordered, 'department')
+    hardware = _groups(ordered, 'hardware')
+    resolved_by_hardware = resolved.groupby(ordered['hardware'], sort=False, dropna=False).sum()
+    for hw_type, count in resolved_by_hardware.items():
+        hardware[clean(hw_type)]['resolved'] = int(count)
+
+    eligible = ordered[ordered['employee_name'].notna() & (ordered['employee_name'] != '') &
+                       ordered['employee_department'].notna() & (ordered['employee_department'] != '')]
+    repeat_counts = eligible.groupby(
+        [eligible['employee_name'], eligible['employee_department'], eligible['issue'].str.lower()],
+        sort=False).size()
+    repeats = Counter(repeat_counts.to_dict())
+
+    return {
+        'departments': departments,
+        'hardware': hardware,
+        'repeats': repeats,
+        'latest_by_employee': eligible.drop_duplicates('employee_name'),
+    }
+
+
+def _groups(ordered, column):
+    groups = {}
+    # drop_duplicates keeps each group's first, i.e. newest, row
+    for row in ordered.drop_duplicates(column).itertuples(index=False):
+        groups[clean(getattr(row, column))] = {
+            'total': 0, 'problems': Counter(), 'latest': order_key(row.created_at, row.id)
+        }
+    totals = ordered.groupby(column, sort=False, dropna=False).size()
+    for key, count in totals.items():
+        groups[clean(key)]['total'] = int(count)
+    problems = ordered.groupby([column, 'issue'], sort=False, dropna=False).size()
+    for (key, issue), count in problems.items():
+        groups[clean(key)]['problems'][issue] = int(count)
+    return groups
+
+
+def records(frame):
+    """``(id, department, issue, status, employee_name, employee_department, created_at, hardware)``
+    tuples with None for missing values, in ``ComplaintFacts`` argument order"""
+    columns = [frame[column].astype(object).where(frame[column].notna(), None).tolist()
+               for column in FRAME_COLUMNS if column not in ('id', 'created_at')]
+    created_at = [to_datetime(value) for value in frame['created_at'].tolist()]
+    department, issue, status, employee_name, employee_department, hardware = columns
+    return zip(frame['id'].tolist(), department, issue, status, employee_name, employee_department,
+               created_at, hardware)
+
+
+def order_key(created_at, complaint_id):
+    """``ComplaintFacts.order_key`` for a frame row"""
+    return (to_datetime(created_at) or datetime.min, int(complaint_id))
+
+
+def to_datetime(value):
+    return None if pd.isna(value) else pd.Timestamp(value).to_pydatetime()
+
+
+def clean(value):
+    """Map pandas' missing-value markers back to None"""
+    return None if not isinstance(value, str) and pd.isna(value) else value
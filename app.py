@@ -1,16 +1,37 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_file, Response, stream_with_context, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_mail import Mail, Message
 from datetime import datetime, timedelta
 import pandas as pd
 import os
+import time
 from dotenv import load_dotenv
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment
 import uuid
-import google.generativeai as genai
+import json
+import hashlib
+import threading
+import tempfile
 import openpyxl
+from sqlalchemy import update, func, select, event, case, inspect
+from sqlalchemy.orm import joinedload, selectinload
+from llm_client import LLMClientProvider
+from response_cache import ResponseCache, SQLiteCacheTier
+from llm_executor import LLMExecutor
+from intent_matcher import IntentMatcher
+from excel_log import ExcelLogWriter
+import migrations
+from assignment import AssignmentEngine, TechnicianState, make_strategy
+from analytics import AnalyticsStore, ComplaintFacts
+import analytics_frame
+from pagination import InvalidCursor, keyset_page
+from events import EventBus, RedisRelay
+import exports
+from export_jobs import ExportJobQueue
+import search
+from duplicates import DuplicateIndex
+from resolutions import ResolutionIndex
+from chat_sessions import ChatSessionStore, MemoryChatBackend, SQLiteChatBackend
 
 load_dotenv()
 
@@ -20,7 +41,7 @@ if not os.path.exists('data'):
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///helpdesk.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///helpdesk.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['MAIL_SERVER'] = 'smtp.gmail.com'
 app.config['MAIL_PORT'] = 587
@@ -28,25 +49,107 @@ app.config['MAIL_USE_TLS'] = True
 app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 
-# Configure Google Generative AI
+# Configure Google Generative AI. The client is created lazily on first use and
+# health-checked in the background, so importing the app never calls the API.
 GOOGLE_API_KEY = os.getenv('GEMINI_API_KEY')
-try:
-    genai.configure(api_key=GOOGLE_API_KEY)
-    # List available models
-    for m in genai.list_models():
-        print(f"Available model: {m.name}")
-    
-    model = genai.GenerativeModel('models/gemini-1.5-pro')
-    # Test the model with a simple prompt
-    response = model.generate_content("Test connection")
-    if response and response.text:
-        print("Gemini API configured successfully")
-    else:
-        print("Warning: Empty response from Gemini API")
-        model = None
-except Exception as e:
-    print(f"Error configuring Gemini API: {str(e)}")
-    model = None
+llm = LLMClientProvider(
+    GOOGLE_API_KEY,
+    model_name=os.getenv('GEMINI_MODEL', 'models/gemini-1.5-pro'),
+    probe_interval=int(os.getenv('GEMINI_HEALTH_INTERVAL', '60'))
+)
+
+# Cache Gemini answers by normalised problem text. Set LLM_CACHE_DB to a file
+# path to share cached answers between gunicorn workers.
+LLM_CACHE_DB = os.getenv('LLM_CACHE_DB')
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_SIZE', '512')),
+    ttl=int(os.getenv('LLM_CACHE_TTL', str(24 * 3600))),
+    persistent_tier=SQLiteCacheTier(LLM_CACHE_DB) if LLM_CACHE_DB else None
+)
+
+# Chat conversations are kept server-side and the session cookie only carries
+# their id. The default SQLite file is shared by gunicorn workers; set
+# CHAT_SESSION_BACKEND=memory to keep them in this process (single worker only)
+chat_store = ChatSessionStore(
+    MemoryChatBackend(max_entries=int(os.getenv('CHAT_SESSION_MAX', '10000')))
+    if os.getenv('CHAT_SESSION_BACKEND', 'sqlite') == 'memory'
+    else SQLiteChatBackend(os.getenv('CHAT_SESSION_DB', 'data/chat_sessions.db')),
+    ttl=int(os.getenv('CHAT_SESSION_TTL', '1800')),
+    reap_interval=int(os.getenv('CHAT_SESSION_REAP_INTERVAL', '300'))
+)
+
+# Gemini calls run on a small bounded pool so a slow answer never pins a web
+# worker for longer than LLM_TIMEOUT seconds; late answers still land in the cache
+llm_executor = LLMExecutor(
+    max_workers=int(os.getenv('LLM_MAX_WORKERS', '4')),
+    max_pending=int(os.getenv('LLM_MAX_PENDING', '16')),
+    timeout=float(os.getenv('LLM_TIMEOUT', '8'))
+)
+
+# Chats that ended resolved answer repeats of the same problem before Gemini
+# is asked (see past_resolution); set the threshold above 1 to always ask Gemini.
+# Only Gemini's own answers are reused, never the keyword playbooks, and each
+# time a reused answer does not help its score is multiplied by RESOLUTION_DEMOTION
+LLM_RESOLUTION_SOURCES = ('gemini', 'cache')
+resolution_index = ResolutionIndex(
+    threshold=float(os.getenv('RESOLUTION_MATCH_THRESHOLD', '0.7')),
+    refresh_interval=int(os.getenv('RESOLUTION_REFRESH_INTERVAL', '60')),
+    rebuild_interval=int(os.getenv('RESOLUTION_REBUILD_INTERVAL', '3600')),
+    demotion=float(os.getenv('RESOLUTION_DEMOTION', '0.8'))
+)
+
+# Keyword intents for the fallback playbooks and the dashboard hardware breakdown,
+# compiled once from data/troubleshooting_playbooks.json
+troubleshooting_intents = IntentMatcher.from_file('troubleshooting')
+hardware_intents = IntentMatcher.from_file('hardware')
+
+# Ticket log rows are journalled by a background thread and the workbook is
+# rebuilt in bulk, so creating a ticket never opens the .xlsx file
+complaint_log = ExcelLogWriter(
+    'data/complaints_log.xlsx',
+    headers=[
+        'Complaint No', 'Employee Name', 'Department', 'Employee Code',
+        'Issue Description', 'Status', 'Created At', 'Resolved At',
+        'Technician Name', 'Resolution Time (Hours)', 'Comments'
+    ],
+    rebuild_interval=int(os.getenv('EXCEL_LOG_REBUILD_INTERVAL', '300')),
+    rebuild_batch=int(os.getenv('EXCEL_LOG_REBUILD_BATCH', '100'))
+)
+
+# Technician auto-assignment; ASSIGNMENT_STRATEGY is one of least_loaded,
+# round_robin, skills or priority (see assignment.py)
+assignment_engine = AssignmentEngine(
+    make_strategy(os.getenv('ASSIGNMENT_STRATEGY', 'least_loaded')),
+    classifier=lambda text: [category for category, _ in troubleshooting_intents.classify(text)],
+    resync_interval=int(os.getenv('ASSIGNMENT_RESYNC_INTERVAL', '60'))
+)
+TECHNICIAN_CAPACITY = int(os.getenv('TECHNICIAN_CAPACITY', '10'))
+
+# New reports that closely match a recent open incident are linked to it rather
+# than queued as separate work (see find_open_incident). 0 hours turns this off.
+DUPLICATE_WINDOW_HOURS = float(os.getenv('DUPLICATE_WINDOW_HOURS', '24'))
+duplicate_index = DuplicateIndex(
+    threshold=float(os.getenv('DUPLICATE_THRESHOLD', '0.6')),
+    window=DUPLICATE_WINDOW_HOURS * 3600,
+    reload_interval=int(os.getenv('DUPLICATE_RELOAD_INTERVAL', '300'))
+)
+
+# Ticket events pushed to open admin and technician dashboards over /api/events. Set
+# EVENT_BUS_REDIS_URL to fan them out through Redis when running more than one worker process.
+# Each stream holds a worker thread, so by default half of GUNICORN_THREADS may be streams.
+EVENT_BUS_REDIS_URL = os.getenv('EVENT_BUS_REDIS_URL')
+event_bus = EventBus(
+    relay=RedisRelay(EVENT_BUS_REDIS_URL) if EVENT_BUS_REDIS_URL else None,
+    max_pending=int(os.getenv('EVENT_STREAM_MAX_PENDING', '100')),
+    max_subscribers=int(os.getenv('EVENT_STREAM_MAX_PER_WORKER',
+                                  str(max(1, int(os.getenv('GUNICORN_THREADS', '16')) // 2))))
+)
+# Without the relay, dashboards also poll the change feed every EVENT_POLL_INTERVAL
+# seconds to pick up changes made on other workers (0 turns polling off). Employee
+# dashboards, and dashboards whose stream was refused, poll every
+# EVENT_FALLBACK_POLL_INTERVAL seconds when EVENT_POLL_INTERVAL is 0.
+EVENT_POLL_INTERVAL = float(os.getenv('EVENT_POLL_INTERVAL', '0' if EVENT_BUS_REDIS_URL else '30'))
+EVENT_FALLBACK_POLL_INTERVAL = float(os.getenv('EVENT_FALLBACK_POLL_INTERVAL', '30'))
 
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
@@ -63,6 +166,8 @@ class User(UserMixin, db.Model):
     department = db.Column(db.String(50))
     designation = db.Column(db.String(50))
     employee_code = db.Column(db.String(20), unique=True)
+    skills = db.Column(db.String(200))  # technicians: comma-separated intent categories, e.g. "network,printer"
+    assignment_weight = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     complaints = db.relationship('Complaint', backref='user', foreign_keys='Complaint.user_id')
     assigned_complaints = db.relationship('Complaint', backref='technician', foreign_keys='Complaint.technician_id')
     comments = db.relationship('Comment', backref='user', lazy=True)
@@ -75,7 +180,7 @@ class Complaint(db.Model):
     issue = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(20), default='Open')  # Open, In Progress, Resolved, Escalated
     priority = db.Column(db.String(20), default='Medium')  # Low, Medium, High
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     resolved_at = db.Column(db.DateTime)
     comments = db.relationship('Comment', backref='complaint', lazy=True)
     # New fields for employee details from chatbot
@@ -84,13 +189,124 @@ class Complaint(db.Model):
     employee_department = db.Column(db.String(100))
     troubleshooting_steps = db.Column(db.Text)
     resolution_attempted = db.Column(db.Boolean, default=False)
+    # Change feed position of the last write to this complaint or its comments (see record_changes)
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    updated_at = db.Column(db.DateTime)
+    # A report linked to an open incident follows it; the incident counts its linked reports
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), index=True)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    duplicates = db.relationship('Complaint', foreign_keys=[duplicate_of_id],
+                                 backref=db.backref('duplicate_of', remote_side=[id]))
+    
+    # Dashboard query paths; keep in sync with migrations 0003_dashboard_indexes, 0005_filter_indexes
+    # and 0007_technician_status_index
+    __table_args__ = (
+        db.Index('ix_complaint_technician_created', 'technician_id', 'created_at'),
+        db.Index('ix_complaint_technician_status', 'technician_id', 'status', 'duplicate_of_id'),
+        db.Index('ix_complaint_user_created', 'user_id', 'created_at'),
+        db.Index('ix_complaint_status_created', 'status', 'created_at'),
+        db.Index('ix_complaint_priority_created', 'priority', 'created_at'),
+        db.Index('ix_complaint_created_at', 'created_at'),
+        db.Index('ix_complaint_department_created', 'employee_department', 'created_at'),
+        db.Index('ix_complaint_technician_change_seq', 'technician_id', 'change_seq'),
+        db.Index('ix_complaint_user_change_seq', 'user_id', 'change_seq'),
+    )
 
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    complaint_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), nullable=False)
+    complaint_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
+class ComplaintStatusCount(db.Model):
+    # Maintained in the same transaction as every status change (see adjust_status_count)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ChatResolution(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    name = db.Column(db.String(100))
+    designation = db.Column(db.String(100))
+    department = db.Column(db.String(100))
+    problem = db.Column(db.Text, nullable=False)
+    resolution = db.Column(db.Text)
+    # Where the steps came from: gemini, cache, history or fallback (see offer_resolution)
+    source = db.Column(db.String(20))
+    rejections = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ChangeSequence(db.Model):
+    # Monotonic version of the complaint change feed, bumped once per flush that changes complaints
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class ComplaintTombstone(db.Model):
+    # Complaints that were deleted, or reassigned away from a technician, so change
+    # feed clients can drop their rows. user_id and technician_id record who could
+    # see the row, so each user is only told about their own tickets.
+    id = db.Column(db.Integer, primary_key=True)
+    complaint_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    technician_id = db.Column(db.Integer)
+    reason = db.Column(db.String(20), nullable=False, default='deleted', server_default='deleted')
+    change_seq = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+CHANGE_FEED = 'complaints'
+# Bumped whenever a user account changes; exports show usernames and departments
+USER_FEED = 'users'
+
+def next_change_seq(connection, name=CHANGE_FEED):
+    # The row stays locked until commit, so sequence numbers become visible in commit order
+    table = ChangeSequence.__table__
+    bumped = connection.execute(
+        table.update().where(table.c.name == name).values(value=table.c.value + 1))
+    if bumped.rowcount == 0:
+        connection.execute(table.insert().values(name=name, value=1))
+    return connection.execute(select(table.c.value).where(table.c.name == name)).scalar()
+
+def current_change_seq(name=CHANGE_FEED):
+    return db.session.query(ChangeSequence.value).filter_by(name=name).scalar() or 0
+
+@event.listens_for(db.session, 'before_flush')
+def record_changes(session, flush_context, instances):
+    """Stamp every complaint or comment written in this flush with the next change sequence number"""
+    if any(isinstance(obj, User) and (obj in session.new or obj in session.deleted or session.is_modified(obj))
+           for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        next_change_seq(session.connection(), USER_FEED)
+    complaints = [obj for obj in session.new if isinstance(obj, Complaint)]
+    complaints += [obj for obj in session.dirty if isinstance(obj, Complaint) and session.is_modified(obj)]
+    comments = [obj for obj in session.new if isinstance(obj, Comment)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Complaint)]
+    if not (complaints or comments or deleted):
+        return
+
+    connection = session.connection()
+    seq = next_change_seq(connection)
+    now = datetime.utcnow()
+    for complaint in complaints:
+        complaint.change_seq = seq
+        complaint.updated_at = now
+        if complaint.duplicate_of_id is None:
+            # The previous technician's dashboard has to drop a reassigned ticket
+            for previous in inspect(complaint).attrs.technician_id.history.deleted or ():
+                if previous and previous != complaint.technician_id:
+                    session.add(ComplaintTombstone(complaint_id=complaint.id, technician_id=previous,
+                                                   reason='reassigned', change_seq=seq))
+    for comment in comments:
+        comment.change_seq = seq
+    # A new comment counts as a change to its complaint
+    commented = {comment.complaint_id for comment in comments if comment.complaint_id}
+    commented -= {complaint.id for complaint in complaints}
+    if commented:
+        table = Complaint.__table__
+        connection.execute(table.update().where(table.c.id.in_(commented)).values(change_seq=seq, updated_at=now))
+    for complaint in deleted:
+        session.add(ComplaintTombstone(complaint_id=complaint.id, user_id=complaint.user_id,
+                                       technician_id=complaint.technician_id, change_seq=seq))
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -124,6 +340,33 @@ def login():
 def chat_page():
     return render_template('chat.html')
 
+def chat_state():
+    """This request's conversation, loaded from chat_store on first use and saved after the request"""
+    if 'chat' not in g:
+        chat_id = session.get('chat_id')
+        state = chat_store.load(chat_id) if chat_id else None
+        if state is None or state.get('user_id') != current_user.id:
+            state = {'user_id': current_user.id}
+        g.chat = state
+        g.chat_saved = dict(state)
+    return g.chat
+
+def end_chat():
+    """Forget the conversation; the rest of the session, including the login, is kept"""
+    g.pop('chat', None)
+    chat_id = session.pop('chat_id', None)
+    if chat_id:
+        chat_store.delete(chat_id)
+
+@app.after_request
+def save_chat_state(response):
+    state = g.pop('chat', None)
+    if state is not None and state != g.get('chat_saved'):
+        if 'chat_id' not in session:
+            session['chat_id'] = chat_store.new_id()
+        chat_store.save(session['chat_id'], state)
+    return response
+
 @app.route('/api/chat', methods=['POST'])
 @login_required
 def chat_api():
@@ -137,20 +380,21 @@ def chat_api():
             }), 400
         
         message = data['message'].strip().lower()
+        chat = chat_state()
         
-        # Initialize session if not exists
-        if 'chat_step' not in session:
-            session['chat_step'] = 0
+        # Initialize the conversation if not exists
+        if 'chat_step' not in chat:
+            chat['chat_step'] = 0
         
         # Check if Gemini API is available for more complex steps
-        api_available = model is not None
+        api_available = llm.is_available()
         
-        step = session.get('chat_step', 0)
+        step = chat.get('chat_step', 0)
         print(f"Current chat step: {step}, Message: {message}")
         
         if step == 0:
             if message == "hi" or message == "hello":
-                session['chat_step'] = 1
+                chat['chat_step'] = 1
                 return jsonify({
                     'response': "Hello! I'm your IT Support Assistant. What is your name?",
                     'requiresComplaint': False
@@ -161,59 +405,64 @@ def chat_api():
                     'requiresComplaint': False
                 })
         elif step == 1:
-            session['name'] = message
-            session['chat_step'] = 2
+            chat['name'] = message
+            chat['chat_step'] = 2
             return jsonify({
                 'response': f"Nice to meet you, {message}! Please enter your designation.",
                 'requiresComplaint': False
             })
         elif step == 2:
-            session['designation'] = message
-            session['chat_step'] = 3
+            chat['designation'] = message
+            chat['chat_step'] = 3
             return jsonify({
                 'response': "Thank you. Now, please enter your department.",
                 'requiresComplaint': False
             })
         elif step == 3:
-            session['department'] = message
-            session['chat_step'] = 4
+            chat['department'] = message
+            chat['chat_step'] = 4
             return jsonify({
                 'response': "Please describe your IT problem in detail. What issues are you experiencing?",
                 'requiresComplaint': False
             })
         elif step == 4:
-            session['problem'] = message
-            session['chat_step'] = 5
+            chat['problem'] = message
+            chat['chat_step'] = 5
             
             print(f"Step 4: Problem set to: {message}")  # Debug log
             
-            # Get troubleshooting steps from API
+            # Answer from a past chat that fixed the same problem, else get troubleshooting steps from API
             try:
-                troubleshooting_steps = search_gemini_api(message)
+                history = past_resolution(message)
+                if history is not None:
+                    history_id, troubleshooting_steps = history
+                else:
+                    history_id, troubleshooting_steps = None, llm_executor.run(search_gemini_api, message)
                 
-                # Check if API returned valid troubleshooting steps
-                if not api_available or "apologize" in troubleshooting_steps.lower():
+                # Check if API returned valid troubleshooting steps in time (cached
+                # answers are still served while the API itself is unavailable)
+                if troubleshooting_steps is None or "apologize" in troubleshooting_steps.lower():
                     print("API unavailable, using fallback troubleshooting")
                     # Provide generic troubleshooting steps instead of immediately creating a ticket
                     fallback_steps = get_fallback_troubleshooting_steps(message)
-                    session['last_resolution'] = fallback_steps
+                    offer_resolution(chat, fallback_steps, 'fallback')
                     print("Fallback troubleshooting steps provided, asking if resolved")
                     return jsonify({
                         'response': f"Here are some troubleshooting steps:\n\n{fallback_steps}\n\nDid this resolve your issue? (Yes/No)",
                         'requiresComplaint': False
                     })
                 
-                session['last_resolution'] = troubleshooting_steps
+                offer_resolution(chat, troubleshooting_steps, 'history' if history_id else 'gemini', history_id)
                 print("Troubleshooting steps provided, asking if resolved")
                 return jsonify({
-                    'response': f"Here are some troubleshooting steps:\n\n{troubleshooting_steps}\n\nDid this resolve your issue? (Yes/No)",
+                    'response': f"{TROUBLESHOOTING_HEADER}{without_header(troubleshooting_steps)}\n\nDid this resolve your issue? (Yes/No)",
                     'requiresComplaint': False
                 })
             except Exception as e:
                 print(f"Error getting troubleshooting: {str(e)}")
                 # Provide generic troubleshooting steps
                 fallback_steps = get_fallback_troubleshooting_steps(message)
-                session['last_resolution'] = fallback_steps
+                offer_resolution(chat, fallback_steps, 'fallback')
                 print("Exception handled, using fallback troubleshooting")
                 return jsonify({
                     'response': f"Here are some troubleshooting steps:\n\n{fallback_steps}\n\nDid this resolve your issue? (Yes/No)",
@@ -223,30 +472,26 @@ def chat_api():
             print(f"Step 5: User response to troubleshooting: {message}")  # Debug log
             if message == "yes":
                 # Save resolved issue
-                save_to_excel([
-                    session.get('name', 'Unknown'),
-                    session.get('designation', 'Unknown'),
-                    session.get('department', 'Unknown'),
-                    session.get('problem', 'Unknown'),
-                    session.get('last_resolution', 'Unknown')
-                ])
-                session.clear()
-                print("Issue resolved, session cleared")  # Debug log
+                record_chat_resolution()
+                end_chat()
+                print("Issue resolved, conversation ended")  # Debug log
                 return jsonify({
                     'response': "Great! I'm glad your issue has been resolved. Your details have been saved, and you can always come back if you need more assistance.",
                     'requiresComplaint': False
                 })
             elif message == "no":
                 print("First solution didn't work, checking if API available for alternative")  # Debug log
+                if chat.get('resolution_source') == 'history':
+                    demote_resolution(chat['history_id'])
                 # If API is not available, try a different fallback solution
                 try:
                     if not api_available:
                         print("API not available, using secondary fallback solution")  # Debug log
                         # Provide a more specific fallback solution as the second attempt
-                        current_problem = session.get('problem', '')
+                        current_problem = chat.get('problem', '')
                         secondary_fallback = get_secondary_fallback_steps(current_problem)
-                        session['last_resolution'] = secondary_fallback
-                        session['chat_step'] = 7  # Last attempt
+                        offer_resolution(chat, secondary_fallback, 'fallback')
+                        chat['chat_step'] = 7  # Last attempt
                         print("Secondary fallback solution provided, asking if it worked")  # Debug log
                         return jsonify({
                             'response': f"Let's try these alternative steps instead:\n\n{secondary_fallback}\n\nDid this resolve your issue? (Yes/No)",
@@ -254,24 +499,23 @@ def chat_api():
                         })
                     
                     # Try alternative solution with a different prompt
-                    alt_query = f"Alternative solution for: {session.get('problem', '')}"
-                    troubleshooting_steps = search_gemini_api(alt_query)
+                    troubleshooting_steps = llm_executor.run(search_gemini_api, chat.get('problem', ''), variant='alternative')
                     
-                    # Check if the API returned a proper response
-                    if "apologize" in troubleshooting_steps.lower():
+                    # Check if the API returned a proper response before the deadline
+                    if troubleshooting_steps is None or "apologize" in troubleshooting_steps.lower():
                         print("API couldn't find alternative solution, using secondary fallback")  # Debug log
                         # Provide a more specific fallback solution as the second attempt
-                        current_problem = session.get('problem', '')
+                        current_problem = chat.get('problem', '')
                         secondary_fallback = get_secondary_fallback_steps(current_problem)
-                        session['last_resolution'] = secondary_fallback
-                        session['chat_step'] = 7  # Last attempt
+                        offer_resolution(chat, secondary_fallback, 'fallback')
+                        chat['chat_step'] = 7  # Last attempt
                         return jsonify({
                             'response': f"Let's try these alternative steps instead:\n\n{secondary_fallback}\n\nDid this resolve your issue? (Yes/No)",
                             'requiresComplaint': False
                         })
                     
-                    session['last_resolution'] = troubleshooting_steps
-                    session['chat_step'] = 7  # Last attempt
+                    offer_resolution(chat, troubleshooting_steps, 'gemini')
+                    chat['chat_step'] = 7  # Last attempt
                     print("Alternative solution provided, asking if it worked")  # Debug log
                     return jsonify({
                         'response': f"Let's try this alternative solution instead:\n\n{troubleshooting_steps}\n\nDid this resolve your issue? (Yes/No)",
@@ -280,10 +524,10 @@ def chat_api():
                 except Exception as e:
                     print(f"Error getting alternative solution: {str(e)}")
                     print("Exception when getting alternative solution, using secondary fallback")  # Debug log
-                    current_problem = session.get('problem', '')
+                    current_problem = chat.get('problem', '')
                     secondary_fallback = get_secondary_fallback_steps(current_problem)
-                    session['last_resolution'] = secondary_fallback
-                    session['chat_step'] = 7  # Last attempt
+                    offer_resolution(chat, secondary_fallback, 'fallback')
+                    chat['chat_step'] = 7  # Last attempt
                     return jsonify({
                         'response': f"Let's try these alternative steps instead:\n\n{secondary_fallback}\n\nDid this resolve your issue? (Yes/No)",
                         'requiresComplaint': False
@@ -297,15 +541,9 @@ def chat_api():
             print(f"Step 6: User response to alternative solution: {message}")  # Debug log
             if message == "yes":
                 # Save resolved issue
-                save_to_excel([
-                    session.get('name', 'Unknown'),
-                    session.get('designation', 'Unknown'),
-                    session.get('department', 'Unknown'),
-                    session.get('problem', 'Unknown'),
-                    session.get('last_resolution', 'Unknown')
-                ])
-                session.clear()
-                print("Alternative solution worked, session cleared")  # Debug log
+                record_chat_resolution()
+                end_chat()
+                print("Alternative solution worked, conversation ended")  # Debug log
                 return jsonify({
                     'response': "Great! I'm glad the alternative solution worked. Your details have been saved, and you can always come back if you need more assistance.",
                     'requiresComplaint': False
@@ -323,15 +561,9 @@ def chat_api():
             print(f"Step 7: User response to secondary fallback: {message}")  # Debug log
             if message == "yes":
                 # Save resolved issue
-                save_to_excel([
-                    session.get('name', 'Unknown'),
-                    session.get('designation', 'Unknown'),
-                    session.get('department', 'Unknown'),
-                    session.get('problem', 'Unknown'),
-                    session.get('last_resolution', 'Unknown')
-                ])
-                session.clear()
-                print("Secondary fallback solution worked, session cleared")  # Debug log
+                record_chat_resolution()
+                end_chat()
+                print("Secondary fallback solution worked, conversation ended")  # Debug log
                 return jsonify({
                     'response': "Great! I'm glad the secondary fallback solution worked. Your details have been saved, and you can always come back if you need more assistance.",
                     'requiresComplaint': False
@@ -348,29 +580,198 @@ def chat_api():
     
     except Exception as e:
         print(f"Error in chat_api: {str(e)}")
-        session.clear()  # Clear session on error
+        end_chat()  # Start over on error
         return jsonify({
             'response': 'I apologize, but I encountered an error. Please try again later.',
             'requiresComplaint': False
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+@login_required
+def chat_stream_api():
+    data = request.json
+    chat = chat_state()
+    if not data or 'message' not in data or chat.get('chat_step', 0) != 4:
+        # Only the troubleshooting step waits on Gemini; every other step is
+        # answered with the regular JSON response
+        return chat_api()
+    
+    message = data['message'].strip().lower()
+    chat['problem'] = message
+    chat['chat_step'] = 5
+    print(f"Step 4 (streaming): Problem set to: {message}")  # Debug log
+    
+    # Anything known up front is saved with the conversation after this request
+    # returns; a streamed Gemini answer is added once it has finished
+    history = past_resolution(message)
+    cached_steps = history[1] if history is not None else response_cache.get(message)
+    fallback_steps = get_fallback_troubleshooting_steps(message)
+    if history is not None:
+        offer_resolution(chat, cached_steps, 'history', history[0])
+    elif cached_steps is not None:
+        offer_resolution(chat, cached_steps, 'cache')
+    elif not llm.is_available():
+        offer_resolution(chat, fallback_steps, 'fallback')
+    else:
+        offer_resolution(chat, None, 'gemini')
+    use_llm = chat['last_resolution'] is None
+    chat_id = session.get('chat_id')
+    
+    def generate():
+        yield sse_event({'type': 'chunk', 'text': TROUBLESHOOTING_HEADER})
+        if cached_steps is not None:
+            body = without_header(cached_steps)
+        elif not use_llm:
+            body = fallback_steps
+        else:
+            body = None
+            streamed = []
+            try:
+                for text in llm_executor.stream(stream_gemini_api, message):
+                    streamed.append(text)
+                    yield sse_event({'type': 'chunk', 'text': text})
+            except Exception as e:
+                print(f"Error streaming troubleshooting: {str(e)}")
+                print("Streaming failed, using fallback troubleshooting")
+                yield sse_event({'type': 'reset', 'text': TROUBLESHOOTING_HEADER})
+                body = fallback_steps
+            save_streamed_resolution(chat_id, message,
+                                     body or TROUBLESHOOTING_HEADER + ''.join(streamed),
+                                     'fallback' if body else 'gemini')
+        if body is not None:
+            for text in iter_text_chunks(body):
+                yield sse_event({'type': 'chunk', 'text': text})
+        yield sse_event({'type': 'chunk', 'text': "\n\nDid this resolve your issue? (Yes/No)"})
+        yield sse_event({'type': 'done', 'requiresComplaint': False})
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def is_open_status(status):
+    return (status or 'Open') != 'Resolved'
+
+def adjust_open_tickets(technician_id, delta, priority=None):
+    """Shift a technician's open workload in the assignment engine
+
+    The engine's periodic resync (load_technician_states) corrects any drift,
+    e.g. from a transaction that was rolled back after this call.
+    """
+    if technician_id:
+        assignment_engine.adjust(technician_id, delta, priority)
+
+def adjust_status_count(status, delta):
+    """Shift the cached per-status complaint count inside the current transaction"""
+    status = status or 'Open'
+    updated = db.session.execute(
+        update(ComplaintStatusCount)
+        .where(ComplaintStatusCount.status == status)
+        .values(count=ComplaintStatusCount.count + delta)
+    )
+    if updated.rowcount == 0:
+        db.session.add(ComplaintStatusCount(status=status, count=max(delta, 0)))
+    invalidate_stats_cache()
+
+def complaint_facts(complaint):
+    return ComplaintFacts(
+        complaint.id,
+        complaint.employee_department or complaint.user.department,
+        complaint.issue,
+        complaint.status,
+        complaint.employee_name,
+        complaint.employee_department,
+        complaint.created_at
+    )
+
+def load_complaint_frame():
+    """Read only the columns the dashboard analytics need, in one joined query"""
+    with app.app_context():
+        query = (db.session.query(
+                    Complaint.id, Complaint.employee_department, User.department.label('user_department'),
+                    Complaint.issue, Complaint.status, Complaint.employee_name, Complaint.created_at)
+                 .join(User, Complaint.user_id == User.id))
+        return analytics_frame.read_complaints(query.statement, db.engine, hardware_matcher=hardware_intents)
+
+def complaint_feed_version():
+    with app.app_context():
+        return current_change_seq()
+
+analytics_store = AnalyticsStore(
+    classify_hardware=lambda issue: classify_hardware(issue),
+    loader=load_complaint_frame,
+    rebuild_interval=int(os.getenv('ANALYTICS_REBUILD_INTERVAL', '300')),
+    version=complaint_feed_version
+)
+
+def load_technician_states():
+    """Rebuild assignment state with one query per table, whatever the ticket history"""
+    open_counts = {}
+    rows = (db.session.query(Complaint.technician_id, Complaint.priority, func.count(Complaint.id))
+            .filter(Complaint.technician_id.isnot(None), Complaint.duplicate_of_id.is_(None))
+            .filter(func.coalesce(Complaint.status, 'Open') != 'Resolved')
+            .group_by(Complaint.technician_id, Complaint.priority))
+    for technician_id, priority, count in rows:
+        open_counts.setdefault(technician_id, {})[priority or 'Medium'] = count
+    
+    return [TechnicianState(
+        tech.id,
+        username=tech.username,
+        skills=[skill.strip() for skill in (tech.skills or '').split(',') if skill.strip()],
+        weight=tech.assignment_weight,
+        capacity=TECHNICIAN_CAPACITY,
+        open_by_priority=open_counts.get(tech.id, {})
+    ) for tech in User.query.filter_by(role='technician').all()]
+
+def pick_technician(issue, priority='Medium'):
+    assignment_engine.ensure_loaded(load_technician_states)
+    technician_id = assignment_engine.choose(assignment_engine.make_ticket(issue, priority))
+    return db.session.get(User, technician_id) if technician_id else None
+
+def load_open_incidents(since):
+    return (db.session.query(Complaint.id, Complaint.issue, Complaint.created_at)
+            .filter(Complaint.created_at >= since, Complaint.duplicate_of_id.is_(None))
+            .filter(func.coalesce(Complaint.status, 'Open') != 'Resolved')
+            .order_by(Complaint.created_at).all())
+
+def find_open_incident(issue):
+    """The open incident a new report of ``issue`` repeats, or None"""
+    if not DUPLICATE_WINDOW_HOURS:
+        return None
+    duplicate_index.ensure_loaded(load_open_incidents)
+    for complaint_id, _ in duplicate_index.query(issue):
+        incident = db.session.get(Complaint, complaint_id)
+        if incident is not None and incident.duplicate_of_id is None and is_open_status(incident.status):
+            return incident
+        # Resolved or deleted through another worker since the index was loaded
+        duplicate_index.remove(complaint_id)
+    return None
+
+def count_complaint(complaint, delta):
+    """Add or remove a ticket from the workload and status counters, inside the current transaction"""
+    if is_open_status(complaint.status):
+        adjust_open_tickets(complaint.technician_id, delta, complaint.priority)
+    adjust_status_count(complaint.status, delta)
+
+def link_to_incident(complaint, incident):
+    """Attach a new report to an incident; it adds to the incident's report count, not to any counters"""
+    complaint.duplicate_of = incident
+    incident.duplicate_count = Complaint.duplicate_count + 1
+
+def index_new_complaint(complaint):
+    """After commit: make a new incident a match target for later reports"""
+    if DUPLICATE_WINDOW_HOURS and complaint.duplicate_of_id is None:
+        duplicate_index.add(complaint.id, complaint.issue, complaint.created_at)
+
 # Helper function to create a support ticket
 def create_support_ticket():
     try:
         print("In create_support_ticket function")  # Debug log
-        # Get all available technicians
-        technicians = User.query.filter_by(role='technician').all()
-        if not technicians:
-            print("No technicians available")  # Debug log
-            return jsonify({
-                'response': "I apologize, but no technicians are available at the moment. Please try again later.",
-                'requiresComplaint': False
-            }), 500
-        
+        chat = chat_state()
         # Check if we have problem description
-        problem = session.get('problem', '')
+        problem = chat.get('problem', '')
         if not problem:
-            print("No problem description found in session")  # Debug log
+            print("No problem description found in conversation")  # Debug log
             return jsonify({
                 'response': "I apologize, but I couldn't determine your issue. Please try again.",
                 'requiresComplaint': False
@@ -378,21 +779,32 @@ def create_support_ticket():
             
         print(f"Creating ticket for problem: {problem}")  # Debug log
         
-        # Get user details from session
-        user_name = session.get('name', current_user.username)
-        user_designation = session.get('designation', current_user.designation)
-        user_department = session.get('department', current_user.department)
+        # Get user details from the conversation
+        user_name = chat.get('name', current_user.username)
+        user_designation = chat.get('designation', current_user.designation)
+        user_department = chat.get('department', current_user.department)
         
         print(f"User details - Name: {user_name}, Designation: {user_designation}, Department: {user_department}")
         
-        # Assign to technician with least active complaints
-        assigned_technician = min(technicians, key=lambda t: len([c for c in t.assigned_complaints if c.status != 'Resolved']))
-        
         # Determine priority based on issue type
         priority = 'Medium'
         if any(tag in problem.upper() for tag in ['[MEETING]', '[WEBINAR]', '[SEMINAR]']):
             priority = 'High'  # Meeting-related issues are higher priority
         
+        # A repeat of an open incident goes to the technician already on it;
+        # anything else is assigned with the configured strategy
+        incident = find_open_incident(problem)
+        if incident is not None and incident.technician is not None:
+            assigned_technician = incident.technician
+        else:
+            assigned_technician = pick_technician(problem, priority)
+        if assigned_technician is None:
+            print("No technicians available")  # Debug log
+            return jsonify({
+                'response': "I apologize, but no technicians are available at the moment. Please try again later.",
+                'requiresComplaint': False
+            }), 500
+        
         # Create a new complaint
         complaint = Complaint(
             complaint_no=str(uuid.uuid4())[:8].upper(),
@@ -405,11 +817,18 @@ def create_support_ticket():
             employee_name=user_name,
             employee_designation=user_designation,
             employee_department=user_department,
-            troubleshooting_steps=session.get('last_resolution', ''),
+            troubleshooting_steps=get_last_resolution()[0] or '',
             resolution_attempted=True
         )
         db.session.add(complaint)
+        if incident is not None:
+            link_to_incident(complaint, incident)
+        else:
+            count_complaint(complaint, 1)
         db.session.commit()
+        index_new_complaint(complaint)
+        analytics_store.on_created(complaint_facts(complaint))
+        event_bus.publish(complaint_event('created', complaint))
         
         print(f"Created complaint with ID: {complaint.id}, No: {complaint.complaint_no}")  # Debug log
         
@@ -425,7 +844,8 @@ def create_support_ticket():
             'resolved_at': None,
             'technician_name': assigned_technician.username,
             'resolution_time': None,
-            'comments': f"Created through chatbot - Automatically created after troubleshooting failed"
+            'comments': f"Created through chatbot - Automatically created after troubleshooting failed" + (
+                f" - Linked to incident {incident.complaint_no}" if incident is not None else '')
         }
         update_excel_sheet(complaint_data)
         
@@ -435,12 +855,17 @@ def create_support_ticket():
         
         print(f"Returning success response with ticket: {ticket_no}")  # Debug log
         
-        # Clear session
-        session.clear()
+        # End the conversation
+        end_chat()
         
         # Provide detailed response with ticket information
+        linked_message = (
+            f"Others have reported the same problem, so your ticket is linked to ticket {incident.complaint_no}, "
+            f"which is already being worked on.\n\n"
+        ) if incident is not None else ''
         response_message = (
             f"Since the troubleshooting steps didn't resolve your issue, I've automatically created a support ticket for you:\n\n"
+            f"{linked_message}"
             f"📝 Ticket Number: {ticket_no}\n"
             f"👨‍💻 Assigned Technician: {technician_name}\n"
             f"🔍 Status: Open\n\n"
@@ -456,19 +881,16 @@ def create_support_ticket():
         print(f"Error creating complaint: {error_msg}")
         import traceback
         print(traceback.format_exc())  # Print full traceback
-        session.clear()
+        end_chat()
         return jsonify({
             'response': "I apologize, but I encountered an error while creating your support ticket. Please try again later.",
             'requiresComplaint': False
         }), 500
 
-def search_gemini_api(query):
-    try:
-        if model is None:
-            return "I apologize, but I couldn't connect to the AI service. Please try again later or contact IT support directly."
-            
-        prompt = f"""As an IT Support Assistant, provide detailed troubleshooting steps for the following issue:
-        {query}
+def build_troubleshooting_prompt(query, variant='primary'):
+    issue_text = f"Alternative solution for: {query}" if variant == 'alternative' else query
+    return f"""As an IT Support Assistant, provide detailed troubleshooting steps for the following issue:
+        {issue_text}
         
         Please provide the steps in a clear, numbered format:
         1. First step
@@ -488,86 +910,179 @@ def search_gemini_api(query):
         - Situation 3
         
         IMPORTANT: Do not use any asterisks (*) or other special formatting in your response."""
+
+def search_gemini_api(query, variant='primary'):
+    cached = response_cache.get(query, variant)
+    if cached is not None:
+        print(f"LLM cache hit for {variant} query")
+        return cached
+    
+    try:
+        model = llm.get_model()
+        if model is None or not llm.is_available():
+            return "I apologize, but I couldn't connect to the AI service. Please try again later or contact IT support directly."
         
-        response = model.generate_content(prompt)
+        response = model.generate_content(build_troubleshooting_prompt(query, variant))
+        llm.report_success()
         if response and hasattr(response, 'text') and response.text:
             # Ensure the response is formatted correctly for display
             formatted_response = "Here are some troubleshooting steps:\n\n" + response.text
+            response_cache.set(query, formatted_response, variant)
             return formatted_response
         else:
             print("Empty response from Gemini API")
             return "I apologize, but I couldn't generate a response. Please try again later or contact IT support directly."
     except Exception as e:
         print(f"Error in Gemini API: {str(e)}")
+        llm.report_failure(e)
         return "I apologize, but there was an error connecting to the AI service. Please try again later or contact IT support directly."
 
-def save_to_excel(data):
-    file_path = 'data/user_data.xlsx'
-    try:
-        workbook = openpyxl.load_workbook(file_path)
-    except FileNotFoundError:
-        workbook = openpyxl.Workbook()
-        workbook.active.append(["Name", "Designation", "Department", "Problem", "Resolution"])
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+def stream_gemini_api(query, variant='primary'):
+    """Yield troubleshooting text from Gemini as it is generated.
 
-    sheet = workbook.active
-    sheet.append(data)
-    workbook.save(file_path)
-
-def update_excel_sheet(complaint_data):
-    """Update the Excel sheet with new complaint data"""
-    excel_path = 'data/complaints_log.xlsx'
+    Raises if the API is unavailable or fails, so the caller can switch to the
+    fallback steps. The complete answer is cached once the stream finishes.
+    """
+    model = llm.get_model()
+    if model is None or not llm.is_available():
+        raise RuntimeError("Gemini API is unavailable")
     
-    # Create new Excel file if it doesn't exist
-    if not os.path.exists(excel_path):
-        df = pd.DataFrame(columns=[
-            'Complaint No', 'Employee Name', 'Department', 'Employee Code',
-            'Issue Description', 'Status', 'Created At', 'Resolved At',
-            'Technician Name', 'Resolution Time (Hours)', 'Comments'
-        ])
-        df.to_excel(excel_path, index=False)
+    parts = []
+    try:
+        for chunk in model.generate_content(build_troubleshooting_prompt(query, variant), stream=True):
+            text = getattr(chunk, 'text', '')
+            if text:
+                parts.append(text)
+                yield text
+    except Exception as e:
+        llm.report_failure(e)
+        raise
+    llm.report_success()
     
-    # Load existing workbook
-    wb = load_workbook(excel_path)
-    ws = wb.active
+    full_text = ''.join(parts)
+    if not full_text or "apologize" in full_text.lower():
+        raise RuntimeError("Gemini API returned no usable troubleshooting steps")
+    response_cache.set(query, "Here are some troubleshooting steps:\n\n" + full_text, variant)
+
+def offer_resolution(chat, steps, source, history_id=None):
+    """Remember the steps shown to the employee and where they came from
+
+    ``source`` is 'gemini', 'cache' (an earlier Gemini answer), 'history' (a past
+    chat's resolution, ``history_id``) or 'fallback' (a keyword playbook).
+    """
+    chat['last_resolution'] = steps
+    chat['resolution_source'] = source
+    chat['history_id'] = history_id
+
+def save_streamed_resolution(chat_id, problem, resolution, source):
+    """Add a streamed answer to its conversation; runs after the request itself has finished"""
+    state = chat_store.load(chat_id) if chat_id else None
+    if state is not None and state.get('chat_step') == 5 and state.get('problem') == problem:
+        offer_resolution(state, resolution, source)
+        chat_store.save(chat_id, state)
+
+def get_last_resolution():
+    """``(steps, source)`` last shown in this chat (see offer_resolution), or ``(None, None)``"""
+    chat = chat_state()
+    resolution = chat.get('last_resolution')
+    if resolution is not None:
+        return resolution, chat.get('resolution_source')
+    if chat.get('problem'):
+        # The employee answered before the stream finished, or the stream was cut
+        # off; the answer it was streaming may still be in the response cache.
+        # Peeking keeps this lookup out of the cache's hit/miss counters.
+        cached = response_cache.peek(chat['problem'])
+        if cached is not None:
+            return cached, 'cache'
+    # What was shown cannot be recovered
+    return None, None
+
+def sse_event(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
+TROUBLESHOOTING_HEADER = "Here are some troubleshooting steps:\n\n"
+
+def without_header(steps):
+    # Gemini answers are cached and stored with the header, which the chat adds itself
+    return steps[len(TROUBLESHOOTING_HEADER):] if steps.startswith(TROUBLESHOOTING_HEADER) else steps
+
+def iter_text_chunks(text):
+    for line in text.splitlines(keepends=True):
+        yield line
+
+def record_chat_resolution():
+    """Store the outcome of a chat that the employee marked as resolved"""
+    chat = chat_state()
+    steps, source = get_last_resolution()
+    resolution = ChatResolution(
+        user_id=current_user.id,
+        name=chat.get('name', 'Unknown'),
+        designation=chat.get('designation', 'Unknown'),
+        department=chat.get('department', 'Unknown'),
+        problem=chat.get('problem', 'Unknown'),
+        resolution=steps or 'Unknown',
+        source=source
+    )
+    db.session.add(resolution)
+    db.session.commit()
+    if steps and source in LLM_RESOLUTION_SOURCES:
+        resolution_index.add(resolution.id, resolution.problem, resolution.resolution)
+
+def demote_resolution(resolution_id):
+    """A past resolution was offered again and did not help"""
+    db.session.execute(
+        update(ChatResolution)
+        .where(ChatResolution.id == resolution_id)
+        .values(rejections=ChatResolution.rejections + 1)
+    )
+    db.session.commit()
+    resolution_index.demote(resolution_id)
+
+def load_chat_resolutions(after_id):
+    return (db.session.query(ChatResolution.id, ChatResolution.problem, ChatResolution.resolution,
+                             ChatResolution.rejections)
+            .filter(ChatResolution.id > after_id, ChatResolution.source.in_(LLM_RESOLUTION_SOURCES))
+            .filter(ChatResolution.resolution.isnot(None), ChatResolution.resolution != 'Unknown')
+            .order_by(ChatResolution.id).all())
+
+def past_resolution(problem):
+    """``(id, steps)`` of the past chat that fixed the most similar problem, if it is similar enough"""
+    resolution_index.ensure_loaded(load_chat_resolutions)
+    return resolution_index.best(problem)
+
+def export_chat_resolutions(file_path=migrations.CHAT_RESOLUTION_WORKBOOK, batch_size=1000):
+    """Materialise resolved chats into an Excel workbook"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Name", "Designation", "Department", "Problem", "Resolution", "Resolved At"])
+    query = ChatResolution.query.order_by(ChatResolution.id).yield_per(batch_size)
+    for row in query:
+        sheet.append([
+            row.name, row.designation, row.department, row.problem, row.resolution,
+            row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else ''
+        ])
     
-    # Add new row
-    new_row = [
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+def update_excel_sheet(complaint_data):
+    """Queue a new complaint row for the Excel log"""
+    complaint_log.append([
         complaint_data['complaint_no'],
         complaint_data['employee_name'],
         complaint_data['department'],
         complaint_data['employee_code'],
         complaint_data['issue_description'],
         complaint_data['status'],
-        complaint_data['created_at'].strftime('%Y-%m-%d %H:%M:%S'),
-        complaint_data['resolved_at'].strftime('%Y-%m-%d %H:%M:%S') if complaint_data['resolved_at'] else '',
+        complaint_data['created_at'],
+        complaint_data['resolved_at'],
         complaint_data['technician_name'] or '',
         complaint_data['resolution_time'] if complaint_data['resolved_at'] else '',
         complaint_data['comments']
-    ]
-    
-    ws.append(new_row)
-    
-    # Apply styling
-    for cell in ws[ws.max_row]:
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        if ws.max_row % 2 == 0:
-            cell.fill = PatternFill(start_color='F0F0F0', end_color='F0F0F0', fill_type='solid')
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column = [cell for cell in column]
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column[0].column_letter].width = adjusted_width
-    
-    wb.save(excel_path)
+    ])
 
 @app.route('/api/chat/save', methods=['POST'])
 @login_required
@@ -577,14 +1092,15 @@ def save_chat():
         if not data or 'issue' not in data:
             return jsonify({'error': 'Invalid request data'}), 400
         
-        # Get all available technicians
-        technicians = User.query.filter_by(role='technician').all()
-        if not technicians:
+        # Repeats of an open incident go to its technician; otherwise assign with the configured strategy
+        incident = find_open_incident(data['issue'])
+        if incident is not None and incident.technician is not None:
+            assigned_technician = incident.technician
+        else:
+            assigned_technician = pick_technician(data['issue'])
+        if assigned_technician is None:
             return jsonify({'error': 'No technicians available'}), 500
         
-        # Assign to technician with least active complaints
-        assigned_technician = min(technicians, key=lambda t: len([c for c in t.assigned_complaints if c.status != 'Resolved']))
-        
         # Create a new complaint
         complaint = Complaint(
             complaint_no=str(uuid.uuid4())[:8].upper(),
@@ -597,11 +1113,18 @@ def save_chat():
             employee_name=current_user.username,
             employee_designation=current_user.designation,
             employee_department=current_user.department,
-            troubleshooting_steps=data['troubleshooting_steps'],
+            troubleshooting_steps=data.get('troubleshooting_steps', ''),
             resolution_attempted=True
         )
         db.session.add(complaint)
+        if incident is not None:
+            link_to_incident(complaint, incident)
+        else:
+            count_complaint(complaint, 1)
         db.session.commit()
+        index_new_complaint(complaint)
+        analytics_store.on_created(complaint_facts(complaint))
+        event_bus.publish(complaint_event('created', complaint))
         
         # Update Excel sheet
         complaint_data = {
@@ -615,14 +1138,15 @@ def save_chat():
             'resolved_at': None,
             'technician_name': assigned_technician.username,
             'resolution_time': None,
-            'comments': ''
+            'comments': f"Linked to incident {incident.complaint_no}" if incident is not None else ''
         }
         update_excel_sheet(complaint_data)
         
         return jsonify({
             'complaintCreated': True,
             'complaintNo': complaint.complaint_no,
-            'assignedTechnician': assigned_technician.username
+            'assignedTechnician': assigned_technician.username,
+            'duplicateOf': incident.complaint_no if incident is not None else None
         })
     except Exception as e:
         print(f"Error saving chat: {str(e)}")
@@ -635,167 +1159,383 @@ def create_complaint():
     flash('All IT support tickets must be created through the IT Support Assistant chatbot.', 'info')
     return redirect(url_for('chat_page'))
 
+def complaint_detail_query():
+    # Two queries whatever the comment count: the complaint joined to its employee
+    # and technician, then every comment with its author in one SELECT ... IN
+    return Complaint.query.options(
+        joinedload(Complaint.user),
+        joinedload(Complaint.technician),
+        selectinload(Complaint.comments).joinedload(Comment.user)
+    )
+
+def comment_detail(comment):
+    return {
+        'id': comment.id,
+        'complaint_id': comment.complaint_id,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat() if comment.created_at else None,
+        'user': {
+            'username': comment.user.username
+        }
+    }
+
+def complaint_detail(complaint):
+    """The detail modal's JSON, with fallback values; load via complaint_detail_query"""
+    user = complaint.user
+    return {
+        'complaint_no': complaint.complaint_no,
+        'issue': complaint.issue or 'No issue description available',
+        'status': complaint.status or 'Unknown',
+        'priority': complaint.priority or 'Unknown',
+        'created_at': complaint.created_at.isoformat() if complaint.created_at else None,
+        'technician': {
+            'username': complaint.technician.username
+        } if complaint.technician else None,
+        'employee_name': complaint.employee_name or user.username or 'Unknown',
+        'employee_designation': complaint.employee_designation or user.designation or 'N/A',
+        'employee_department': complaint.employee_department or user.department or 'N/A',
+        'troubleshooting_steps': complaint.troubleshooting_steps or 'No troubleshooting steps available',
+        'resolution_attempted': complaint.resolution_attempted or False,
+        'comments': [comment_detail(comment) for comment in complaint.comments]
+    }
+
 @app.route('/complaint/<int:complaint_id>')
 @login_required
 def view_complaint(complaint_id):
     try:
-        print(f"Attempting to fetch complaint with ID: {complaint_id}")  # Debug log
-        complaint = Complaint.query.get_or_404(complaint_id)
-        print(f"Found complaint: {complaint.complaint_no}")  # Debug log
+        complaint = complaint_detail_query().filter(Complaint.id == complaint_id).first_or_404()
         
         # Check if user has permission to view this complaint
         if current_user.role == 'employee' and complaint.user_id != current_user.id:
-            print("Unauthorized access attempt by employee")  # Debug log
             return jsonify({'error': 'Unauthorized'}), 403
         elif current_user.role == 'technician' and complaint.technician_id != current_user.id:
-            print("Unauthorized access attempt by technician")  # Debug log
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Prepare the response data with fallback values
-        response_data = {
-            'complaint_no': complaint.complaint_no,
-            'issue': complaint.issue or 'No issue description available',
-            'status': complaint.status or 'Unknown',
-            'priority': complaint.priority or 'Unknown',
-            'created_at': complaint.created_at.isoformat() if complaint.created_at else None,
-            'technician': {
-                'username': complaint.technician.username
-            } if complaint.technician else None,
-            'employee_name': complaint.employee_name or complaint.user.username or 'Unknown',
-            'employee_designation': complaint.employee_designation or complaint.user.designation or 'N/A',
-            'employee_department': complaint.employee_department or complaint.user.department or 'N/A',
-            'troubleshooting_steps': complaint.troubleshooting_steps or 'No troubleshooting steps available',
-            'resolution_attempted': complaint.resolution_attempted or False,
-            'comments': [{
-                'content': comment.content,
-                'created_at': comment.created_at.isoformat() if comment.created_at else None,
-                'user': {
-                    'username': comment.user.username
-                }
-            } for comment in complaint.comments]
-        }
-        
-        print(f"Returning complaint data: {response_data}")  # Debug log
-        return jsonify(response_data)
+        return jsonify(complaint_detail(complaint))
         
     except Exception as e:
-        print(f"Error in view_complaint route: {str(e)}")  # Debug log
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")  # Print full traceback
+        print(f"Error in view_complaint route: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Dashboards render one page of complaints; the tables page through /api/complaints
+DASHBOARD_PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', '25'))
+DASHBOARD_MAX_PAGE_SIZE = int(os.getenv('DASHBOARD_MAX_PAGE_SIZE', '100'))
+
+COMPLAINT_ROW_TEMPLATES = {
+    'admin': 'partials/admin_complaint_rows.html',
+    'technician': 'partials/technician_complaint_rows.html',
+    'employee': 'partials/employee_complaint_rows.html',
+}
+
+def visible_complaints(user):
+    """Everything for admins; a technician's queue or an employee's own tickets otherwise
+
+    Admins and technicians see one row per incident: reports linked to an
+    incident are counted on its row instead of listed.
+    """
+    query = Complaint.query
+    if user.role == 'employee':
+        return query.filter(Complaint.user_id == user.id)
+    if user.role == 'technician':
+        query = query.filter(Complaint.technician_id == user.id)
+    return query.filter(Complaint.duplicate_of_id.is_(None))
+
+def visible_tombstones(user):
+    """Removals the user's dashboard needs to hear about, matching visible_complaints"""
+    query = ComplaintTombstone.query
+    if user.role == 'admin':
+        return query.filter(ComplaintTombstone.reason == 'deleted')
+    if user.role == 'technician':
+        return query.filter(ComplaintTombstone.technician_id == user.id)
+    return query.filter(ComplaintTombstone.user_id == user.id)
+
+def complaint_filters(args, user):
+    names = ('status', 'priority', 'department', 'technician') if user.role == 'admin' else ('status', 'priority')
+    filters = {name: args[name] for name in names if args.get(name)}
+    if not (filters.get('technician', 'unassigned') == 'unassigned' or filters['technician'].isdigit()):
+        del filters['technician']
+    return filters
+
+def filter_complaints(query, filters):
+    if 'status' in filters:
+        query = query.filter(Complaint.status == filters['status'])
+    if 'priority' in filters:
+        query = query.filter(Complaint.priority == filters['priority'])
+    if 'department' in filters:
+        query = query.filter(Complaint.employee_department == filters['department'])
+    if 'technician' in filters:
+        if filters['technician'] == 'unassigned':
+            query = query.filter(Complaint.technician_id.is_(None))
+        else:
+            query = query.filter(Complaint.technician_id == int(filters['technician']))
+    return query
+
+def complaint_page(user, filters, cursor=None, limit=DASHBOARD_PAGE_SIZE, newest_first=True):
+    """Return ``(complaints, next_cursor)`` for one dashboard page"""
+    query = (filter_complaints(visible_complaints(user), filters)
+             .options(joinedload(Complaint.user), joinedload(Complaint.technician)))
+    return keyset_page(query, Complaint.created_at, Complaint.id,
+                       cursor=cursor, limit=limit, newest_first=newest_first)
+
+def complaint_row(complaint):
+    return {
+        'id': complaint.id,
+        'complaint_no': complaint.complaint_no,
+        'issue': complaint.issue,
+        'status': complaint.status,
+        'priority': complaint.priority,
+        'employee_name': complaint.employee_name or complaint.user.username,
+        'department': complaint.employee_department or complaint.user.department,
+        'employee_code': complaint.user.employee_code,
+        'technician': {
+            'id': complaint.technician.id,
+            'username': complaint.technician.username
+        } if complaint.technician else None,
+        'created_at': complaint.created_at.isoformat() if complaint.created_at else None
+    }
+
+def status_summary(query):
+    """Status counts for one user's complaints, in the same shape as get_dashboard_stats"""
+    counts = dict(query.with_entities(Complaint.status, func.count(Complaint.id)).group_by(Complaint.status).all())
+    return {
+        'total': sum(counts.values()),
+        'open': counts.get('Open', 0),
+        'in_progress': counts.get('In Progress', 0),
+        'resolved': counts.get('Resolved', 0)
+    }
+
+@app.route('/api/complaints')
+@login_required
+def list_complaints():
+    try:
+        limit = max(1, min(int(request.args.get('limit', DASHBOARD_PAGE_SIZE)), DASHBOARD_MAX_PAGE_SIZE))
+        filters = complaint_filters(request.args, current_user)
+        complaints, next_cursor = complaint_page(
+            current_user, filters,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            newest_first=request.args.get('order') != 'oldest'
+        )
+    except (InvalidCursor, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    payload = {
+        'complaints': [complaint_row(complaint) for complaint in complaints],
+        'next_cursor': next_cursor
+    }
+    # The dashboards append server-rendered rows so there is one row template per table
+    if request.args.get('render') == 'rows':
+        payload['html'] = render_template(COMPLAINT_ROW_TEMPLATES[current_user.role],
+                                          complaints=complaints, filters=filters)
+    return jsonify(payload)
+
+# Columns the LIKE fallback searches when the database has no FTS5 index (see search.py)
+SEARCH_FALLBACK_COLUMNS = (Complaint.complaint_no, Complaint.issue, Complaint.troubleshooting_steps,
+                           Complaint.employee_name, Complaint.employee_designation, Complaint.employee_department)
+_search_index_by_url = {}
+
+def complaint_search_page(user, filters, text, cursor=None, limit=DASHBOARD_PAGE_SIZE):
+    """Return ``(complaints, next_cursor)`` for one page of search results, best match first"""
+    url = str(db.engine.url)
+    if url not in _search_index_by_url:
+        _search_index_by_url[url] = search.has_search_index(db.engine)
+    query = (filter_complaints(visible_complaints(user), filters)
+             .options(joinedload(Complaint.user), joinedload(Complaint.technician)))
+    return search.search_page(query, Complaint.id, text, cursor=cursor, limit=limit,
+                              fts=_search_index_by_url[url], like_columns=SEARCH_FALLBACK_COLUMNS,
+                              newest_first=(Complaint.created_at.desc(), Complaint.id.desc()))
+
+@app.route('/api/complaints/search')
+@login_required
+def search_complaints():
+    try:
+        limit = max(1, min(int(request.args.get('limit', DASHBOARD_PAGE_SIZE)), DASHBOARD_MAX_PAGE_SIZE))
+        filters = complaint_filters(request.args, current_user)
+        query = request.args.get('q', '')
+        complaints, next_cursor = complaint_search_page(current_user, filters, query,
+                                                        cursor=request.args.get('cursor'), limit=limit)
+    except (InvalidCursor, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    payload = {
+        'complaints': [complaint_row(complaint) for complaint in complaints],
+        'next_cursor': next_cursor
+    }
+    if request.args.get('render') == 'rows':
+        payload['html'] = render_template(COMPLAINT_ROW_TEMPLATES[current_user.role],
+                                          complaints=complaints, filters=filters, search=query)
+    return jsonify(payload)
+
+CHANGE_FEED_LIMIT = int(os.getenv('CHANGE_FEED_LIMIT', '200'))
+
+@app.route('/api/complaints/changes')
+@login_required
+def complaint_changes():
+    """Complaints and comments changed since the client's ``since`` version"""
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    version = current_change_seq()
+    payload = {'version': version, 'complaints': [], 'removed': [], 'comments': []}
+    if since >= version:
+        return jsonify(payload)
+
+    # Only changes the user can see count towards the limit
+    changed = (visible_complaints(current_user).filter(Complaint.change_seq > since)
+               .options(joinedload(Complaint.user), joinedload(Complaint.technician))
+               .order_by(Complaint.change_seq)
+               .limit(CHANGE_FEED_LIMIT + 1).all())
+    removals = (visible_tombstones(current_user).filter(ComplaintTombstone.change_seq > since)
+                .with_entities(ComplaintTombstone.complaint_id)
+                .limit(CHANGE_FEED_LIMIT + 1).all())
+    if len(changed) > CHANGE_FEED_LIMIT or len(removals) > CHANGE_FEED_LIMIT:
+        # Too far behind to patch; the client reloads its first page instead
+        payload['reset'] = True
+        return jsonify(payload)
+
+    # Rows that stopped matching the filters, and rows deleted or reassigned away, are sent as ids only
+    filters = complaint_filters(request.args, current_user)
+    changed_ids = {complaint.id for complaint in changed}
+    visible_ids = {row.id for row in filter_complaints(visible_complaints(current_user), filters)
+                   .filter(Complaint.id.in_(changed_ids)).with_entities(Complaint.id)} if changed_ids else set()
+    complaints = [complaint for complaint in changed if complaint.id in visible_ids]
+    payload['complaints'] = [complaint_row(complaint) for complaint in complaints]
+    payload['removed'] = [complaint.id for complaint in changed if complaint.id not in visible_ids]
+    # A ticket reassigned back to the technician is already in changed
+    payload['removed'] += [row.complaint_id for row in removals if row.complaint_id not in changed_ids]
+
+    if visible_ids:
+        comments = (Comment.query.filter(Comment.change_seq > since, Comment.complaint_id.in_(visible_ids))
+                    .options(joinedload(Comment.user)).order_by(Comment.id).all())
+        payload['comments'] = [comment_detail(comment) for comment in comments]
+
+    if current_user.role == 'admin':
+        payload['stats'], _ = get_dashboard_stats()
+    else:
+        payload['stats'] = status_summary(visible_complaints(current_user))
+    if request.args.get('render') == 'rows':
+        template = COMPLAINT_ROW_TEMPLATES[current_user.role]
+        payload['html'] = {complaint.id: render_template(template, complaints=[complaint], filters=filters)
+                           for complaint in complaints}
+    return jsonify(payload)
+
+EVENT_STREAM_KEEPALIVE = float(os.getenv('EVENT_STREAM_KEEPALIVE', '15'))
+EVENT_STREAM_MAX_AGE = float(os.getenv('EVENT_STREAM_MAX_AGE', '300'))
+
+def complaint_event(kind, complaint, previous_technician_id=None):
+    """Who a ticket event concerns; dashboards fetch the row itself from the change feed"""
+    technician_ids = [tid for tid in (complaint.technician_id, previous_technician_id) if tid]
+    return {
+        'type': kind,
+        'complaint_id': complaint.id,
+        'user_id': complaint.user_id,
+        'technician_ids': technician_ids
+    }
+
+def event_filter(role, user_id):
+    # Same visibility as visible_complaints: admins see everything, technicians
+    # their assigned tickets (including ones just reassigned away), employees their own
+    if role == 'admin':
+        return lambda event: True
+    if role == 'technician':
+        return lambda event: user_id in event['technician_ids']
+    return lambda event: event['user_id'] == user_id
+
+@app.route('/api/events')
+@login_required
+def complaint_events():
+    """Server-sent events stream of ticket changes the user may see"""
+    # Employee dashboards poll instead; there are too many of them to hold a thread each
+    if current_user.role == 'employee':
+        return jsonify({'error': 'Unauthorized'}), 403
+    subscription = event_bus.subscribe(event_filter(current_user.role, current_user.id))
+    if subscription is None:
+        # The browser does not retry a failed stream; the dashboard polls instead
+        return jsonify({'error': 'Too many open event streams'}), 503
+
+    def stream():
+        # Streams are recycled every EVENT_STREAM_MAX_AGE seconds so worker
+        # threads are not held forever; the browser reconnects on its own
+        deadline = time.monotonic() + EVENT_STREAM_MAX_AGE
+        try:
+            yield 'retry: 3000\n\n'
+            while time.monotonic() < deadline:
+                event = subscription.get(timeout=EVENT_STREAM_KEEPALIVE)
+                # Comment lines keep proxies from closing an idle stream
+                yield f"data: {json.dumps(event)}\n\n" if event else ': keepalive\n\n'
+        finally:
+            subscription.close()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def technician_workload_query():
+    # One GROUP BY, answered from ix_complaint_technician_status (technician, status and
+    # incident link) without touching the table
+    return db.session.query(
+        Complaint.technician_id,
+        func.count(Complaint.id).label('assigned'),
+        func.sum(case((Complaint.status == 'Resolved', 1), else_=0)).label('resolved'),
+        func.sum(case((Complaint.status == 'In Progress', 1), else_=0)).label('in_progress')
+    ).filter(Complaint.technician_id.isnot(None), Complaint.duplicate_of_id.is_(None)).group_by(Complaint.technician_id)
+
+def technician_workloads(technicians):
+    """Assigned, resolved and in-progress counts and efficiency for each technician"""
+    counts = {row.technician_id: row for row in technician_workload_query()}
+
+    workloads = []
+    for tech in technicians:
+        row = counts.get(tech.id)
+        assigned = row.assigned if row else 0
+        resolved = row.resolved if row else 0
+        workloads.append({
+            'username': tech.username,
+            'assigned': assigned,
+            'resolved': resolved,
+            'in_progress': row.in_progress if row else 0,
+            'efficiency': resolved / assigned * 100 if assigned else 0
+        })
+    return workloads
+
 @app.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
     if current_user.role != 'admin':
         return redirect(url_for('index'))
     
-    # Get all complaints
-    complaints = Complaint.query.order_by(Complaint.created_at.desc()).all()
+    # First page of complaints; the table pages through /api/complaints and
+    # patches itself from the change feed, starting at this version
+    change_version = current_change_seq()
+    filters = complaint_filters(request.args, current_user)
+    complaints, next_cursor = complaint_page(current_user, filters)
+    stats, _ = get_dashboard_stats()
     
     # Get all technicians
     technicians = User.query.filter_by(role='technician').all()
+    workloads = technician_workloads(technicians)
     
-    # Get department statistics from chatbot data
-    departments = {}
-    for complaint in complaints:
-        dept = complaint.employee_department if complaint.employee_department else complaint.user.department
-        if dept not in departments:
-            departments[dept] = {
-                'name': dept,
-                'total_issues': 0,
-                'common_problems': [],
-                'trend': 'stable'
-            }
-        departments[dept]['total_issues'] += 1
-        
-        # Add issue to common problems if it's not already there
-        if complaint.issue not in departments[dept]['common_problems']:
-            departments[dept]['common_problems'].append(complaint.issue)
-    
-    # Get hardware issues from chatbot data
-    hardware_issues = {}
-    for complaint in complaints:
-        # Extract hardware type from issue description
-        issue_lower = complaint.issue.lower()
-        if 'laptop' in issue_lower or 'computer' in issue_lower:
-            hw_type = 'Laptop/Computer'
-        elif 'printer' in issue_lower:
-            hw_type = 'Printer'
-        elif 'network' in issue_lower or 'internet' in issue_lower:
-            hw_type = 'Network'
-        elif 'phone' in issue_lower or 'mobile' in issue_lower:
-            hw_type = 'Phone/Mobile'
-        else:
-            hw_type = 'Other'
-        
-        if hw_type not in hardware_issues:
-            hardware_issues[hw_type] = {
-                'type': hw_type,
-                'total_issues': 0,
-                'common_problems': [],
-                'resolution_rate': 0
-            }
-        hardware_issues[hw_type]['total_issues'] += 1
-        
-        # Add issue to common problems if it's not already there
-        if complaint.issue not in hardware_issues[hw_type]['common_problems']:
-            hardware_issues[hw_type]['common_problems'].append(complaint.issue)
-    
-    # Calculate resolution rates
-    for hw_type in hardware_issues:
-        resolved = sum(1 for c in complaints if c.status == 'Resolved' and 
-                      (hw_type == 'Laptop/Computer' and ('laptop' in c.issue.lower() or 'computer' in c.issue.lower()) or
-                       hw_type == 'Printer' and 'printer' in c.issue.lower() or
-                       hw_type == 'Network' and ('network' in c.issue.lower() or 'internet' in c.issue.lower()) or
-                       hw_type == 'Phone/Mobile' and ('phone' in c.issue.lower() or 'mobile' in c.issue.lower()) or
-                       hw_type == 'Other' and not any(x in c.issue.lower() for x in ['laptop', 'computer', 'printer', 'network', 'internet', 'phone', 'mobile'])))
-        total = hardware_issues[hw_type]['total_issues']
-        hardware_issues[hw_type]['resolution_rate'] = round((resolved / total * 100) if total > 0 else 0)
-    
-    # Generate failure predictions based on chatbot data
-    predictions = []
-    for complaint in complaints:
-        if complaint.employee_name and complaint.employee_department:
-            # Analyze complaint history to predict potential failures
-            issue_lower = complaint.issue.lower()
-            if 'laptop' in issue_lower or 'computer' in issue_lower:
-                hw_type = 'Laptop/Computer'
-            elif 'printer' in issue_lower:
-                hw_type = 'Printer'
-            elif 'network' in issue_lower or 'internet' in issue_lower:
-                hw_type = 'Network'
-            elif 'phone' in issue_lower or 'mobile' in issue_lower:
-                hw_type = 'Phone/Mobile'
-            else:
-                hw_type = 'Other'
-            
-            # Count similar issues for this employee
-            similar_issues = sum(1 for c in complaints 
-                               if c.employee_name == complaint.employee_name 
-                               and c.employee_department == complaint.employee_department
-                               and c.issue.lower() == complaint.issue.lower())
-            
-            # Determine risk level based on similar issues
-            risk_level = 'High' if similar_issues > 3 else 'Medium' if similar_issues > 1 else 'Low'
-            risk_level_color = 'danger' if risk_level == 'High' else 'warning' if risk_level == 'Medium' else 'success'
-            
-            # Add prediction if not already added for this employee
-            if not any(p['employee'] == complaint.employee_name for p in predictions):
-                predictions.append({
-                    'employee': complaint.employee_name,
-                    'department': complaint.employee_department,
-                    'hardware': hw_type,
-                    'predicted_failure': 'Within 30 days' if risk_level == 'High' else 'Within 90 days' if risk_level == 'Medium' else 'No immediate risk',
-                    'risk_level': risk_level,
-                    'risk_level_color': risk_level_color
-                })
+    # Department, hardware and prediction panels come from precomputed aggregates
+    departments, hardware_issues, predictions = analytics_store.dashboard()
+    # The department filter matches Complaint.employee_department, so offer exactly those values
+    filter_departments = [name for name, in db.session.query(Complaint.employee_department)
+                          .filter(Complaint.employee_department.isnot(None), Complaint.employee_department != '')
+                          .distinct().order_by(Complaint.employee_department)]
     
     return render_template('admin_dashboard.html',
                          complaints=complaints,
+                         next_cursor=next_cursor,
+                         change_version=change_version,
+                         poll_interval=EVENT_POLL_INTERVAL,
+                         fallback_poll_interval=EVENT_FALLBACK_POLL_INTERVAL,
+                         filters=filters,
+                         stats=stats,
                          technicians=technicians,
-                         departments=list(departments.values()),
-                         hardware_issues=list(hardware_issues.values()),
+                         workloads=workloads,
+                         departments=departments,
+                         filter_departments=filter_departments,
+                         hardware_issues=hardware_issues,
                          predictions=predictions)
 
 @app.route('/complaint/<int:complaint_id>/delete', methods=['POST'])
@@ -809,8 +1549,21 @@ def delete_complaint(complaint_id):
         # Delete all associated comments first
         Comment.query.filter_by(complaint_id=complaint_id).delete()
         # Then delete the complaint
+        if complaint.duplicate_of is not None:
+            complaint.duplicate_of.duplicate_count = Complaint.duplicate_count - 1
+        else:
+            count_complaint(complaint, -1)
+        # Reports linked to this incident become tickets of their own again
+        for duplicate in list(complaint.duplicates):
+            duplicate.duplicate_of = None
+            count_complaint(duplicate, 1)
+        event = complaint_event('deleted', complaint)
+        facts = complaint_facts(complaint)
         db.session.delete(complaint)
         db.session.commit()
+        duplicate_index.remove(complaint_id)
+        analytics_store.on_deleted(facts)
+        event_bus.publish(event)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -831,7 +1584,9 @@ def add_user():
             role=data['role'],
             department=data['department'],
             designation=data['designation'],
-            employee_code=data['employee_code']
+            employee_code=data['employee_code'],
+            skills=data.get('skills'),
+            assignment_weight=int(data.get('assignment_weight') or 1)
         )
         db.session.add(user)
         db.session.commit()
@@ -846,17 +1601,34 @@ def technician_dashboard():
     if current_user.role != 'technician':
         return redirect(url_for('index'))
     
-    # Get assigned complaints
-    complaints = Complaint.query.filter_by(technician_id=current_user.id).order_by(Complaint.created_at.desc()).all()
-    return render_template('technician_dashboard.html', complaints=complaints)
+    # First page of assigned complaints; the table pages through /api/complaints
+    change_version = current_change_seq()
+    filters = complaint_filters(request.args, current_user)
+    complaints, next_cursor = complaint_page(current_user, filters)
+    return render_template('technician_dashboard.html',
+                         complaints=complaints,
+                         next_cursor=next_cursor,
+                         change_version=change_version,
+                         poll_interval=EVENT_POLL_INTERVAL,
+                         fallback_poll_interval=EVENT_FALLBACK_POLL_INTERVAL,
+                         filters=filters,
+                         stats=status_summary(visible_complaints(current_user)))
 
 @app.route('/employee/dashboard')
 @login_required
 def employee_dashboard():
     if current_user.role != 'employee':
         return redirect(url_for('index'))
-    user_complaints = Complaint.query.filter_by(user_id=current_user.id).order_by(Complaint.created_at.desc()).all()
-    return render_template('employee_dashboard.html', complaints=user_complaints)
+    change_version = current_change_seq()
+    filters = complaint_filters(request.args, current_user)
+    user_complaints, next_cursor = complaint_page(current_user, filters)
+    return render_template('employee_dashboard.html',
+                         complaints=user_complaints,
+                         next_cursor=next_cursor,
+                         change_version=change_version,
+                         poll_interval=EVENT_POLL_INTERVAL or EVENT_FALLBACK_POLL_INTERVAL,
+                         filters=filters,
+                         stats=status_summary(visible_complaints(current_user)))
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -956,10 +1728,26 @@ def create_default_users():
 @app.route('/logout')
 @login_required
 def logout():
+    end_chat()
     logout_user()
     flash('You have been logged out successfully.')
     return redirect(url_for('index'))
 
+def set_complaint_status(complaint, status):
+    """Change the status and the counters that depend on it, inside the current transaction"""
+    old_status = complaint.status
+    was_open = is_open_status(old_status)
+    complaint.status = status
+    if status == 'Resolved':
+        complaint.resolved_at = datetime.utcnow()
+    if complaint.duplicate_of_id is not None:
+        return  # counted on its incident
+    if was_open != is_open_status(complaint.status):
+        adjust_open_tickets(complaint.technician_id, 1 if not was_open else -1, complaint.priority)
+    if (old_status or 'Open') != complaint.status:
+        adjust_status_count(old_status, -1)
+        adjust_status_count(complaint.status, 1)
+
 @app.route('/complaint/<int:complaint_id>/update_status', methods=['POST'])
 @login_required
 def update_complaint_status(complaint_id):
@@ -971,10 +1759,21 @@ def update_complaint_status(complaint_id):
     
     try:
         data = request.json
-        complaint.status = data['status']
-        if data['status'] == 'Resolved':
-            complaint.resolved_at = datetime.utcnow()
+        # Reports linked to an incident move with it
+        changed = [complaint] + [duplicate for duplicate in complaint.duplicates if duplicate.status != data['status']]
+        previous = [complaint_facts(target) for target in changed]
+        for target in changed:
+            set_complaint_status(target, data['status'])
+        events = [complaint_event('status', target) for target in changed]
         db.session.commit()
+        for facts, target in zip(previous, changed):
+            analytics_store.on_updated(facts, target.status)
+        if not is_open_status(complaint.status):
+            duplicate_index.remove(complaint.id)
+        elif complaint.duplicate_of_id is None:
+            index_new_complaint(complaint)
+        for event in events:
+            event_bus.publish(event)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -993,8 +1792,20 @@ def assign_technician(complaint_id):
         if not data or 'technician_id' not in data:
             return jsonify({'error': 'Missing technician_id in request'}), 400
             
-        complaint.technician_id = data['technician_id']
+        technician_id = int(data['technician_id'])
+        # Reports linked to an incident stay with its technician
+        events = []
+        for target in [complaint] + complaint.duplicates:
+            old_technician_id = target.technician_id
+            target.technician_id = technician_id
+            if (is_open_status(target.status) and old_technician_id != target.technician_id
+                    and target.duplicate_of_id is None):
+                adjust_open_tickets(old_technician_id, -1, target.priority)
+                adjust_open_tickets(target.technician_id, 1, target.priority)
+            events.append(complaint_event('assigned', target, previous_technician_id=old_technician_id))
         db.session.commit()
+        for event in events:
+            event_bus.publish(event)
         print(f"Successfully assigned technician {data['technician_id']} to complaint {complaint_id}")  # Debug log
         return jsonify({'success': True})
     except Exception as e:
@@ -1020,26 +1831,189 @@ def add_comment(complaint_id):
             complaint_id=complaint_id
         )
         db.session.add(comment)
+        event = complaint_event('comment', complaint)
         db.session.commit()
+        event_bus.publish(event)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+# Short-lived copy of the status counters shared by every admin tab polling the stats
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '5'))
+_stats_cache = {'expires': 0, 'stats': None, 'etag': None}
+_stats_cache_lock = threading.Lock()
+
+def invalidate_stats_cache():
+    _stats_cache['expires'] = 0
+
+def get_dashboard_stats():
+    with _stats_cache_lock:
+        if _stats_cache['stats'] is None or time.monotonic() >= _stats_cache['expires']:
+            counts = {row.status: row.count for row in ComplaintStatusCount.query.all()}
+            stats = {
+                'total': sum(counts.values()),
+                'open': counts.get('Open', 0),
+                'in_progress': counts.get('In Progress', 0),
+                'resolved': counts.get('Resolved', 0)
+            }
+            _stats_cache['stats'] = stats
+            _stats_cache['etag'] = hashlib.md5(json.dumps(stats, sort_keys=True).encode()).hexdigest()
+            _stats_cache['expires'] = time.monotonic() + STATS_CACHE_TTL
+        return _stats_cache['stats'], _stats_cache['etag']
+
 @app.route('/admin/dashboard/stats')
 @login_required
 def admin_dashboard_stats():
     if current_user.role != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
-    complaints = Complaint.query.all()
-    stats = {
-        'total': len(complaints),
-        'open': len([c for c in complaints if c.status == 'Open']),
-        'in_progress': len([c for c in complaints if c.status == 'In Progress']),
-        'resolved': len([c for c in complaints if c.status == 'Resolved'])
-    }
-    return jsonify(stats)
+    stats, etag = get_dashboard_stats()
+    response = jsonify(stats)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = int(STATS_CACHE_TTL)
+    return response.make_conditional(request)
+
+@app.route('/admin/llm/status')
+@login_required
+def admin_llm_status():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify({
+        'api': llm.status(),
+        'cache': response_cache.stats(),
+        'executor': llm_executor.stats(),
+        'history': resolution_index.stats(),
+        'conversations': chat_store.stats()
+    })
+
+@app.route('/admin/assignment/status')
+@login_required
+def admin_assignment_status():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    assignment_engine.ensure_loaded(load_technician_states)
+    return jsonify({
+        'strategy': assignment_engine.strategy.name,
+        'technicians': assignment_engine.snapshot()
+    })
+
+@app.route('/admin/duplicates/status')
+@login_required
+def admin_duplicates_status():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(duplicate_index.status())
+
+@app.route('/admin/events/status')
+@login_required
+def admin_events_status():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(event_bus.status())
+
+# Complaint exports stream through exports.py in batches of EXPORT_BATCH_SIZE
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+# PDF reports are laid out in PDF_RENDER_PROCESSES worker processes (0 renders in the web process)
+exports.WRITERS['pdf'] = exports.PDFWriter(processes=int(os.getenv('PDF_RENDER_PROCESSES', '1')))
+
+EXPORT_COLUMNS = [
+    'Complaint No', 'Employee Name', 'Department & Code', 'Issue', 'Status', 'Priority',
+    'Created At', 'Resolved At', 'Assigned Technician', 'Comments'
+]
+
+def complaint_export_row(complaint):
+    return [
+        complaint.complaint_no,
+        complaint.employee_name if complaint.employee_name else complaint.user.username,
+        f"{complaint.employee_department if complaint.employee_department else complaint.user.department}({complaint.user.employee_code})",
+        complaint.issue,
+        complaint.status,
+        complaint.priority,
+        complaint.created_at.strftime('%Y-%m-%d %H:%M:%S') if complaint.created_at else '',
+        complaint.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if complaint.resolved_at else '',
+        complaint.technician.username if complaint.technician else '',
+        '\n'.join([f"{comment.user.username}: {comment.content}" for comment in complaint.comments])
+    ]
+
+def complaint_export_rows():
+    return exports.iter_rows(complaint_detail_query(), Complaint.id, complaint_export_row, EXPORT_BATCH_SIZE)
+
+def send_complaint_export(format):
+    """Write the export to an anonymous temporary file and send it"""
+    writer = exports.WRITERS[format]
+    fileobj = tempfile.TemporaryFile()
+    try:
+        writer.write(EXPORT_COLUMNS, complaint_export_rows(), fileobj)
+        fileobj.seek(0)
+    except Exception:
+        fileobj.close()
+        raise
+    return send_file(fileobj, mimetype=writer.mimetype, as_attachment=True,
+                     download_name=f'complaints.{writer.extension}')
+
+def build_complaint_export(job, fileobj):
+    with app.app_context():
+        job.total = Complaint.query.count()
+        exports.WRITERS[job.format].write(EXPORT_COLUMNS, job.track(complaint_export_rows()), fileobj)
+
+# Exports requested from the dashboard run in the background; files are named
+# after the change feed version they were built from and reused until it moves
+export_jobs = ExportJobQueue(
+    os.getenv('EXPORT_DIR', 'data/exports'),
+    build_complaint_export,
+    max_workers=int(os.getenv('EXPORT_MAX_WORKERS', '2')),
+    keep=int(os.getenv('EXPORT_KEEP', '3'))
+)
+
+def export_job_payload(job):
+    payload = job.to_dict()
+    payload['status_url'] = url_for('export_job_status', job_id=job.id)
+    if job.status == 'done':
+        payload['download_url'] = url_for('download_export_job', job_id=job.id)
+    return payload
+
+@app.route('/admin/export/jobs', methods=['POST'])
+@login_required
+def start_export_job():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    format = (request.json or {}).get('format')
+    if format not in exports.WRITERS:
+        return jsonify({'error': f'Unknown export format: {format}'}), 400
+    writer = exports.WRITERS[format]
+    job = export_jobs.submit(format, writer.extension, current_change_seq(), current_change_seq(USER_FEED),
+                             '|'.join(EXPORT_COLUMNS))
+    return jsonify(export_job_payload(job)), 200 if job.status == 'done' else 202
+
+@app.route('/admin/export/jobs/<job_id>')
+@login_required
+def export_job_status(job_id):
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Export job not found'}), 404
+    return jsonify(export_job_payload(job))
+
+@app.route('/admin/export/jobs/<job_id>/download')
+@login_required
+def download_export_job(job_id):
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    job = export_jobs.get(job_id)
+    if job is None or job.status != 'done' or not os.path.exists(job.path):
+        return jsonify({'error': 'Export is not ready'}), 404
+    return send_file(os.path.abspath(job.path), as_attachment=True,
+                     download_name=f"complaints{os.path.splitext(job.path)[1]}")
 
 @app.route('/admin/export/complaints/excel')
 @login_required
@@ -1048,61 +2022,34 @@ def export_complaints_excel():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        complaints = Complaint.query.all()
-        data = []
-        for complaint in complaints:
-            data.append({
-                'Complaint No': complaint.complaint_no,
-                'Employee Name': complaint.employee_name if complaint.employee_name else complaint.user.username,
-                'Department & Code': f"{complaint.employee_department if complaint.employee_department else complaint.user.department}({complaint.user.employee_code})",
-                'Issue': complaint.issue,
-                'Status': complaint.status,
-                'Priority': complaint.priority,
-                'Created At': complaint.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Resolved At': complaint.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if complaint.resolved_at else '',
-                'Assigned Technician': complaint.technician.username if complaint.technician else '',
-                'Comments': '\n'.join([f"{comment.user.username}: {comment.content}" for comment in complaint.comments])
-            })
-        
-        df = pd.DataFrame(data)
-        excel_path = 'data/complaints_export.xlsx'
-        df.to_excel(excel_path, index=False)
-        
-        return send_file(excel_path, as_attachment=True, download_name='complaints.xlsx')
+        return send_complaint_export('excel')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/export/complaints/csv')
+@app.route('/admin/export/chat_resolutions')
 @login_required
-def export_complaints_csv():
+def export_chat_resolutions_excel():
     if current_user.role != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        complaints = Complaint.query.all()
-        data = []
-        for complaint in complaints:
-            data.append({
-                'Complaint No': complaint.complaint_no,
-                'Employee Name': complaint.employee_name if complaint.employee_name else complaint.user.username,
-                'Department & Code': f"{complaint.employee_department if complaint.employee_department else complaint.user.department}({complaint.user.employee_code})",
-                'Issue': complaint.issue,
-                'Status': complaint.status,
-                'Priority': complaint.priority,
-                'Created At': complaint.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Resolved At': complaint.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if complaint.resolved_at else '',
-                'Assigned Technician': complaint.technician.username if complaint.technician else '',
-                'Comments': '\n'.join([f"{comment.user.username}: {comment.content}" for comment in complaint.comments])
-            })
-        
-        df = pd.DataFrame(data)
-        csv_path = 'data/complaints_export.csv'
-        df.to_csv(csv_path, index=False)
-        
-        return send_file(csv_path, as_attachment=True, download_name='complaints.csv')
+        excel_path = export_chat_resolutions()
+        return send_file(excel_path, as_attachment=True, download_name='chat_resolutions.xlsx')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/admin/export/complaints/csv')
+@login_required
+def export_complaints_csv():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Streamed as it is read, so the download starts with the first batch
+    writer = exports.WRITERS['csv']
+    chunks = writer.chunks(EXPORT_COLUMNS, complaint_export_rows())
+    return Response(stream_with_context(chunks), mimetype=writer.mimetype,
+                    headers={'Content-Disposition': 'attachment; filename=complaints.csv'})
+
 @app.route('/admin/export/complaints/pdf')
 @login_required
 def export_complaints_pdf():
@@ -1110,68 +2057,7 @@ def export_complaints_pdf():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        complaints = Complaint.query.all()
-        data = []
-        for complaint in complaints:
-            data.append({
-                'Complaint No': complaint.complaint_no,
-                'Employee Name': complaint.employee_name if complaint.employee_name else complaint.user.username,
-                'Department & Code': f"{complaint.employee_department if complaint.employee_department else complaint.user.department}({complaint.user.employee_code})",
-                'Issue': complaint.issue,
-                'Status': complaint.status,
-                'Priority': complaint.priority,
-                'Created At': complaint.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Resolved At': complaint.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if complaint.resolved_at else '',
-                'Assigned Technician': complaint.technician.username if complaint.technician else '',
-                'Comments': '\n'.join([f"{comment.user.username}: {comment.content}" for comment in complaint.comments])
-            })
-        
-        df = pd.DataFrame(data)
-        pdf_path = 'data/complaints_export.pdf'
-        
-        # Create PDF using reportlab
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import Paragraph, Spacer
-        
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Add title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30
-        )
-        elements.append(Paragraph("Complaints Report", title_style))
-        
-        # Convert DataFrame to list of lists for the table
-        table_data = [df.columns.tolist()] + df.values.tolist()
-        
-        # Create table
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        return send_file(pdf_path, as_attachment=True, download_name='complaints.pdf')
+        return send_complaint_export('pdf')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1191,6 +2077,9 @@ def update_complaint_priority(complaint_id):
         old_priority = complaint.priority
         complaint.priority = data['priority']
         db.session.commit()
+        if is_open_status(complaint.status) and complaint.duplicate_of_id is None:
+            assignment_engine.adjust(complaint.technician_id, -1, old_priority)
+            assignment_engine.adjust(complaint.technician_id, 1, complaint.priority)
         
         # Add a comment to notify about priority change
         priority_comment = Comment(
@@ -1199,7 +2088,9 @@ def update_complaint_priority(complaint_id):
             complaint_id=complaint_id
         )
         db.session.add(priority_comment)
+        event = complaint_event('priority', complaint)
         db.session.commit()
+        event_bus.publish(event)
         
         print(f"Successfully updated priority to {data['priority']} for complaint {complaint_id}")
         return jsonify({'success': True})
@@ -1210,240 +2101,18 @@ def update_complaint_priority(complaint_id):
 
 # Function to provide fallback troubleshooting steps when API is unavailable
 def get_fallback_troubleshooting_steps(problem):
-    problem_lower = problem.lower()
-    
-    # PC/Computer issues
-    if any(term in problem_lower for term in ['pc', 'computer', 'desktop', 'laptop', 'hanging', 'freeze', 'slow', 'crash']):
-        return """1. Restart your computer completely
-2. Close unnecessary applications and browser tabs
-3. Check for available disk space (at least 10% should be free)
-4. Run a quick virus scan
-5. Update Windows and device drivers
-6. Clear temporary files using Disk Cleanup
-7. Check Task Manager (Ctrl+Shift+Esc) for programs using high resources
-
-Common causes:
-- Too many applications running simultaneously
-- Outdated drivers or operating system
-- Insufficient disk space
-- Hardware issues
-
-When to contact IT support:
-- If the problem persists after trying these steps
-- If you notice unusual behavior that might indicate malware
-- If your computer repeatedly crashes with error messages"""
-
-    # Network/Internet issues
-    elif any(term in problem_lower for term in ['network', 'internet', 'wifi', 'connection', 'connect', 'disconnected']):
-        return """1. Check if other devices can connect to the network
-2. Restart your router/modem (unplug for 30 seconds, then plug back in)
-3. Make sure Wi-Fi is enabled on your device
-4. Try connecting with an Ethernet cable if possible
-5. Forget the network and reconnect with the password
-6. Run Windows network troubleshooter
-
-Common causes:
-- Router/modem issues
-- Wi-Fi signal interference
-- Network configuration problems
-- ISP service outage
-
-When to contact IT support:
-- If multiple devices cannot connect
-- If the network is unusually slow across all devices
-- If you get error messages when trying to connect"""
-
-    # Email issues
-    elif any(term in problem_lower for term in ['email', 'outlook', 'mail', 'gmail', 'message']):
-        return """1. Check your internet connection
-2. Restart your email application
-3. Verify your account settings are correct
-4. Clear your email application cache
-5. Check if you can access email via web browser
-6. Ensure you haven't exceeded storage quota
-
-Common causes:
-- Connection issues
-- Account configuration problems
-- Temporary server outages
-- Full mailbox
-
-When to contact IT support:
-- If you receive specific error codes
-- If you can't access your email after trying these steps
-- If you suspect your account has been compromised"""
-
-    # Printer issues
-    elif any(term in problem_lower for term in ['print', 'printer', 'scanning', 'scanner']):
-        return """1. Check if the printer is powered on and connected to the network
-2. Verify that there is paper in the tray and no paper jams
-3. Restart the printer completely
-4. Remove and re-add the printer on your computer
-5. Update printer drivers
-6. Try printing a test page
-
-Common causes:
-- Connection issues
-- Driver problems
-- Hardware malfunctions
-- Paper jams or low ink/toner
-
-When to contact IT support:
-- If the printer displays error codes
-- If print quality is consistently poor
-- If the printer is making unusual noises"""
-
-    # Software/Application issues
-    elif any(term in problem_lower for term in ['software', 'application', 'program', 'app', 'not working']):
-        return """1. Close and restart the application
-2. Restart your computer
-3. Check for application updates
-4. Uninstall and reinstall the application
-5. Clear the application cache if possible
-6. Check if the application is compatible with your OS version
-
-Common causes:
-- Software bugs or glitches
-- Corrupted installation
-- Compatibility issues
-- Insufficient system resources
-
-When to contact IT support:
-- If you receive specific error messages
-- If reinstallation doesn't solve the problem
-- If the application is mission-critical for your work"""
-
-    # Login/Access issues
-    elif any(term in problem_lower for term in ['login', 'password', 'access', 'account', 'authentication']):
-        return """1. Verify you're using the correct username and password
-2. Check if Caps Lock is turned on
-3. Clear your browser cache and cookies
-4. Try accessing from a different browser
-5. Reset your password if you have self-service options
-6. Check if the service is down for maintenance
-
-Common causes:
-- Incorrect credentials
-- Expired passwords
-- Account lockouts due to multiple failed attempts
-- Browser cache issues
-
-When to contact IT support:
-- If you're locked out of your account
-- If you can't reset your password
-- If you suspect unauthorized access"""
-
-    # Generic fallback
-    else:
-        return """1. Restart the device or application having issues
-2. Check for any error messages and note them down
-3. Verify your internet connection is working
-4. Look for recent changes that might have caused the issue
-5. Search for solutions in the company knowledge base
-6. Try basic troubleshooting specific to the application
-
-Common causes:
-- Temporary system glitches
-- Configuration issues
-- Resource limitations
-- Software bugs
-
-When to contact IT support:
-- If the issue persists after basic troubleshooting
-- If you receive specific error codes
-- If the issue is affecting your productivity
-- If multiple users are experiencing the same problem"""
+    return troubleshooting_intents.playbook(problem, 'primary')
 
 # Function to provide secondary fallback steps when API is unavailable
 def get_secondary_fallback_steps(problem):
-    problem_lower = problem.lower()
-    
-    # PC/Computer issues
-    if any(term in problem_lower for term in ['pc', 'computer', 'desktop', 'laptop', 'hanging', 'freeze', 'slow', 'crash']):
-        return """1. Check for Windows updates and install if available
-2. Run System File Checker (SFC) by typing 'sfc /scannow' in Command Prompt
-3. Check for hardware issues using built-in diagnostics
-4. Try starting in Safe Mode to determine if it's a software conflict
-5. Check Event Viewer for specific error codes
-6. Perform a memory diagnostic test
-7. Disconnect external devices and test again
-
-This should help identify whether it's a hardware or software issue."""
-
-    # Network/Internet issues
-    elif any(term in problem_lower for term in ['network', 'internet', 'wifi', 'connection', 'connect', 'disconnected']):
-        return """1. Reset TCP/IP stack by running 'netsh winsock reset' in Command Prompt
-2. Release and renew your IP address using 'ipconfig /release' and 'ipconfig /renew'
-3. Flush DNS cache with 'ipconfig /flushdns'
-4. Change DNS settings to public DNS (like Google's 8.8.8.8 and 8.8.4.4)
-5. Check for network adapter driver updates
-6. Disable VPN or proxy if using one
-7. Reset all network devices in the correct order (modem first, then router)
-
-These steps address more advanced network configuration issues."""
-
-    # Email issues
-    elif any(term in problem_lower for term in ['email', 'outlook', 'mail', 'gmail', 'message']):
-        return """1. Run Outlook in Safe Mode (hold Ctrl while launching)
-2. Create a new Outlook profile and test with that
-3. Check if your mailbox needs to be repaired with the Inbox Repair Tool (scanpst.exe)
-4. Disable add-ins that might be causing issues
-5. Check your email account settings for maximum size limits
-6. Check if your email client is in offline mode
-7. Verify your anti-virus isn't blocking email connections
-
-These solutions target Outlook-specific issues and account configuration problems."""
-
-    # Printer issues
-    elif any(term in problem_lower for term in ['print', 'printer', 'scanning', 'scanner']):
-        return """1. Clear the print queue (stop and restart Print Spooler service)
-2. Check printer IP address and make sure it hasn't changed
-3. Set a static IP for the printer if possible
-4. Update printer firmware (check manufacturer website)
-5. Check if printer needs calibration
-6. Try a different USB port or cable if directly connected
-7. Print directly to the device using its web interface if available
-
-These steps help with more complex printer connection and driver issues."""
-
-    # Software/Application issues
-    elif any(term in problem_lower for term in ['software', 'application', 'program', 'app', 'not working']):
-        return """1. Launch the application with admin privileges
-2. Check for conflicts with anti-virus or firewall settings
-3. Run the application in compatibility mode
-4. Create a new user profile and test there
-5. Check application logs for specific errors
-6. Verify all dependencies are installed (like .NET Framework or Visual C++ Redistributables)
-7. Try repairing the installation through Control Panel > Programs and Features
-
-These steps help identify permission issues and software conflicts."""
-
-    # Login/Access issues
-    elif any(term in problem_lower for term in ['login', 'password', 'access', 'account', 'authentication']):
-        return """1. Check if your account is locked due to too many failed attempts
-2. Ensure your device time and date are accurate (important for authentication)
-3. Check if you need to connect to VPN first before accessing certain systems
-4. Try accessing from a different device to determine if it's device-specific
-5. Check if multi-factor authentication needs to be reconfigured
-6. Verify that your account hasn't expired or been disabled
-7. Make sure you're using the correct domain if applicable (corporate vs. local account)
-
-These steps address more complex authentication and account access issues."""
-
-    # Generic fallback
-    else:
-        return """1. Take screenshots of any error messages for support reference
-2. Check if colleagues are experiencing similar issues
-3. Note when the issue started and any changes made around that time
-4. Try using an alternative software/method temporarily if available
-5. Check system requirements for the software you're using
-6. Review recent updates that might have affected system behavior
-7. Create a detailed document of when the issue occurs and steps to reproduce
+    return troubleshooting_intents.playbook(problem, 'secondary')
 
-Having this documentation will help support staff diagnose and fix the issue more quickly."""
+def classify_hardware(issue):
+    return hardware_intents.best(issue)['name']
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        migrations.upgrade(db.engine)
         create_default_users()
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Technician assignment engine.
+
+The engine keeps each technician's open-ticket load in memory, split by
+priority. It is rebuilt from the database on first use and resynchronised
+every ``resync_interval`` seconds, so counts drifting between gunicorn workers
+are corrected. Which technician gets a ticket is decided by a pluggable
+strategy:
+
+* ``least_loaded``   - fewest open tickets (the historical behaviour)
+* ``round_robin``    - smooth weighted round-robin over ``assignment_weight``
+* ``skills``         - least-loaded among technicians whose skills cover the
+                       ticket's intent category, falling back to everyone
+* ``priority``       - capacity-aware; High priority tickets may exceed a
+                       technician's capacity and go to whoever holds the
+                       fewest High priority tickets
+"""
+import threading
+import time
+
+PRIORITIES = ('High', 'Medium', 'Low')
+
+
+class TechnicianState:
+    def __init__(self, id, username='', skills=None, weight=1, capacity=10, open_by_priority=None):
+        self.id = id
+        self.username = username
+        self.skills = set(skills or ())
+        self.weight = max(1, weight or 1)
+        self.capacity = capacity
+        self.open_by_priority = dict(open_by_priority or {})
+        self.current_weight = 0  # smooth weighted round-robin accumulator
+
+    @property
+    def open_count(self):
+        return sum(self.open_by_priority.values())
+
+    def adjust(self, delta, priority=None):
+        priority = priority or 'Medium'
+        self.open_by_priority[priority] = max(0, self.open_by_priority.get(priority, 0) + delta)
+
+
+class TicketRequest:
+    def __init__(self, text='', priority='Medium', categories=()):
+        self.text = text
+        self.priority = priority or 'Medium'
+        self.categories = list(categories)
+
+
+class AssignmentStrategy:
+    name = None
+
+    def choose(self, ticket, technicians):
+        raise NotImplementedError
+
+
+class LeastLoadedStrategy(AssignmentStrategy):
+    name = 'least_loaded'
+
+    def choose(self, ticket, technicians):
+        if not technicians:
+            return None
+        return min(technicians, key=lambda t: (t.open_count, t.id))
+
+
+class WeightedRoundRobinStrategy(AssignmentStrategy):
+    name = 'round_robin'
+
+    def choose(self, ticket, technicians):
+        if not technicians:
+            return None
+        total = 0
+        best = None
+        for tech in technicians:
+            tech.current_weight += tech.weight
+            total += tech.weight
+            if best is None or tech.current_weight > best.current_weight:
+                best = tech
+        best.current_weight -= total
+        return best
+
+
+class SkillMatchStrategy(AssignmentStrategy):
+    name = 'skills'
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback or LeastLoadedStrategy()
+
+    def choose(self, ticket, technicians):
+        # Categories are ranked best-first, so prefer the most specific match
+        for category in ticket.categories:
+            skilled = [t for t in technicians if category in t.skills]
+            if skilled:
+                return self.fallback.choose(ticket, skilled)
+        return self.fallback.choose(ticket, technicians)
+
+
+class PriorityAwareStrategy(AssignmentStrategy):
+    name = 'priority'
+
+    def __init__(self, inner=None):
+        self.inner = inner or SkillMatchStrategy()
+
+    def choose(self, ticket, technicians):
+        if not technicians:
+            return None
+        if ticket.priority == 'High':
+            # Preempt capacity limits: spread urgent work by urgent load first
+            fewest_high = min(t.open_by_priority.get('High', 0) for t in technicians)
+            candidates = [t for t in technicians if t.open_by_priority.get('High', 0) == fewest_high]
+            return self.inner.choose(ticket, candidates)
+        available = [t for t in technicians if t.open_count < t.capacity]
+        return self.inner.choose(ticket, available or technicians)
+
+
+STRATEGIES = {
+    LeastLoadedStrategy.name: LeastLoadedStrategy,
+    WeightedRoundRobinStrategy.name: WeightedRoundRobinStrategy,
+    SkillMatchStrategy.name: SkillMatchStrategy,
+    PriorityAwareStrategy.name: PriorityAwareStrategy,
+}
+
+
+def make_strategy(name):
+    try:
+        return STRATEGIES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown assignment strategy '{name}', expected one of {sorted(STRATEGIES)}")
+
+
+class AssignmentEngine:
+    def __init__(self, strategy, classifier=None, resync_interval=60):
+        self.strategy = strategy
+        self.classifier = classifier
+        self.resync_interval = resync_interval
+        self._technicians = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, technicians):
+        with self._lock:
+            previous = self._technicians
+            self._technicians = {t.id: t for t in technicians}
+            # Keep round-robin position across resyncs
+            for tech_id, tech in self._technicians.items():
+                if tech_id in previous:
+                    tech.current_weight = previous[tech_id].current_weight
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, loader):
+        """Rebuild from ``loader()`` on first use and whenever the state is stale"""
+        if self._loaded_at is None or (
+                self.resync_interval and time.monotonic() - self._loaded_at > self.resync_interval):
+            self.rebuild(loader())
+
+    def make_ticket(self, text, priority='Medium'):
+        categories = self.classifier(text) if self.classifier else ()
+        return TicketRequest(text, priority, categories)
+
+    def choose(self, ticket):
+        with self._lock:
+            tech = self.strategy.choose(ticket, list(self._technicians.values()))
+            return tech.id if tech else None
+
+    def adjust(self, technician_id, delta, priority=None):
+        with self._lock:
+            tech = self._technicians.get(technician_id)
+            if tech is not None:
+                tech.adjust(delta, priority)
+
+    def snapshot(self):
+        with self._lock:
+            return [{
+                'id': t.id,
+                'username': t.username,
+                'open': t.open_count,
+                'open_by_priority': dict(t.open_by_priority),
+                'skills': sorted(t.skills),
+                'weight': t.weight,
+                'capacity': t.capacity,
+            } for t in self._technicians.values()]
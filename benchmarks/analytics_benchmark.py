@@ -0,0 +1,150 @@
+"""Benchmark the admin dashboard analytics recompute on synthetic complaints.
+
+Usage: python benchmarks/analytics_benchmark.py [--rows 10000,100000,1000000] [--with-load]
+
+For each size it times three ways of building the department, hardware and
+failure-prediction panels:
+
+* ``vectorized``: ``analytics_frame`` classification and groupbys, loaded
+  into ``AnalyticsStore`` via ``rebuild(frame)``, then one dashboard read.
+* ``row_loop``: the previous recompute, which classified and counted one
+  ``ComplaintFacts`` at a time.
+* ``legacy``: the original view code, which rescanned every complaint for
+  each one. It is quadratic, so it only runs up to ``--legacy-rows``.
+
+``--with-load`` also copies the complaints into an in-memory SQLite table.
+It then compares ``pd.read_sql`` with a cursor loop that builds
+``ComplaintFacts``.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics_frame  # noqa: E402
+from analytics import AnalyticsStore, ComplaintFacts  # noqa: E402
+from intent_matcher import IntentMatcher  # noqa: E402
+
+DEPARTMENTS = np.array(['HR', 'Finance', 'Sales', 'Marketing', 'Operations', 'Legal', 'IT', 'Support'], dtype=object)
+STATUSES = np.array(['Open', 'In Progress', 'Resolved', 'Resolved', 'Resolved', 'Escalated'], dtype=object)
+DEVICES = ['laptop', 'computer', 'printer', 'network', 'internet', 'phone', 'mobile', 'outlook', 'vpn', 'monitor']
+SYMPTOMS = ['is slow', 'not working', 'keeps crashing', 'offline', 'will not start', 'disconnects', 'is hanging']
+
+
+def make_frame(rows, seed=11):
+    rng = np.random.default_rng(seed)
+    issues = np.array([f'{d} {s}' for d in DEVICES for s in SYMPTOMS] +
+                      [f'{a} and {b} {s}' for a in DEVICES[:4] for b in DEVICES[4:] for s in SYMPTOMS[:2]], dtype=object)
+    employees = max(rows // 20, 1)
+    names = np.array([f'Employee {i}' for i in range(employees)], dtype=object)
+    employee = rng.integers(0, employees, rows)
+    return pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'department': DEPARTMENTS[rng.integers(0, len(DEPARTMENTS), rows)],
+        'issue': issues[rng.integers(0, len(issues), rows)],
+        'status': STATUSES[rng.integers(0, len(STATUSES), rows)],
+        'employee_name': names[employee],
+        'employee_department': DEPARTMENTS[employee % len(DEPARTMENTS)],
+        'created_at': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.permutation(rows), unit='m'),
+    })
+
+
+def to_facts(frame):
+    return [ComplaintFacts(*row) for row in zip(
+        frame['id'].tolist(), frame['department'].tolist(), frame['issue'].tolist(), frame['status'].tolist(),
+        frame['employee_name'].tolist(), frame['employee_department'].tolist(),
+        frame['created_at'].dt.to_pydatetime().tolist())]
+
+
+def run_vectorized(frame, hardware):
+    frame = frame.assign(hardware=analytics_frame.classify_issues(frame['issue'], hardware))
+    store = AnalyticsStore(lambda issue: hardware.best(issue)['name'], rebuild_interval=0)
+    store.rebuild(frame)
+    return store.dashboard()
+
+
+def run_row_loop(facts, hardware):
+    store = AnalyticsStore(lambda issue: hardware.best(issue)['name'], rebuild_interval=0)
+    store.rebuild(pd.DataFrame(columns=analytics_frame.FRAME_COLUMNS))
+    for item in facts:
+        store.on_created(item)
+    return store.dashboard()
+
+
+def run_legacy(facts, hardware):
+    complaints = sorted(facts, key=lambda c: c.order_key, reverse=True)
+    departments, hardware_issues, predictions = {}, {}, []
+    for c in complaints:
+        dept = departments.setdefault(c.department, {'total_issues': 0, 'common_problems': []})
+        dept['total_issues'] += 1
+        if c.issue not in dept['common_problems']:
+            dept['common_problems'].append(c.issue)
+        hw_type = hardware.best(c.issue)['name']
+        hw = hardware_issues.setdefault(hw_type, {'total_issues': 0, 'resolved': 0, 'common_problems': []})
+        hw['total_issues'] += 1
+        hw['resolved'] += c.status == 'Resolved'
+        if c.issue not in hw['common_problems']:
+            hw['common_problems'].append(c.issue)
+    for c in complaints:
+        if c.employee_name and c.employee_department:
+            similar = sum(1 for o in complaints if o.employee_name == c.employee_name
+                          and o.employee_department == c.employee_department and o.issue.lower() == c.issue.lower())
+            if not any(p['employee'] == c.employee_name for p in predictions):
+                predictions.append({'employee': c.employee_name, 'similar': similar})
+    return departments, hardware_issues, predictions
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def compare_load(frame):
+    conn = sqlite3.connect(':memory:')
+    frame.assign(created_at=frame['created_at'].astype(str)).to_sql('complaint', conn, index=False)
+    sql = ('SELECT id, employee_department, department AS user_department, issue, status, employee_name, '
+           'created_at FROM complaint')
+    loaded, _ = timed(pd.read_sql, sql, conn)
+    looped, _ = timed(lambda: [ComplaintFacts(r[0], r[1] or r[2], r[3], r[4], r[5], r[1], r[6])
+                               for r in conn.execute(sql)])
+    conn.close()
+    return loaded, looped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='10000,100000,1000000', help='comma separated fixture sizes')
+    parser.add_argument('--legacy-rows', type=int, default=10000,
+                        help='largest size the quadratic legacy loop is run on')
+    parser.add_argument('--with-load', action='store_true', help='also time loading from SQLite')
+    args = parser.parse_args()
+
+    hardware = IntentMatcher.from_file('hardware')
+    print('  '.join(['rows     ', 'vectorized (s)', 'row_loop (s)', 'speedup', 'legacy (s)'] +
+                    (['read_sql (s)', 'cursor loop (s)'] if args.with_load else [])))
+    for rows in (int(size) for size in args.rows.split(',')):
+        frame = make_frame(rows)
+        facts = to_facts(frame)
+        vectorized, fast = timed(run_vectorized, frame, hardware)
+        row_loop, slow = timed(run_row_loop, facts, hardware)
+        if [d['total_issues'] for d in fast[0]] != [d['total_issues'] for d in slow[0]] or fast[2] != slow[2]:
+            print(f"{rows}: vectorized and row loop results differ")
+            sys.exit(1)
+
+        columns = [f"{rows:<9d}", f"{vectorized:14.3f}", f"{row_loop:12.3f}", f"{row_loop / vectorized:6.1f}x"]
+        columns.append(f"{timed(run_legacy, facts, hardware)[0]:10.3f}" if rows <= args.legacy_rows else '         -')
+        if args.with_load:
+            loaded, looped = compare_load(frame)
+            columns += [f"{loaded:12.3f}", f"{looped:15.3f}"]
+        print('  '.join(columns))
+
+
+if __name__ == '__main__':
+    main()
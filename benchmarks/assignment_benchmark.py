@@ -0,0 +1,133 @@
+"""Benchmark technician assignment strategies on simulated ticket streams.
+
+Usage: python benchmarks/assignment_benchmark.py [--tickets 50000] [--technicians 25]
+
+For every strategy it reports the per-assignment latency (mean / p99) and how
+evenly open work ends up spread: the spread between the busiest and idlest
+technician and the coefficient of variation. It also reports the skill hit
+rate and how many High priority tickets were queued behind other urgent work.
+The ``legacy_scan`` row reproduces the old approach for comparison: a
+``min()`` over every technician's full complaint history.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assignment import STRATEGIES, TechnicianState, TicketRequest, make_strategy  # noqa: E402
+
+CATEGORIES = ['computer', 'network', 'email', 'printer', 'software', 'access']
+
+
+def make_technicians(count, rng):
+    return [TechnicianState(
+        i,
+        username=f'tech{i}',
+        skills=rng.sample(CATEGORIES, rng.randint(1, 3)),
+        weight=rng.choice([1, 1, 2, 3]),
+        capacity=10
+    ) for i in range(1, count + 1)]
+
+
+def make_stream(count, rng):
+    for _ in range(count):
+        priority = rng.choices(['High', 'Medium', 'Low'], weights=[1, 6, 3])[0]
+        yield TicketRequest('', priority, [rng.choice(CATEGORIES)])
+
+
+def run_strategy(name, technicians, tickets, resolve_rate, rng):
+    strategy = make_strategy(name)
+    by_id = {t.id: t for t in technicians}
+    open_tickets = []
+    latencies = []
+    skill_hits = 0
+    high_behind = 0
+
+    for ticket in tickets:
+        started = time.perf_counter()
+        tech = strategy.choose(ticket, technicians)
+        latencies.append(time.perf_counter() - started)
+
+        if ticket.categories[0] in tech.skills:
+            skill_hits += 1
+        if ticket.priority == 'High' and tech.open_by_priority.get('High', 0):
+            high_behind += 1
+        tech.adjust(1, ticket.priority)
+        open_tickets.append((tech.id, ticket.priority))
+
+        # Technicians close a share of open work as the stream goes on
+        if open_tickets and rng.random() < resolve_rate:
+            tech_id, priority = open_tickets.pop(rng.randrange(len(open_tickets)))
+            by_id[tech_id].adjust(-1, priority)
+
+    loads = [t.open_count for t in technicians]
+    return latencies, loads, skill_hits, high_behind
+
+
+def run_legacy(technician_count, tickets, resolve_rate, rng):
+    # Each technician holds every complaint ever assigned; status flips on resolve
+    histories = {i: [] for i in range(1, technician_count + 1)}
+    open_tickets = []
+    latencies = []
+    for _ in tickets:
+        started = time.perf_counter()
+        tech_id = min(histories, key=lambda t: len([c for c in histories[t] if c['status'] != 'Resolved']))
+        latencies.append(time.perf_counter() - started)
+        complaint = {'status': 'Open'}
+        histories[tech_id].append(complaint)
+        open_tickets.append(complaint)
+        if open_tickets and rng.random() < resolve_rate:
+            open_tickets.pop(rng.randrange(len(open_tickets)))['status'] = 'Resolved'
+    loads = [len([c for c in h if c['status'] != 'Resolved']) for h in histories.values()]
+    return latencies, loads
+
+
+def summarize(name, latencies, loads, ticket_count, skill_hits=None, high_behind=None):
+    latencies = sorted(latencies)
+    mean_load = statistics.mean(loads) or 1
+    row = [
+        name,
+        f"{statistics.mean(latencies) * 1e6:9.1f}",
+        f"{latencies[int(len(latencies) * 0.99) - 1] * 1e6:9.1f}",
+        f"{max(loads) - min(loads):6d}",
+        f"{statistics.pstdev(loads) / mean_load:6.3f}",
+        f"{skill_hits / ticket_count:7.1%}" if skill_hits is not None else '      -',
+        f"{high_behind:7d}" if high_behind is not None else '      -',
+    ]
+    print('  '.join(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=50000)
+    parser.add_argument('--technicians', type=int, default=25)
+    parser.add_argument('--resolve-rate', type=float, default=0.9,
+                        help='chance that some open ticket is resolved after each new one')
+    parser.add_argument('--legacy-tickets', type=int, default=5000,
+                        help='the legacy scan is quadratic, so it gets a shorter stream')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{args.tickets} tickets, {args.technicians} technicians, resolve rate {args.resolve_rate}")
+    print('  '.join(['strategy    ', 'mean (us)', ' p99 (us)', 'spread', '   cv ', 'skill %', 'high q.']))
+    for name in STRATEGIES:
+        rng = random.Random(args.seed)
+        technicians = make_technicians(args.technicians, rng)
+        tickets = list(make_stream(args.tickets, rng))
+        latencies, loads, skill_hits, high_behind = run_strategy(
+            name, technicians, tickets, args.resolve_rate, rng)
+        summarize(f"{name:<12}", latencies, loads, len(tickets), skill_hits, high_behind)
+
+    rng = random.Random(args.seed)
+    tickets = list(make_stream(args.legacy_tickets, rng))
+    latencies, loads = run_legacy(args.technicians, tickets, args.resolve_rate, rng)
+    summarize(f"{'legacy_scan':<12}", latencies, loads, len(tickets))
+    print(f"(legacy_scan measured on {args.legacy_tickets} tickets)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark the complaint exports on a synthetic database.
+
+Usage: python benchmarks/export_benchmark.py [--rows 10000,100000,1000000] [--legacy-rows 100000] [--memory]
+
+For each size it builds a fixture with ``query_plans.build_fixture``, then
+exports it to CSV and xlsx through the streaming pipeline in ``exports.py``.
+It reports the time to the first CSV chunk and the total time for each.
+``--memory`` also reports peak Python memory through tracemalloc, which
+makes every run several times slower. The previous exports loaded every
+complaint, built a DataFrame and wrote it with pandas. They are timed the
+same way, up to ``--legacy-rows``.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from query_plans import build_fixture
+
+
+def fixture(path, rows):
+    # build_fixture points DATABASE_URL at the new file; once the app is
+    # imported, its config has to follow too (Flask-SQLAlchemy then reconnects)
+    if 'app' in sys.modules:
+        sys.modules['app'].app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    return build_fixture(path, rows)
+
+
+def measure(fn, memory=False):
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    first = fn()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return first, elapsed, peak
+
+
+def stream_csv(helpdesk, sink):
+    started = time.perf_counter()
+    first = None
+    for chunk in helpdesk.exports.WRITERS['csv'].chunks(helpdesk.EXPORT_COLUMNS, helpdesk.complaint_export_rows()):
+        if first is None:
+            first = time.perf_counter() - started
+        sink.write(chunk)
+    return first
+
+
+def write_xlsx(helpdesk, path):
+    with open(path, 'wb') as fileobj:
+        helpdesk.exports.WRITERS['excel'].write(helpdesk.EXPORT_COLUMNS, helpdesk.complaint_export_rows(), fileobj)
+
+
+def legacy(helpdesk, path, to_file):
+    data = [dict(zip(helpdesk.EXPORT_COLUMNS, helpdesk.complaint_export_row(c))) for c in helpdesk.Complaint.query.all()]
+    to_file(pd.DataFrame(data), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='10000,100000,1000000', help='comma separated fixture sizes')
+    parser.add_argument('--legacy-rows', type=int, default=100000,
+                        help='largest size the load-everything exports are run on')
+    parser.add_argument('--memory', action='store_true', help='also trace peak memory (slow)')
+    args = parser.parse_args()
+
+    print(f"{'rows':<9}  {'export':<12}  {'first chunk (s)':>15}  {'total (s)':>9}  {'peak (MB)':>9}")
+    for rows in (int(size) for size in args.rows.split(',')):
+        tmp = tempfile.mkdtemp()
+        helpdesk = fixture(os.path.join(tmp, f'export_{rows}.db'), rows)
+        with helpdesk.app.app_context():
+            runs = [
+                ('csv', lambda: stream_csv(helpdesk, open(os.devnull, 'w'))),
+                ('xlsx', lambda: write_xlsx(helpdesk, os.path.join(tmp, 'export.xlsx'))),
+            ]
+            if rows <= args.legacy_rows:
+                runs += [
+                    ('legacy csv', lambda: legacy(helpdesk, os.path.join(tmp, 'legacy.csv'),
+                                                  lambda df, path: df.to_csv(path, index=False))),
+                    ('legacy xlsx', lambda: legacy(helpdesk, os.path.join(tmp, 'legacy.xlsx'),
+                                                   lambda df, path: df.to_excel(path, index=False))),
+                ]
+            for name, run in runs:
+                first, elapsed, peak = measure(run, args.memory)
+                first = f"{first:15.3f}" if first is not None else f"{'-':>15}"
+                peak = f"{peak:9.1f}" if peak is not None else f"{'-':>9}"
+                print(f"{rows:<9d}  {name:<12}  {first}  {elapsed:9.2f}  {peak}")
+                helpdesk.db.session.remove()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Benchmark the paginated PDF complaint report on synthetic rows.
+
+Usage: python benchmarks/pdf_benchmark.py [--rows 10000,100000] [--legacy-rows 10000]
+
+For each size it writes synthetic export rows to a JSON lines file. It then
+renders them with ``pdf_report.render_report`` in a fresh process and reports
+the time, the page count and the process's peak RSS. The previous export
+built one reportlab ``Table`` with every row; it is run the same way up to
+``--legacy-rows``. Peak RSS comes from ``resource``, so this runs on Unix only.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ['Complaint No', 'Employee Name', 'Department & Code', 'Issue', 'Status', 'Priority',
+           'Created At', 'Resolved At', 'Assigned Technician', 'Comments']
+ISSUES = ['laptop is hanging', 'printer offline since the morning and the queue is stuck',
+          'wifi disconnects every few minutes in the east wing meeting rooms',
+          'outlook not syncing', 'cannot login to vpn from home after the password change']
+STATUSES = ['Open', 'In Progress', 'Resolved', 'Resolved', 'Escalated']
+
+
+def write_rows(path, rows, seed=7):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as spool:
+        for i in range(rows):
+            comments = '\n'.join(f"tech{rng.randint(1, 25)}: checked the device, waiting on the user"
+                                 for _ in range(rng.randint(0, 3)))
+            spool.write(json.dumps([
+                f'C{i:08d}', f'Employee {i % 5000}', f'Finance(E{i % 5000:05d})', rng.choice(ISSUES),
+                rng.choice(STATUSES), rng.choice(['Low', 'Medium', 'High']),
+                f'2024-{1 + i % 12:02d}-{1 + i % 28:02d} 10:00:00', '', f'tech{rng.randint(1, 25)}', comments
+            ]) + '\n')
+
+
+def render_paginated(rows_path, output_path):
+    import pdf_report
+    return pdf_report.render_report(rows_path, output_path, COLUMNS)
+
+
+def render_legacy(rows_path, output_path):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+    with open(rows_path, encoding='utf-8') as spool:
+        data = [COLUMNS] + [json.loads(line) for line in spool]
+    doc = SimpleDocTemplate(output_path, pagesize=letter)
+    table = Table(data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    doc.build([table])
+    return doc.page
+
+
+def timed_in_child(render, rows_path, output_path):
+    started = time.perf_counter()
+    pages = render(rows_path, output_path)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KB on Linux
+    return elapsed, pages, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(render, rows_path, output_path):
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(timed_in_child, (render, rows_path, output_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='10000,100000', help='comma separated fixture sizes')
+    parser.add_argument('--legacy-rows', type=int, default=10000,
+                        help='largest size the single-table legacy report is run on')
+    args = parser.parse_args()
+
+    print(f"{'rows':<9}  {'report':<10}  {'time (s)':>9}  {'pages':>6}  {'peak RSS (MB)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(size) for size in args.rows.split(',')):
+            rows_path = os.path.join(tmp, f'rows_{rows}.jsonl')
+            write_rows(rows_path, rows)
+            renders = [('paginated', render_paginated)]
+            if rows <= args.legacy_rows:
+                renders.append(('legacy', render_legacy))
+            for name, render in renders:
+                elapsed, pages, peak = run(render, rows_path, os.path.join(tmp, f'{name}_{rows}.pdf'))
+                print(f"{rows:<9d}  {name:<10}  {elapsed:9.1f}  {pages:6d}  {peak:13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Check that the complaint detail view costs a fixed number of queries.
+
+Usage: python benchmarks/query_counts.py [--comments 0,1,10,100]
+
+Builds a throwaway SQLite database with the app's schema and migrations, then
+creates one complaint per size with that many comments, each by a different
+user. It fetches ``/complaint/<id>`` as admin and counts the SQL statements
+the request runs. If the count grows with the number of comments or goes over
+the budget, the script reports it and exits with status 1.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Flask-Login's user load, the complaint with its employee and technician,
+# and the comments with their authors
+QUERY_BUDGET = 3
+
+
+def build_fixture(helpdesk, sizes):
+    db = helpdesk.db
+    db.create_all()
+    helpdesk.migrations.upgrade(db.engine)
+    helpdesk.create_default_users()
+    employee = helpdesk.User.query.filter_by(username='emp1').first()
+    technician = helpdesk.User.query.filter_by(username='tech1').first()
+
+    commenters = [helpdesk.User(username=f'commenter{i}', email=f'commenter{i}@company.com', password='x',
+                                role='employee', employee_code=f'QC{i:05d}') for i in range(max(sizes))]
+    db.session.add_all(commenters)
+    complaints = {}
+    for size in sizes:
+        complaint = helpdesk.Complaint(complaint_no=f'QC-{size}', user_id=employee.id, technician_id=technician.id,
+                                       issue='printer offline', created_at=datetime.utcnow())
+        complaint.comments = [helpdesk.Comment(content=f'update {i}', user=commenters[i]) for i in range(size)]
+        db.session.add(complaint)
+        complaints[size] = complaint
+    db.session.commit()
+    return {size: complaint.id for size, complaint in complaints.items()}
+
+
+def count_queries(helpdesk, client, complaint_id):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = helpdesk.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(f'/complaint/{complaint_id}')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    if response.status_code != 200:
+        raise RuntimeError(f'/complaint/{complaint_id} returned {response.status_code}')
+    return len(statements), len(response.get_json()['comments'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--comments', default='0,1,10,100', help='comma separated comment counts')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.comments.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'query_counts.db')}"
+        import app as helpdesk
+
+        with helpdesk.app.app_context():
+            complaint_ids = build_fixture(helpdesk, sizes)
+            client = helpdesk.app.test_client()
+            client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+            print(f"{'comments':>8}  queries")
+            counts = []
+            for size in sizes:
+                queries, returned = count_queries(helpdesk, client, complaint_ids[size])
+                if returned != size:
+                    print(f"{size}: expected {size} comments, got {returned}")
+                    sys.exit(1)
+                counts.append(queries)
+                print(f"{size:8d}  {queries:7d}")
+
+    if len(set(counts)) > 1 or max(counts) > QUERY_BUDGET:
+        print(f"Query count should stay at {QUERY_BUDGET} or fewer regardless of comments")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
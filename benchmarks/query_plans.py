@@ -0,0 +1,161 @@
+"""Check that the dashboard queries are served by indexes on a large fixture.
+
+Usage: python benchmarks/query_plans.py [--rows 1000000] [--keep path.db]
+
+Builds a throwaway SQLite database with the app's schema and migrations, then
+fills it with synthetic complaints and comments. It calls the app's own query
+helpers for each dashboard (``complaint_page``, ``status_summary``,
+``complaint_search_page``...), captures the SQL they send, and runs EXPLAIN
+QUERY PLAN on it and times it. Any query that falls
+back to a full table scan is reported, and the script exits with status 1.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STATUSES = ['Open', 'In Progress', 'Resolved', 'Resolved', 'Resolved', 'Escalated']
+PRIORITIES = ['Low', 'Medium', 'Medium', 'High']
+DEPARTMENTS = ['HR', 'Finance', 'Sales', 'Marketing', 'Operations', 'Legal', 'IT', 'Support']
+ISSUES = ['laptop is hanging', 'printer offline', 'wifi disconnected', 'outlook not syncing',
+          'cannot login to vpn', 'excel crashes on open', 'phone not charging', 'monitor flicker']
+
+
+def build_fixture(path, rows, seed=1):
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    import app as helpdesk
+    import migrations
+
+    with helpdesk.app.app_context():
+        helpdesk.db.create_all()
+        migrations.upgrade(helpdesk.db.engine)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    users = [(i, f'user{i}', f'user{i}@company.com', 'x', 'technician' if i <= 25 else 'employee',
+              rng.choice(DEPARTMENTS), 'Staff', f'E{i:06d}') for i in range(1, 2026)]
+    conn.executemany('INSERT INTO "user" (id, username, email, password, role, department, designation, '
+                     'employee_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', users)
+
+    start = datetime(2023, 1, 1)
+    batch = []
+    for i in range(1, rows + 1):
+        created = start + timedelta(seconds=i * 60)
+        batch.append((i, f'C{i:09d}', rng.randint(26, 2025), rng.randint(1, 25), rng.choice(ISSUES),
+                      rng.choice(STATUSES), rng.choice(PRIORITIES), created.isoformat(' '),
+                      f'Employee {i % 5000}', 'Staff', rng.choice(DEPARTMENTS)))
+        if len(batch) == 50000:
+            _insert_complaints(conn, batch)
+            batch = []
+    _insert_complaints(conn, batch)
+
+    conn.executemany(
+        'INSERT INTO comment (complaint_id, user_id, content, created_at) VALUES (?, ?, ?, ?)',
+        ((rng.randint(1, rows), rng.randint(1, 25), 'Looking into it', start.isoformat(' '))
+         for _ in range(rows // 2))
+    )
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+    return helpdesk
+
+
+def _insert_complaints(conn, batch):
+    conn.executemany(
+        'INSERT INTO complaint (id, complaint_no, user_id, technician_id, issue, status, priority, '
+        'created_at, employee_name, employee_designation, employee_department) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+
+
+def dashboard_queries(helpdesk):
+    """``{name: callable}``; each runs the app's own helper for one dashboard request"""
+    from pagination import encode_cursor
+
+    admin = SimpleNamespace(role='admin', id=1)
+    technician = SimpleNamespace(role='technician', id=7)
+    employee = SimpleNamespace(role='employee', id=1234)
+    cursor = encode_cursor(datetime(2023, 6, 1), 250000)
+    page, search_page = helpdesk.complaint_page, helpdesk.complaint_search_page
+    return {
+        'admin_dashboard (latest first)': lambda: page(admin, {}),
+        'technician_dashboard': lambda: page(technician, {}),
+        'employee_dashboard': lambda: page(employee, {}),
+        'technician stats': lambda: helpdesk.status_summary(helpdesk.visible_complaints(technician)),
+        'employee stats': lambda: helpdesk.status_summary(helpdesk.visible_complaints(employee)),
+        'department filter': lambda: page(admin, {'department': 'Finance'}),
+        'technician filter': lambda: page(admin, {'technician': '7'}),
+        'complaint comments': lambda: helpdesk.db.session.get(helpdesk.Complaint, 4242).comments,
+        'page after cursor': lambda: page(admin, {}, cursor=cursor),
+        'technician page after cursor': lambda: page(technician, {}, cursor=cursor),
+        'status filter page': lambda: page(admin, {'status': 'Open'}, cursor=cursor),
+        'priority filter page': lambda: page(admin, {'priority': 'High'}),
+        'technician workload': lambda: helpdesk.technician_workload_query().all(),
+        'search (ranked)': lambda: search_page(admin, {}, 'print off'),
+        'technician search': lambda: search_page(technician, {}, 'vpn'),
+    }
+
+
+def captured(engine, run):
+    """The ``(sql, parameters)`` pairs that ``run()`` sends to the database"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--keep', help='write the fixture here instead of a temp file')
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+    started = time.perf_counter()
+    helpdesk = build_fixture(path, args.rows)
+    print(f"Built {args.rows} complaint fixture in {time.perf_counter() - started:.1f}s at {path}")
+
+    conn = sqlite3.connect(path)
+    failures = 0
+    with helpdesk.app.app_context():
+        for name, run in dashboard_queries(helpdesk).items():
+            # Check exactly the SQL the helper runs, with its own filters, order and cursor
+            for sql, parameters in captured(helpdesk.db.engine, run):
+                if 'sqlite_master' in sql:
+                    continue  # the one-off check for the search index
+                plan = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, parameters)]
+                started = time.perf_counter()
+                conn.execute(sql, parameters).fetchall()
+                elapsed = (time.perf_counter() - started) * 1000
+
+                full_scan = any(step.startswith('SCAN') and 'INDEX' not in step for step in plan)
+                failures += full_scan
+                print(f"{'FAIL' if full_scan else 'ok  '} {name:<32} {elapsed:9.2f} ms  {' | '.join(plan)}")
+            helpdesk.db.session.remove()
+    conn.close()
+
+    if not args.keep:
+        os.remove(path)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
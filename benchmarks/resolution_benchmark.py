@@ -0,0 +1,76 @@
+"""Benchmark answering chat problems from past resolutions.
+
+Usage: python benchmarks/resolution_benchmark.py [--documents 1000,10000,100000] [--queries 1000]
+
+For each size it indexes synthetic resolved problems with
+``resolutions.ResolutionIndex`` and reports the build time and the median and
+95th percentile query time. It also reports how often a reworded repeat of a
+known problem is answered from history with the steps for the same device
+and symptom, and how often an unrelated problem is answered from history.
+Each history answer is one Gemini call saved.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resolutions import ResolutionIndex
+
+DEVICES = ['printer', 'laptop', 'monitor', 'vpn', 'outlook', 'teams', 'wifi', 'keyboard', 'docking station',
+           'projector', 'excel', 'sharepoint', 'phone', 'scanner', 'webcam', 'headset']
+SYMPTOMS = ['is offline', 'not working', 'keeps disconnecting', 'is very slow', 'shows an error',
+            'will not start', 'crashes on open', 'cannot connect', 'is not syncing', 'freezes randomly']
+PLACES = ['on floor {}', 'in meeting room {}', 'at desk {}', 'in building {}']
+FILLERS = ['my', 'our', 'the', 'since this morning', 'again', 'after the update', 'please help']
+
+
+def problem(rng, device, symptom, place):
+    words = [rng.choice(FILLERS[:3]), device, symptom, place]
+    if rng.random() < 0.5:
+        words.append(rng.choice(FILLERS[3:]))
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', default='1000,10000,100000', help='comma separated index sizes')
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'documents':<10}  {'build (s)':>9}  {'p50 (ms)':>8}  {'p95 (ms)':>8}  {'repeats answered':>16}  "
+          f"{'unrelated answered':>18}")
+    for size in (int(value) for value in args.documents.split(',')):
+        rng = random.Random(3)
+        known = [(rng.choice(DEVICES), rng.choice(SYMPTOMS), rng.choice(PLACES).format(rng.randint(1, 40)))
+                 for _ in range(size)]
+        index = ResolutionIndex()
+        started = time.perf_counter()
+        index.rebuild((i, problem(rng, *key), f'steps for {key}', 0) for i, key in enumerate(known, 1))
+        build = time.perf_counter() - started
+
+        seen = set(known)
+        timings, repeats, unrelated = [], 0, 0
+        for i in range(args.queries):
+            if i % 2:
+                key = rng.choice(known)
+            else:
+                key = ('smart board', 'beeps loudly', f'in lab {rng.randint(1, 9)}')
+            text = problem(rng, *key)
+            started = time.perf_counter()
+            match = index.best(text)
+            timings.append((time.perf_counter() - started) * 1000)
+            if key in seen:
+                repeats += match is not None and f"'{key[0]}', '{key[1]}'" in match[1]
+            else:
+                unrelated += match is not None
+        timings.sort()
+        half = args.queries // 2
+        print(f"{size:<10d}  {build:9.2f}  {timings[len(timings) // 2]:8.3f}  {timings[int(len(timings) * 0.95)]:8.3f}  "
+              f"{repeats * 100 / (args.queries - half):15.1f}%  {unrelated * 100 / half:17.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Server-side state for IT Support Assistant conversations.
+
+A conversation collects the employee's details, the problem and the last
+troubleshooting answer, which is often several kilobytes of LLM text. Keeping
+that in Flask's signed cookie meant uploading and re-signing it on every chat
+request, and long answers could push the cookie past the 4KB browser limit.
+The cookie now carries only a short random conversation id. The state itself
+is kept by a backend:
+
+* ``SQLiteChatBackend`` - one SQLite file shared by every worker process
+* ``MemoryChatBackend`` - an LRU dict in this process, for single-worker runs
+
+Conversations expire ``ttl`` seconds after their last message, and expired
+ones are reaped every ``reap_interval`` seconds, so abandoned chats do not
+pile up.
+"""
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryChatBackend:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (state, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, chat_id, now):
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None or entry[1] <= now:
+                return None
+            self._entries.move_to_end(chat_id)
+            return dict(entry[0])
+
+    def set(self, chat_id, state, expires_at):
+        with self._lock:
+            self._entries[chat_id] = (dict(state), expires_at)
+            self._entries.move_to_end(chat_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, chat_id):
+        with self._lock:
+            self._entries.pop(chat_id, None)
+
+    def reap(self, now):
+        with self._lock:
+            expired = [chat_id for chat_id, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for chat_id in expired:
+                del self._entries[chat_id]
+            return len(expired)
+
+    def count(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteChatBackend:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS chat_session ('
+                'id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_chat_session_expires_at ON chat_session (expires_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, chat_id, now):
+        row = self._connect().execute(
+            'SELECT state FROM chat_session WHERE id = ? AND expires_at > ?', (chat_id, now)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, chat_id, state, expires_at):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO chat_session (id, state, expires_at) VALUES (?, ?, ?)',
+                         (chat_id, json.dumps(state), expires_at))
+
+    def delete(self, chat_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM chat_session WHERE id = ?', (chat_id,))
+
+    def reap(self, now):
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM chat_session WHERE expires_at <= ?', (now,)).rowcount
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM chat_session').fetchone()[0]
+
+
+class ChatSessionStore:
+    def __init__(self, backend, ttl=1800, reap_interval=300):
+        self.backend = backend
+        self.ttl = ttl
+        self.reap_interval = reap_interval
+        self.reaped = 0
+        self._reaped_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id():
+        return secrets.token_urlsafe(16)
+
+    def load(self, chat_id):
+        """The conversation's state, or None when it is unknown or expired"""
+        try:
+            return self.backend.get(chat_id, time.time())
+        except sqlite3.Error as e:
+            print(f"Error reading chat session: {str(e)}")
+            return None
+
+    def save(self, chat_id, state):
+        try:
+            self.backend.set(chat_id, state, time.time() + self.ttl)
+            self._maybe_reap()
+        except sqlite3.Error as e:
+            print(f"Error writing chat session: {str(e)}")
+
+    def delete(self, chat_id):
+        try:
+            self.backend.delete(chat_id)
+        except sqlite3.Error as e:
+            print(f"Error deleting chat session: {str(e)}")
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'conversations': self.backend.count(),
+            'ttl_seconds': self.ttl,
+            'reaped': self.reaped
+        }
+
+    def _maybe_reap(self):
+        with self._lock:
+            if time.monotonic() - self._reaped_at < self.reap_interval:
+                return
+            self._reaped_at = time.monotonic()
+        self.reaped += self.backend.reap(time.time())
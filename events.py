@@ -0,0 +1,141 @@
+"""Publish/subscribe bus for ticket events.
+
+Request handlers publish an event once their change is committed, and every
+open dashboard holds a server-sent events stream subscribed to the bus with a
+filter for the tickets its user may see. Each subscriber has its own bounded
+queue, so a stalled browser only loses its own oldest events; dashboards
+fetch the actual rows from the change feed, so a dropped event costs nothing.
+
+On its own the bus only reaches streams served by the same process. Give it a
+``RedisRelay`` to fan events out to every gunicorn worker through a Redis (or
+Redis-compatible) server.
+
+Each stream holds a worker thread, so ``max_subscribers`` caps how many a
+process serves at once. ``subscribe`` returns None past the cap and the
+dashboard falls back to polling the change feed.
+"""
+import json
+import queue
+import threading
+import time
+
+
+class Subscription:
+    def __init__(self, bus, accepts, max_pending):
+        self._bus = bus
+        self.accepts = accepts
+        self._queue = queue.Queue(max_pending)
+
+    def deliver(self, event):
+        if not self.accepts(event):
+            return
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()  # drop the oldest
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout`` seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self, relay=None, max_pending=100, max_subscribers=None):
+        self.relay = relay
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self.refused = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def subscribe(self, accepts=lambda event: True):
+        """A new subscription, or None when ``max_subscribers`` streams are already open"""
+        self._ensure_listening()
+        subscription = Subscription(self, accepts, self.max_pending)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                self.refused += 1
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        self.published += 1
+        if self.relay is not None:
+            try:
+                self.relay.publish(event)
+                return
+            except Exception as e:
+                print(f"Error relaying event, delivering locally: {str(e)}")
+        self._deliver(event)
+
+    def status(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            'subscribers': subscribers,
+            'max_subscribers': self.max_subscribers,
+            'refused': self.refused,
+            'published': self.published,
+            'relay': type(self.relay).__name__ if self.relay is not None else None
+        }
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _ensure_listening(self):
+        # Only processes serving streams need the relay's incoming events
+        if self.relay is None or self._listening:
+            return
+        with self._lock:
+            if not self._listening:
+                self.relay.start(self._deliver)
+                self._listening = True
+
+
+class RedisRelay:
+    """Sends events through a Redis pub/sub channel so every worker delivers them"""
+
+    def __init__(self, url, channel='helpdesk:events', reconnect_delay=5):
+        import redis  # optional; only needed when a relay is configured
+        self._client = redis.Redis.from_url(url)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+
+    def publish(self, event):
+        self._client.publish(self.channel, json.dumps(event))
+
+    def start(self, deliver):
+        thread = threading.Thread(target=self._listen, args=(deliver,), name='event-relay', daemon=True)
+        thread.start()
+
+    def _listen(self, deliver):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    deliver(json.loads(message['data']))
+            except Exception as e:
+                print(f"Event relay disconnected: {str(e)}")
+                time.sleep(self.reconnect_delay)
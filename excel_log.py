@@ -0,0 +1,190 @@
+"""Append-only Excel logging.
+
+Web requests never open the workbook. ``append`` puts the row on a queue, and
+a background thread writes it to a JSON-lines journal next to the workbook.
+The same thread rebuilds the .xlsx from the journal with openpyxl's write-only
+mode once enough rows have arrived, or ``rebuild_interval`` seconds have
+passed. The new file is written to a temporary path and swapped in, so
+readers and other worker processes never see a half-written file.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on O_APPEND for single-line writes
+    fcntl = None
+
+_STOP = object()
+
+
+class ExcelLogWriter:
+    def __init__(self, xlsx_path, headers, journal_path=None,
+                 rebuild_interval=300, rebuild_batch=100, styled=True):
+        self.xlsx_path = xlsx_path
+        self.headers = list(headers)
+        self.journal_path = journal_path or os.path.splitext(xlsx_path)[0] + '.jsonl'
+        self.rebuild_interval = rebuild_interval
+        self.rebuild_batch = rebuild_batch
+        self.styled = styled
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pending_rebuild = 0
+        self._last_rebuild = time.monotonic()
+        self.rows_written = 0
+        self.rebuilds = 0
+
+    def append(self, row):
+        """Queue one row; returns immediately"""
+        self._ensure_started()
+        self._queue.put([self._serialize(value) for value in row])
+
+    def flush(self, rebuild=True):
+        """Block until queued rows are journalled (and the workbook rebuilt)"""
+        if self._thread is None:
+            if rebuild:
+                self.rebuild()
+            return
+        done = threading.Event()
+        self._queue.put((done, rebuild))
+        done.wait()
+
+    def rebuild(self):
+        """Regenerate the workbook from the journal"""
+        self._seed_journal()
+        widths = [len(h) for h in self.headers]
+        for row in self._iter_journal():
+            for i, value in enumerate(row[:len(widths)]):
+                widths[i] = max(widths[i], len(str(value)))
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for i, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = width + 2
+
+        ws.append([self._cell(ws, h, header=True) for h in self.headers])
+        for row_no, row in enumerate(self._iter_journal(), start=2):
+            ws.append([self._cell(ws, v, shaded=row_no % 2 == 0) for v in row])
+
+        os.makedirs(os.path.dirname(self.xlsx_path) or '.', exist_ok=True)
+        tmp_path = f"{self.xlsx_path}.{os.getpid()}.tmp"
+        wb.save(tmp_path)
+        os.replace(tmp_path, self.xlsx_path)
+        self._pending_rebuild = 0
+        self._last_rebuild = time.monotonic()
+        self.rebuilds += 1
+
+    def _cell(self, ws, value, header=False, shaded=False):
+        if not self.styled:
+            return value
+        cell = WriteOnlyCell(ws, value=value)
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        if header:
+            cell.font = Font(bold=True)
+        elif shaded:
+            cell.fill = PatternFill(start_color='F0F0F0', end_color='F0F0F0', fill_type='solid')
+        return cell
+
+    @staticmethod
+    def _serialize(value):
+        if value is None:
+            return ''
+        if hasattr(value, 'strftime'):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return value
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='excel-log-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self._shutdown)
+
+    def _shutdown(self):
+        self._queue.put(_STOP)
+        self._thread.join(timeout=30)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.rebuild_interval or None)
+            except queue.Empty:
+                item = None
+
+            batch = []
+            while item is not None:
+                if item is _STOP or isinstance(item, tuple):
+                    break
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            try:
+                if batch:
+                    self._write_journal(batch)
+                due = self._pending_rebuild and (
+                    self._pending_rebuild >= self.rebuild_batch
+                    or time.monotonic() - self._last_rebuild >= self.rebuild_interval
+                )
+                force = item is _STOP or (isinstance(item, tuple) and item[1])
+                if due or (force and self._pending_rebuild):
+                    self.rebuild()
+            except Exception as e:
+                print(f"Error writing Excel log {self.xlsx_path}: {str(e)}")
+
+            if isinstance(item, tuple):
+                item[0].set()
+            elif item is _STOP:
+                return
+
+    def _write_journal(self, rows):
+        self._seed_journal()
+        data = ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending_rebuild += len(rows)
+        self.rows_written += len(rows)
+
+    def _seed_journal(self):
+        # Carry rows from a workbook written before the journal existed
+        if os.path.exists(self.journal_path) or not os.path.exists(self.xlsx_path):
+            return
+        wb = load_workbook(self.xlsx_path, read_only=True)
+        rows = list(wb.active.iter_rows(min_row=2, values_only=True))
+        wb.close()
+        tmp_path = f"{self.journal_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps([self._serialize(v) for v in row], default=str) + '\n')
+        if not os.path.exists(self.journal_path):
+            os.replace(tmp_path, self.journal_path)
+        else:
+            os.remove(tmp_path)
+
+    def _iter_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
@@ -0,0 +1,158 @@
+"""Background export jobs with content-addressed results.
+
+An export is identified by a key derived from its format and the version of
+the data it was built from. The job id is that key, and the finished file is
+stored as ``<key>.<extension>`` under one directory. Asking again while the
+data is unchanged returns the same job, or the existing file, instead of
+exporting twice. Because the name alone says whether a file is current, any
+worker process can serve a download that another worker produced.
+
+Jobs run on a small thread pool and write through a temporary file, so a
+half-written export is never served and concurrent exports never share a path.
+"""
+import glob
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExportJob:
+    def __init__(self, job_id, format, path):
+        self.id = job_id
+        self.format = format
+        self.path = path
+        self.status = 'queued'  # queued, running, done, failed
+        self.rows = 0
+        self.total = None
+        self.error = None
+        self.cached = False
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def track(self, rows):
+        """Count rows as the writer consumes them"""
+        for row in rows:
+            self.rows += 1
+            yield row
+
+    def to_dict(self):
+        if self.status == 'done':
+            progress = 100
+        elif self.total:
+            progress = min(99, self.rows * 100 // self.total)
+        else:
+            progress = 0
+        return {
+            'id': self.id,
+            'format': self.format,
+            'status': self.status,
+            'progress': progress,
+            'rows': self.rows,
+            'total': self.total,
+            'cached': self.cached,
+            'error': self.error
+        }
+
+
+class ExportJobQueue:
+    def __init__(self, directory, build, max_workers=2, keep=3, job_ttl=3600):
+        """``build(job, fileobj)`` writes the export for ``job`` to an open binary file"""
+        self.directory = directory
+        self.build = build
+        self.keep = keep
+        self.job_ttl = job_ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(*parts):
+        return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()[:24]
+
+    def submit(self, format, extension, *key_parts):
+        """Start an export, or return the job or file already made from the same data"""
+        job_id = self.job_key(format, *key_parts)
+        path = os.path.join(self.directory, f'{job_id}.{extension}')
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None and (job.status in ('queued', 'running') or
+                                    (job.status == 'done' and os.path.exists(path))):
+                return job
+
+            job = self._jobs[job_id] = ExportJob(job_id, format, path)
+            if os.path.exists(path):
+                job.status = 'done'
+                job.cached = True
+                job.finished_at = time.time()
+            else:
+                self._pool.submit(self._run, job)
+            return job
+
+    def get(self, job_id):
+        """The job, or a finished stand-in when another process produced the file"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        if not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        for path in glob.glob(os.path.join(self.directory, f'{job_id}.*')):
+            if not path.endswith('.tmp'):
+                job = ExportJob(job_id, None, path)
+                job.status = 'done'
+                job.cached = True
+                return job
+        return None
+
+    def status(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {state: sum(1 for job in jobs if job.status == state)
+                for state in ('queued', 'running', 'done', 'failed')}
+
+    def _run(self, job):
+        job.status = 'running'
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{job.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as fileobj:
+                self.build(job, fileobj)
+            os.replace(tmp_path, job.path)
+            job.status = 'done'
+            self._remove_old(job)
+        except Exception as e:
+            print(f"Error running export job {job.id}: {str(e)}")
+            job.error = str(e)
+            job.status = 'failed'
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            job.finished_at = time.time()
+
+    def _remove_old(self, job):
+        # Keep the newest few files per extension; older data versions are not served again.
+        # Files a finished job still points to are kept until the job is pruned, and so
+        # are files younger than job_ttl, which jobs in other workers may point to.
+        extension = os.path.splitext(job.path)[1]
+        paths = sorted(glob.glob(os.path.join(self.directory, f'*{extension}')), key=os.path.getmtime, reverse=True)
+        with self._lock:
+            referenced = {os.path.abspath(other.path) for other in self._jobs.values() if other.status == 'done'}
+        cutoff = time.time() - self.job_ttl
+        for path in paths[self.keep:]:
+            if os.path.abspath(path) in referenced:
+                continue
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
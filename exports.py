@@ -0,0 +1,118 @@
+"""Streaming export pipeline shared by the CSV, Excel and PDF downloads.
+
+``iter_rows`` walks a query in primary-key batches, so each batch is one
+query plus its eager loads and only one batch of ORM objects is alive at a
+time. It yields plain row lists. Writers turn those rows into a file format.
+``CSVWriter`` also yields text chunks for a streamed response.
+``XLSXWriter`` uses openpyxl's write-only mode, so the workbook is never held
+in memory. ``PDFWriter`` hands the rows to ``pdf_report`` in a worker
+process.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+
+import pdf_report
+
+
+def iter_rows(query, id_column, to_row, batch_size=1000):
+    """Yield ``to_row(item)`` for every item of ``query``, loading ``batch_size`` at a time"""
+    last_id = None
+    while True:
+        batch_query = query
+        if last_id is not None:
+            batch_query = batch_query.filter(id_column > last_id)
+        batch = batch_query.order_by(id_column).limit(batch_size).all()
+        if not batch:
+            return
+        for item in batch:
+            yield to_row(item)
+        last_id = getattr(batch[-1], id_column.key)
+
+
+class CSVWriter:
+    extension = 'csv'
+    mimetype = 'text/csv'
+
+    def chunks(self, columns, rows, rows_per_chunk=500):
+        """Yield the CSV text a few hundred rows at a time"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % rows_per_chunk == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def write(self, columns, rows, fileobj):
+        for chunk in self.chunks(columns, rows):
+            fileobj.write(chunk.encode('utf-8'))
+
+
+class XLSXWriter:
+    extension = 'xlsx'
+    mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def write(self, columns, rows, fileobj):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(columns)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(fileobj)
+
+
+class PDFWriter:
+    """Paginated report from ``pdf_report``, laid out in a worker process.
+
+    Rows are spooled to a temporary JSON lines file that the worker reads, so
+    the web process never holds the report and the worker never touches the
+    database. ``processes=0`` renders in the calling process instead.
+    """
+    extension = 'pdf'
+    mimetype = 'application/pdf'
+
+    def __init__(self, processes=1):
+        self.processes = processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def write(self, columns, rows, fileobj):
+        with tempfile.TemporaryDirectory() as tmp:
+            rows_path = os.path.join(tmp, 'rows.jsonl')
+            pdf_path = os.path.join(tmp, 'report.pdf')
+            with open(rows_path, 'w', encoding='utf-8') as spool:
+                for row in rows:
+                    spool.write(json.dumps(row) + '\n')
+            if self.processes:
+                self._executor().submit(pdf_report.render_report, rows_path, pdf_path, columns).result()
+            else:
+                pdf_report.render_report(rows_path, pdf_path, columns)
+            with open(pdf_path, 'rb') as report:
+                shutil.copyfileobj(report, fileobj)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn rather than fork: the web process has threads running
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+
+WRITERS = {
+    'csv': CSVWriter(),
+    'excel': XLSXWriter(),
+    'pdf': PDFWriter(),
+}
+
@@ -0,0 +1,34 @@
+"""Gunicorn settings, read automatically when gunicorn is started from this directory.
+
+Every open admin or technician dashboard holds an /api/events stream, so
+workers are threaded by default; a sync worker would be pinned by a single
+browser tab. Streams are capped at EVENT_STREAM_MAX_PER_WORKER per worker
+(half the threads by default), which leaves the other threads for ordinary
+requests. Command line options still override these.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+
+def on_starting(server):
+    if server.cfg.worker_class_str == 'sync':
+        raise RuntimeError('Dashboard event streams need threaded workers; '
+                           'run gunicorn with --worker-class gthread --threads 16')
+    max_streams = int(os.getenv('EVENT_STREAM_MAX_PER_WORKER', str(max(1, server.cfg.threads // 2))))
+    if server.cfg.worker_class_str == 'gthread' and max_streams >= server.cfg.threads:
+        raise RuntimeError(f'EVENT_STREAM_MAX_PER_WORKER ({max_streams}) leaves no threads for other requests; '
+                           f'set it below --threads ({server.cfg.threads})')
+    if server.cfg.workers > 1 and not os.getenv('EVENT_BUS_REDIS_URL'):
+        poll_interval = float(os.getenv('EVENT_POLL_INTERVAL', '30'))
+        if not poll_interval:
+            raise RuntimeError('With several workers and no EVENT_BUS_REDIS_URL, dashboards only see changes '
+                               'made by their own worker; set EVENT_BUS_REDIS_URL or EVENT_POLL_INTERVAL')
+        server.log.warning('EVENT_BUS_REDIS_URL is not set, so ticket events only reach streams on the worker '
+                           'that made the change; dashboards poll for changes every %g seconds instead',
+                           poll_interval)
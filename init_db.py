@@ -1,10 +1,12 @@
 from app import app, db, User
+import migrations
 from werkzeug.security import generate_password_hash
 
 def init_db():
     with app.app_context():
         # Create database tables
         db.create_all()
+        migrations.upgrade(db.engine)
         
         # Check if technicians already exist
         if User.query.filter_by(role='technician').count() == 0:
@@ -0,0 +1,76 @@
+"""Keyword intent matching for troubleshooting playbooks and hardware types.
+
+Categories and their keywords are loaded from a JSON file. All keywords are
+compiled into one alternation regex, so classifying a problem takes a single
+pass over its text, and every category gets a score: the number of keyword
+hits, with each occurrence counted.
+"""
+import json
+import os
+import re
+
+DEFAULT_PLAYBOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'troubleshooting_playbooks.json')
+
+
+class IntentMatcher:
+    def __init__(self, categories, default=None):
+        self.categories = list(categories)
+        self.default = default or {}
+        self._by_id = {c['id']: c for c in self.categories}
+        self._order = {c['id']: i for i, c in enumerate(self.categories)}
+
+        self._term_categories = {}
+        for category in self.categories:
+            for term in category['terms']:
+                self._term_categories.setdefault(term.lower(), []).append(category['id'])
+
+        # Longest terms first so "connection" wins over "connect". Terms match
+        # anywhere in a word, so "phone" still catches "iphone" and "mail" "hotmail"
+        terms = sorted(self._term_categories, key=len, reverse=True)
+        if terms:
+            self._pattern = re.compile('|'.join(re.escape(t) for t in terms))
+        else:
+            self._pattern = None
+
+    @classmethod
+    def from_file(cls, section, path=DEFAULT_PLAYBOOK_PATH):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)[section]
+        return cls(data['categories'], data.get('default'))
+
+    @property
+    def pattern(self):
+        """The compiled keyword alternation, or None when there are no terms"""
+        return self._pattern
+
+    @property
+    def term_categories(self):
+        """``{term: [category_id, ...]}`` for every lower-cased keyword"""
+        return self._term_categories
+
+    def rank(self, category_id):
+        """Position of the category in the data file; lower wins ties"""
+        return self._order[category_id]
+
+    def classify(self, text):
+        """Return ``[(category_id, score), ...]`` best match first"""
+        if self._pattern is None or not text:
+            return []
+        scores = {}
+        for match in self._pattern.finditer(text.lower()):
+            for category_id in self._term_categories[match.group(0)]:
+                scores[category_id] = scores.get(category_id, 0) + 1
+        # Ties go to the category listed first in the data file
+        return sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
+
+    def best(self, text):
+        """Return the best matching category, or the default entry"""
+        ranked = self.classify(text)
+        return self._by_id[ranked[0][0]] if ranked else self.default
+
+    def get(self, category_id):
+        return self._by_id.get(category_id, self.default)
+
+    def playbook(self, text, variant='primary'):
+        steps = self.best(text).get(variant) or self.default.get(variant, [])
+        return '\n'.join(steps) if isinstance(steps, list) else steps
@@ -0,0 +1,108 @@
+"""Lazily initialised, health-checked access to the Gemini model.
+
+Nothing here touches the network at import time. The model object is built on
+first use, and a daemon thread keeps an eye on the API so that a failed call
+disables the assistant only until the service answers again.
+"""
+import threading
+import time
+
+import google.generativeai as genai
+
+
+class LLMClientProvider:
+    def __init__(self, api_key, model_name='models/gemini-1.5-pro',
+                 probe_interval=60, failure_threshold=3):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.probe_interval = probe_interval
+        self.failure_threshold = failure_threshold
+
+        self._lock = threading.Lock()
+        self._model = None
+        self._healthy = bool(api_key)  # optimistic until a call proves otherwise
+        self._consecutive_failures = 0
+        self._last_error = None
+        self._last_check = None
+        self._probe_thread = None
+        self._stop = threading.Event()
+
+    def get_model(self):
+        """Return the shared GenerativeModel, creating it on first use"""
+        if not self.api_key:
+            return None
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        genai.configure(api_key=self.api_key)
+                        self._model = genai.GenerativeModel(self.model_name)
+                    except Exception as e:
+                        print(f"Error configuring Gemini API: {str(e)}")
+                        self._mark_unhealthy(e)
+                    self._start_probe()
+        return self._model
+
+    def is_available(self):
+        return self.get_model() is not None and self._healthy
+
+    def report_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            if not self._healthy:
+                print("Gemini API recovered, re-enabling AI troubleshooting")
+            self._healthy = True
+            self._last_check = time.time()
+
+    def report_failure(self, error):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_error = str(error)
+            self._last_check = time.time()
+            if self._consecutive_failures >= self.failure_threshold and self._healthy:
+                print(f"Gemini API marked unavailable after {self._consecutive_failures} failures: {error}")
+                self._healthy = False
+
+    def status(self):
+        return {
+            'configured': bool(self.api_key),
+            'model': self.model_name,
+            'healthy': self._healthy,
+            'consecutive_failures': self._consecutive_failures,
+            'last_error': self._last_error,
+            'last_check': self._last_check,
+        }
+
+    def stop(self):
+        self._stop.set()
+
+    def _mark_unhealthy(self, error):
+        self._healthy = False
+        self._last_error = str(error)
+        self._last_check = time.time()
+
+    def _start_probe(self):
+        # Called with self._lock held
+        if self._probe_thread is not None or self.probe_interval <= 0:
+            return
+        self._probe_thread = threading.Thread(target=self._probe_loop, name='gemini-health-probe', daemon=True)
+        self._probe_thread.start()
+
+    def _probe(self):
+        # Fetching model metadata is cheap and does not consume generation quota
+        try:
+            if self._model is None:
+                with self._lock:
+                    if self._model is None:
+                        genai.configure(api_key=self.api_key)
+                        self._model = genai.GenerativeModel(self.model_name)
+            genai.get_model(self.model_name)
+            self.report_success()
+        except Exception as e:
+            with self._lock:
+                self._consecutive_failures = max(self._consecutive_failures, self.failure_threshold)
+            self.report_failure(e)
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval):
+            self._probe()
@@ -0,0 +1,145 @@
+"""Bounded thread pool for LLM calls with per-call deadlines.
+
+Web workers hand Gemini calls to this pool and wait at most ``timeout``
+seconds for them. A call that misses its deadline keeps running in the pool,
+so its answer still reaches the response cache, while the request goes on with
+the fallback steps. Once the pool and its queue are full, new calls are
+rejected straight away instead of piling up behind slow ones.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class LLMTimeout(Exception):
+    pass
+
+
+class LLMSaturated(Exception):
+    pass
+
+
+_STREAM_END = object()
+
+
+class LLMExecutor:
+    def __init__(self, max_workers=4, max_pending=16, timeout=8.0, latency_window=500):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self.calls = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise LLMSaturated("LLM executor is saturated")
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+        started = time.monotonic()
+
+        def task():
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self._latencies.append(time.monotonic() - started)
+                self._slots.release()
+            with self._lock:
+                self.completed += 1
+            return result
+
+        return self._pool.submit(task)
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """Run ``fn`` in the pool; return None if it is rejected or misses its deadline"""
+        try:
+            future = self.submit(fn, *args, **kwargs)
+        except LLMSaturated:
+            print("LLM executor saturated, skipping AI call")
+            return None
+        try:
+            return future.result(timeout=timeout if timeout is not None else self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            print("LLM call missed its deadline, continuing in background")
+            return None
+
+    def stream(self, gen_fn, *args, timeout=None, **kwargs):
+        """Iterate ``gen_fn`` in the pool, yielding items as they arrive.
+
+        Raises LLMTimeout if no item arrives within ``timeout`` seconds; the
+        producer keeps running so it can finish (and cache) in the background.
+        """
+        items = queue.Queue()
+
+        def produce():
+            try:
+                for item in gen_fn(*args, **kwargs):
+                    items.put(item)
+            except Exception as e:
+                items.put(e)
+                raise
+            items.put(_STREAM_END)
+
+        self.submit(produce)
+        deadline = timeout if timeout is not None else self.timeout
+        while True:
+            try:
+                item = items.get(timeout=deadline)
+            except queue.Empty:
+                with self._lock:
+                    self.timeouts += 1
+                raise LLMTimeout("LLM stream stalled past its deadline")
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            in_flight = self.in_flight
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'timeout_seconds': self.timeout,
+                'in_flight': in_flight,
+                'saturation': round(in_flight / (self.max_workers + self.max_pending), 3),
+                'calls': self.calls,
+                'completed': self.completed,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+                'errors': self.errors,
+                'latency_p50': percentile(0.5),
+                'latency_p95': percentile(0.95),
+                'latency_max': round(latencies[-1], 3) if latencies else None,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
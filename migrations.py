@@ -0,0 +1,280 @@
+"""Schema migrations for the helpdesk database.
+
+``db.create_all()`` only creates missing tables. It never changes tables that
+already exist, so new columns, indexes and backfills live here as numbered,
+idempotent steps. Applied steps are recorded in ``schema_migrations``; run
+``upgrade(db.engine)`` after ``db.create_all()``.
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+MIGRATIONS = []
+
+
+def migration(name):
+    def register(fn):
+        MIGRATIONS.append((name, fn))
+        return fn
+    return register
+
+
+def _columns(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+@migration('0001_user_assignment_fields')
+def add_assignment_fields(conn):
+    columns = _columns(conn, 'user')
+    if 'skills' not in columns:
+        conn.execute(text('ALTER TABLE "user" ADD COLUMN skills VARCHAR(200)'))
+    if 'assignment_weight' not in columns:
+        conn.execute(text('ALTER TABLE "user" ADD COLUMN assignment_weight INTEGER NOT NULL DEFAULT 1'))
+
+
+@migration('0002_dashboard_indexes')
+def add_dashboard_indexes(conn):
+    for statement in (
+        'CREATE INDEX IF NOT EXISTS ix_complaint_technician_created ON complaint (technician_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_user_created ON complaint (user_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_status ON complaint (status)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_created_at ON complaint (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_department_created ON complaint (employee_department, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_comment_complaint_id ON comment (complaint_id)',
+    ):
+        conn.execute(text(statement))
+    conn.execute(text('ANALYZE'))
+
+
+@migration('0003_complaint_status_counts')
+def backfill_complaint_status_counts(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS complaint_status_count ('
+        'status VARCHAR(20) NOT NULL PRIMARY KEY, count INTEGER NOT NULL)'
+    ))
+    conn.execute(text('DELETE FROM complaint_status_count'))
+    conn.execute(text(
+        'INSERT INTO complaint_status_count (status, count) '
+        "SELECT COALESCE(status, 'Open'), COUNT(*) FROM complaint GROUP BY COALESCE(status, 'Open')"
+    ))
+
+
+@migration('0004_filter_indexes')
+def add_filter_indexes(conn):
+    # Status and priority filters page newest first; (status) alone left a sort step
+    for statement in (
+        'CREATE INDEX IF NOT EXISTS ix_complaint_status_created ON complaint (status, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_priority_created ON complaint (priority, created_at)',
+        'DROP INDEX IF EXISTS ix_complaint_status',
+    ):
+        conn.execute(text(statement))
+    conn.execute(text('ANALYZE'))
+
+
+@migration('0005_change_feed')
+def add_change_feed(conn):
+    if 'change_seq' not in _columns(conn, 'complaint'):
+        conn.execute(text('ALTER TABLE complaint ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0'))
+    if 'updated_at' not in _columns(conn, 'complaint'):
+        conn.execute(text('ALTER TABLE complaint ADD COLUMN updated_at DATETIME'))
+    if 'change_seq' not in _columns(conn, 'comment'):
+        conn.execute(text('ALTER TABLE comment ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0'))
+    for statement in (
+        'CREATE INDEX IF NOT EXISTS ix_complaint_change_seq ON complaint (change_seq)',
+        'CREATE INDEX IF NOT EXISTS ix_comment_change_seq ON comment (change_seq)',
+        'CREATE TABLE IF NOT EXISTS change_sequence ('
+        'name VARCHAR(50) NOT NULL PRIMARY KEY, value INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS complaint_tombstone ('
+        'id INTEGER NOT NULL PRIMARY KEY, complaint_id INTEGER NOT NULL, '
+        'change_seq INTEGER NOT NULL, deleted_at DATETIME)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_tombstone_change_seq ON complaint_tombstone (change_seq)',
+        "INSERT INTO change_sequence (name, value) SELECT 'complaints', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM change_sequence WHERE name = 'complaints')",
+    ):
+        conn.execute(text(statement))
+
+
+@migration('0006_technician_status_index')
+def add_technician_status_index(conn):
+    # Covers the admin dashboard's per-technician workload GROUP BY
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_complaint_technician_status ON complaint (technician_id, status)'))
+    conn.execute(text('ANALYZE'))
+
+
+SEARCH_COLUMNS = ('complaint_no', 'issue', 'troubleshooting_steps', 'employee_name',
+                  'employee_designation', 'employee_department')
+# bm25 weight per indexed column, in table order (the complaint columns, then comments)
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0, 2.0, 1.0, 1.0, 1.0)
+
+
+@migration('0007_complaint_search')
+def add_complaint_search(conn):
+    # FTS5 is SQLite only; other databases use the LIKE fallback in search.py
+    if conn.dialect.name != 'sqlite':
+        return
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+    comment_text = ("COALESCE((SELECT group_concat(content, char(10)) FROM comment "
+                    "WHERE comment.complaint_id = {id}), '')")
+    for statement in (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS complaint_search USING fts5({columns}, comments, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        "INSERT INTO complaint_search (complaint_search, rank) "
+        f"VALUES ('rank', 'bm25({', '.join(str(weight) for weight in SEARCH_WEIGHTS)})')",
+        'DELETE FROM complaint_search',
+        f"INSERT INTO complaint_search (rowid, {columns}, comments) "
+        f"SELECT id, {columns}, {comment_text.format(id='complaint.id')} FROM complaint",
+
+        'CREATE TRIGGER IF NOT EXISTS complaint_search_insert AFTER INSERT ON complaint BEGIN '
+        f"INSERT INTO complaint_search (rowid, {columns}, comments) VALUES (new.id, {new_values}, ''); END",
+        f'CREATE TRIGGER IF NOT EXISTS complaint_search_update AFTER UPDATE OF {columns} ON complaint BEGIN '
+        f"UPDATE complaint_search SET ({columns}) = ({new_values}) WHERE rowid = new.id; END",
+        'CREATE TRIGGER IF NOT EXISTS complaint_search_delete AFTER DELETE ON complaint BEGIN '
+        'DELETE FROM complaint_search WHERE rowid = old.id; END',
+
+        # A new comment is appended; edits and deletes rebuild that complaint's comment text
+        'CREATE TRIGGER IF NOT EXISTS comment_search_insert AFTER INSERT ON comment BEGIN '
+        "UPDATE complaint_search SET comments = comments || char(10) || new.content "
+        'WHERE rowid = new.complaint_id; END',
+        'CREATE TRIGGER IF NOT EXISTS comment_search_update AFTER UPDATE OF content, complaint_id ON comment BEGIN '
+        f"UPDATE complaint_search SET comments = {comment_text.format(id='old.complaint_id')} "
+        'WHERE rowid = old.complaint_id; '
+        f"UPDATE complaint_search SET comments = {comment_text.format(id='new.complaint_id')} "
+        'WHERE rowid = new.complaint_id; END',
+        'CREATE TRIGGER IF NOT EXISTS comment_search_delete AFTER DELETE ON comment BEGIN '
+        f"UPDATE complaint_search SET comments = {comment_text.format(id='old.complaint_id')} "
+        'WHERE rowid = old.complaint_id; END',
+    ):
+        conn.execute(text(statement))
+    conn.execute(text("INSERT INTO complaint_search (complaint_search) VALUES ('optimize')"))
+
+
+@migration('0008_duplicate_links')
+def add_duplicate_links(conn):
+    columns = _columns(conn, 'complaint')
+    if 'duplicate_of_id' not in columns:
+        conn.execute(text('ALTER TABLE complaint ADD COLUMN duplicate_of_id INTEGER REFERENCES complaint (id)'))
+    if 'duplicate_count' not in columns:
+        conn.execute(text('ALTER TABLE complaint ADD COLUMN duplicate_count INTEGER NOT NULL DEFAULT 0'))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_complaint_duplicate_of_id ON complaint (duplicate_of_id)'))
+
+
+# Resolved chats were appended to this workbook before the chat_resolution table existed
+CHAT_RESOLUTION_WORKBOOK = 'data/user_data.xlsx'
+
+
+@migration('0009_import_chat_workbook')
+def import_chat_workbook(conn):
+    # export_chat_resolutions rewrites the workbook from the table, so rows that
+    # only exist in it are copied in first. Exports add a "Resolved At" column;
+    # a workbook that has one already came from the table.
+    if not os.path.exists(CHAT_RESOLUTION_WORKBOOK):
+        return
+    from openpyxl import load_workbook
+    wb = load_workbook(CHAT_RESOLUTION_WORKBOOK, read_only=True)
+    rows = wb.active.iter_rows(values_only=True)
+    header = next(rows, None) or ()
+    if 'Resolved At' not in header:
+        for row in rows:
+            name, designation, department, problem, resolution = (tuple(row) + (None,) * 5)[:5]
+            if problem:
+                conn.execute(text(
+                    'INSERT INTO chat_resolution (name, designation, department, problem, resolution) '
+                    'VALUES (:name, :designation, :department, :problem, :resolution)'
+                ), {'name': name, 'designation': designation, 'department': department,
+                    'problem': str(problem), 'resolution': resolution})
+    wb.close()
+
+
+@migration('0010_uncount_linked_reports')
+def uncount_linked_reports(conn):
+    # Reports linked to an incident were counted as tickets of their own
+    conn.execute(text('DELETE FROM complaint_status_count'))
+    conn.execute(text(
+        'INSERT INTO complaint_status_count (status, count) '
+        "SELECT COALESCE(status, 'Open'), COUNT(*) FROM complaint WHERE duplicate_of_id IS NULL "
+        "GROUP BY COALESCE(status, 'Open')"
+    ))
+
+
+@migration('0011_chat_resolution_source')
+def add_chat_resolution_source(conn):
+    # Rows from before this have no source and are never reused as answers
+    columns = _columns(conn, 'chat_resolution')
+    if 'source' not in columns:
+        conn.execute(text('ALTER TABLE chat_resolution ADD COLUMN source VARCHAR(20)'))
+    if 'rejections' not in columns:
+        conn.execute(text('ALTER TABLE chat_resolution ADD COLUMN rejections INTEGER NOT NULL DEFAULT 0'))
+
+
+@migration('0012_complaint_page_keys')
+def backfill_complaint_page_keys(conn):
+    # Dashboard pages are keyed on created_at, which legacy rows may lack, and the
+    # department filter matches employee_department, which analytics fills in
+    # from the employee's profile when it is missing. Only missing departments
+    # are filled; one recorded on the complaint is kept even if the profile changed.
+    conn.execute(text(
+        'UPDATE complaint SET created_at = '
+        "COALESCE(resolved_at, updated_at, '1970-01-01 00:00:00.000000') WHERE created_at IS NULL"
+    ))
+    conn.execute(text(
+        'UPDATE complaint SET employee_department = '
+        '(SELECT department FROM "user" WHERE "user".id = complaint.user_id) '
+        "WHERE (employee_department IS NULL OR employee_department = '') "
+        'AND EXISTS (SELECT 1 FROM "user" WHERE "user".id = complaint.user_id '
+        "AND \"user\".department IS NOT NULL AND \"user\".department != '')"
+    ))
+
+
+@migration('0013_tombstone_visibility')
+def add_tombstone_visibility(conn):
+    # The change feed only tells each user about removals of tickets they could see
+    columns = _columns(conn, 'complaint_tombstone')
+    if 'user_id' not in columns:
+        conn.execute(text('ALTER TABLE complaint_tombstone ADD COLUMN user_id INTEGER'))
+    if 'technician_id' not in columns:
+        conn.execute(text('ALTER TABLE complaint_tombstone ADD COLUMN technician_id INTEGER'))
+    if 'reason' not in columns:
+        conn.execute(text(
+            "ALTER TABLE complaint_tombstone ADD COLUMN reason VARCHAR(20) NOT NULL DEFAULT 'deleted'"))
+    for statement in (
+        'CREATE INDEX IF NOT EXISTS ix_complaint_technician_change_seq ON complaint (technician_id, change_seq)',
+        'CREATE INDEX IF NOT EXISTS ix_complaint_user_change_seq ON complaint (user_id, change_seq)',
+    ):
+        conn.execute(text(statement))
+
+
+@migration('0014_technician_status_duplicate_index')
+def extend_technician_status_index(conn):
+    # The workload GROUP BY leaves out linked reports, so the index needs
+    # duplicate_of_id to keep answering it without reading the table
+    indexes = {index['name']: index['column_names'] for index in inspect(conn).get_indexes('complaint')}
+    columns = indexes.get('ix_complaint_technician_status')
+    if columns == ['technician_id', 'status', 'duplicate_of_id']:
+        return  # created that way by db.create_all()
+    if columns is not None:
+        conn.execute(text('DROP INDEX ix_complaint_technician_status'))
+    conn.execute(text('CREATE INDEX ix_complaint_technician_status '
+                      'ON complaint (technician_id, status, duplicate_of_id)'))
+    conn.execute(text('ANALYZE'))
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'name VARCHAR(100) PRIMARY KEY, applied_at DATETIME NOT NULL)'
+        ))
+        applied = {row[0] for row in conn.execute(text('SELECT name FROM schema_migrations'))}
+        for name, fn in MIGRATIONS:
+            if name in applied:
+                continue
+            print(f"Applying migration {name}")
+            fn(conn)
+            conn.execute(
+                text('INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)'),
+                {'name': name, 'applied_at': datetime.utcnow()}
+            )
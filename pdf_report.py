@@ -0,0 +1,180 @@
+"""Paginated PDF report for the complaint export.
+
+The report is laid out from a file of JSON rows, one list per line, so it can
+run in a separate worker process without a database connection. It makes two
+passes over that file:
+
+1. Count the rows for the summary page (totals by status, priority and
+   technician, plus the date range) and note the byte offset of every chunk
+   of ``chunk_size`` rows.
+2. Build the document. The detail table is a series of ``TableChunk``
+   flowables that only store a file offset. Each one reads its rows and
+   becomes a ``LongTable`` when reportlab lays it out, and is dropped once it
+   is drawn.
+
+So only one chunk of cells is ever in memory, and render time grows
+linearly with the number of complaints. Header rows repeat on every page.
+Long text wraps in ``Paragraph`` cells, and is cut at ``MAX_CELL_CHARS`` so a
+single row always fits on a page.
+"""
+import json
+from collections import Counter
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, LongTable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+FONT = 'Helvetica'
+FONT_SIZE = 7
+CELL_PADDING = 6  # left + right padding reportlab puts around each cell
+MAX_CELL_CHARS = 1200
+
+# Relative column widths; anything not listed gets 1
+COLUMN_WEIGHTS = {
+    'Complaint No': 1.1, 'Employee Name': 1.2, 'Department & Code': 1.3, 'Issue': 3,
+    'Created At': 1.1, 'Resolved At': 1.1, 'Assigned Technician': 1.2, 'Comments': 3.2,
+}
+# Summary breakdowns, with the label used for empty values
+SUMMARY_COLUMNS = {'Status': 'Unknown', 'Priority': 'Unknown', 'Assigned Technician': 'Unassigned'}
+SUMMARY_TOP = 20
+
+_styles = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle('ReportTitle', parent=_styles['Heading1'], fontSize=20, spaceAfter=12)
+HEADING_STYLE = ParagraphStyle('ReportHeading', parent=_styles['Heading3'], spaceBefore=10, spaceAfter=4)
+BODY_STYLE = _styles['BodyText']
+CELL_STYLE = ParagraphStyle('ReportCell', fontName=FONT, fontSize=FONT_SIZE, leading=FONT_SIZE + 1.5)
+HEADER_STYLE = ParagraphStyle('ReportHeader', parent=CELL_STYLE, fontName='Helvetica-Bold', textColor=colors.white)
+
+DETAIL_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('FONTNAME', (0, 0), (-1, -1), FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), FONT_SIZE),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.beige]),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+])
+SUMMARY_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+])
+
+
+def cell(value, width):
+    """A plain string when it fits on one line, otherwise a wrapping Paragraph"""
+    text = '' if value is None else str(value)
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS] + '...'
+    if '\n' not in text and stringWidth(text, FONT, FONT_SIZE) <= width - CELL_PADDING:
+        return text
+    return Paragraph(escape(text).replace('\n', '<br/>'), CELL_STYLE)
+
+
+class TableChunk(Flowable):
+    """``count`` rows starting at ``offset`` in the rows file, read when laid out"""
+
+    def __init__(self, rows_path, offset, count, columns, col_widths):
+        super().__init__()
+        self.rows_path = rows_path
+        self.offset = offset
+        self.count = count
+        self.columns = columns
+        self.col_widths = col_widths
+        self._table = None
+
+    def table(self):
+        if self._table is None:
+            data = [[Paragraph(escape(name), HEADER_STYLE) for name in self.columns]]
+            with open(self.rows_path, 'rb') as rows:
+                rows.seek(self.offset)
+                for _ in range(self.count):
+                    row = json.loads(rows.readline())
+                    data.append([cell(value, width) for value, width in zip(row, self.col_widths)])
+            self._table = LongTable(data, colWidths=self.col_widths, repeatRows=1, style=DETAIL_STYLE)
+        return self._table
+
+    def wrap(self, availWidth, availHeight):
+        return self.table().wrap(availWidth, availHeight)
+
+    def split(self, availWidth, availHeight):
+        return self.table().split(availWidth, availHeight)
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        return self.table().drawOn(canvas, x, y, _sW)
+
+
+def scan_rows(rows_path, columns, chunk_size):
+    """Summary counts and the byte offset where each chunk of rows starts"""
+    counters = {name: Counter() for name in SUMMARY_COLUMNS if name in columns}
+    positions = {name: columns.index(name) for name in counters}
+    created = columns.index('Created At') if 'Created At' in columns else None
+    summary = {'total': 0, 'first': None, 'last': None, 'counts': counters}
+    offsets = []
+    offset = 0
+    with open(rows_path, 'rb') as rows:
+        for line in rows:
+            if summary['total'] % chunk_size == 0:
+                offsets.append(offset)
+            offset += len(line)
+            row = json.loads(line)
+            summary['total'] += 1
+            for name, position in positions.items():
+                counters[name][row[position] or SUMMARY_COLUMNS[name]] += 1
+            if created is not None and row[created]:
+                summary['first'] = min(summary['first'] or row[created], row[created])
+                summary['last'] = max(summary['last'] or row[created], row[created])
+    return summary, offsets
+
+
+def summary_flowables(title, summary):
+    elements = [
+        Paragraph(escape(title), TITLE_STYLE),
+        Paragraph(f"Generated {datetime.now().strftime('%Y-%m-%d %H:%M')}", BODY_STYLE),
+        Paragraph(f"{summary['total']} complaints" + (
+            f", created {summary['first']} to {summary['last']}" if summary['first'] else ''), BODY_STYLE),
+    ]
+    for name, counts in summary['counts'].items():
+        rows = counts.most_common(SUMMARY_TOP)
+        other = summary['total'] - sum(count for _, count in rows)
+        if other:
+            rows.append(('Other', other))
+        data = [[name, 'Complaints', 'Share']] + [
+            [str(label), count, f"{count * 100 / summary['total']:.1f}%"] for label, count in rows]
+        elements += [Paragraph(f"By {name.lower()}", HEADING_STYLE),
+                     Table(data, colWidths=[3 * inch, 1.2 * inch, 1 * inch], hAlign='LEFT', style=SUMMARY_STYLE)]
+    return elements
+
+
+def render_report(rows_path, output_path, columns, title='Complaints Report', chunk_size=200):
+    """Lay out the report for the rows in ``rows_path`` and return its page count"""
+    summary, offsets = scan_rows(rows_path, columns, chunk_size)
+    doc = SimpleDocTemplate(output_path, pagesize=landscape(letter), title=title,
+                            leftMargin=0.4 * inch, rightMargin=0.4 * inch,
+                            topMargin=0.4 * inch, bottomMargin=0.5 * inch)
+    weights = [COLUMN_WEIGHTS.get(name, 1) for name in columns]
+    col_widths = [doc.width * weight / sum(weights) for weight in weights]
+
+    elements = summary_flowables(title, summary)
+    if summary['total']:
+        elements.append(PageBreak())
+        for number, offset in enumerate(offsets):
+            count = min(chunk_size, summary['total'] - number * chunk_size)
+            elements.append(TableChunk(rows_path, offset, count, columns, col_widths))
+    else:
+        elements += [Spacer(1, 12), Paragraph('No complaints to report.', BODY_STYLE)]
+
+    def footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont(FONT, 8)
+        canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 0.3 * inch, f"{title} - page {doc.page}")
+        canvas.restoreState()
+
+    doc.build(elements, onFirstPage=footer, onLaterPages=footer)
+    return doc.page
@@ -0,0 +1,182 @@
+"""Answers from past chats that fixed the same problem.
+
+Every chat the employee marks as resolved is stored as a ``ChatResolution``
+(problem, resolution). The index vectorises each problem with TF-IDF over
+hashed word and word-pair features. For a new problem it returns the stored
+resolutions whose problems are most similar by cosine, so a problem solved
+last week is answered from history instead of waiting on Gemini.
+
+Documents are kept as an inverted index. Each feature has a posting list of
+(document, term weight) in ``array`` buffers, which NumPy reads without
+copying. A query only touches the posting lists of its own features, and
+the top ``k`` come from ``argpartition``. ``rebuild`` weights every document
+with the document frequencies of the whole set. Rows added later are weighted
+with the frequencies at the time they arrive, so scores drift slightly as the
+index grows; a full rebuild runs once the index has doubled in size since the
+last one, and at least every ``rebuild_interval`` seconds.
+
+Every time an employee rejects a served answer (says it did not help), its
+scores are multiplied by ``demotion``, so a rejected answer drops below the
+threshold after a few rejections.
+
+Like the assignment engine, the index lives in memory. It loads every
+resolution on first use, then picks up rows with a higher id every
+``refresh_interval`` seconds. This also covers rows saved by other gunicorn
+workers; their rejections arrive with the next full rebuild.
+"""
+import math
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+
+import numpy as np
+
+N_FEATURES = 2 ** 20
+_WORD = re.compile(r'\w+')
+
+
+def features(text):
+    """Hashed word and adjacent word-pair counts"""
+    words = _WORD.findall((text or '').lower())
+    terms = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+    return Counter(zlib.crc32(term.encode()) % N_FEATURES for term in terms)
+
+
+class ResolutionIndex:
+    def __init__(self, threshold=0.7, refresh_interval=60, rebuild_interval=3600, demotion=0.8):
+        self.threshold = threshold
+        self.demotion = demotion
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._reset()
+        self._refreshed_at = None
+        self._rebuilt_at = None
+        self._rebuilt_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _reset(self):
+        self._postings = {}    # feature -> (array of document numbers, array of term weights)
+        self._norms = array('f')
+        self._penalties = array('f')  # demotion ** rejections
+        self._answers = []
+        self._ids = []
+        self._sources = {}     # source id -> document number
+        self._loaded_through = 0  # highest source id read by refresh
+
+    def rebuild(self, rows):
+        """Replace the index with ``(id, problem, resolution, rejections)`` rows, in id order"""
+        rows = [(source_id, features(problem), resolution, rejections)
+                for source_id, problem, resolution, rejections in rows]
+        kept = {source_id: counts for source_id, counts, resolution, _ in rows if counts and resolution}
+        frequencies = Counter(feature for counts in kept.values() for feature in counts)
+        with self._lock:
+            self._reset()
+            for source_id, counts, resolution, rejections in rows:
+                self._add(source_id, counts, resolution, rejections, frequencies, len(kept))
+                self._loaded_through = max(self._loaded_through, source_id)
+            self._refreshed_at = self._rebuilt_at = time.monotonic()
+            self._rebuilt_size = len(self._answers)
+
+    def ensure_loaded(self, loader):
+        """Load everything on first use or when a rebuild is due; otherwise ``loader(after_id)`` returns newer rows"""
+        now = time.monotonic()
+        if (self._rebuilt_at is None or len(self._answers) >= 2 * max(self._rebuilt_size, 1)
+                or (self.rebuild_interval and now - self._rebuilt_at > self.rebuild_interval)):
+            self.rebuild(loader(0))
+        elif self.refresh_interval and now - self._refreshed_at > self.refresh_interval:
+            rows = loader(self._loaded_through)
+            with self._lock:
+                for source_id, problem, resolution, rejections in rows:
+                    self._add(source_id, features(problem), resolution, rejections)
+                    self._loaded_through = max(self._loaded_through, source_id)
+                self._refreshed_at = time.monotonic()
+
+    def add(self, source_id, problem, resolution, rejections=0):
+        with self._lock:
+            self._add(source_id, features(problem), resolution, rejections)
+
+    def demote(self, source_id):
+        """Score a resolution lower after an employee said it did not help"""
+        with self._lock:
+            document = self._sources.get(source_id)
+            if document is not None:
+                self._penalties[document] *= self.demotion
+
+    def search(self, text, k=5):
+        """``[(similarity, source id, resolution), ...]`` for the ``k`` most similar problems, best first"""
+        counts = features(text)
+        with self._lock:
+            total = len(self._answers)
+            if not counts or not total:
+                return []
+            scores = np.zeros(total, dtype=np.float32)
+            query_norm = 0.0
+            for feature, count in counts.items():
+                # Words no past problem used still count against the match
+                postings = self._postings.get(feature)
+                weight = (1 + math.log(count)) * self._idf(len(postings[0]) if postings else 0, total)
+                query_norm += weight * weight
+                if postings is None:
+                    continue
+                documents = np.frombuffer(postings[0], dtype=np.int32)
+                scores[documents] += weight * np.frombuffer(postings[1], dtype=np.float32)
+            if not query_norm:
+                return []
+            scores /= np.frombuffer(self._norms, dtype=np.float32) * math.sqrt(query_norm)
+            scores *= np.frombuffer(self._penalties, dtype=np.float32)
+            top = np.argpartition(-scores, k - 1)[:k] if total > k else np.arange(total)
+            # Best first; on equal scores the newer resolution wins
+            top = sorted(top, key=lambda document: (-scores[document], -document))
+            return [(float(scores[document]), self._ids[document], self._answers[document])
+                    for document in top if scores[document] > 0]
+
+    def best(self, text):
+        """``(source id, resolution)`` of the most similar past problem if it clears the threshold, else None"""
+        results = self.search(text, k=1)
+        if results and results[0][0] >= self.threshold:
+            self.hits += 1
+            return results[0][1:]
+        self.misses += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._answers),
+                'features': len(self._postings),
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    @staticmethod
+    def _idf(document_frequency, total):
+        return math.log((1 + total) / (1 + document_frequency)) + 1
+
+    def _add(self, source_id, counts, resolution, rejections=0, frequencies=None, total=None):
+        """Index one document; without ``frequencies`` it is weighted with the current ones"""
+        if source_id in self._sources or not counts or not resolution:
+            return
+        document = len(self._answers)
+        if frequencies is None:
+            total = document + 1
+        norm = 0.0
+        for feature, count in counts.items():
+            postings = self._postings.get(feature)
+            if postings is None:
+                postings = self._postings[feature] = (array('i'), array('f'))
+            tf = 1 + math.log(count)
+            postings[0].append(document)
+            frequency = frequencies[feature] if frequencies is not None else len(postings[0])
+            postings[1].append(tf * self._idf(frequency, total))
+            norm += postings[1][-1] ** 2
+        self._norms.append(math.sqrt(norm))
+        self._penalties.append(self.demotion ** (rejections or 0))
+        self._answers.append(resolution)
+        self._ids.append(source_id)
+        self._sources[source_id] = document
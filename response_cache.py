@@ -0,0 +1,219 @@
+"""Response cache for troubleshooting answers from the LLM.
+
+Helpdesk problems repeat a lot, so answers are cached under a normalised form
+of the problem text plus the prompt variant. Entries live in a bounded LRU
+with a TTL; an optional SQLite file adds a second tier that every worker
+process can share.
+"""
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+STOPWORDS = {
+    'a', 'an', 'the', 'my', 'our', 'i', 'me', 'we', 'is', 'are', 'am', 'was', 'were',
+    'be', 'been', 'it', 'its', 'this', 'that', 'of', 'to', 'in', 'on', 'at', 'for',
+    'with', 'and', 'or', 'please', 'help', 'hi', 'hello', 'can', 'you', 'some', 'any',
+    'has', 'have', 'had', 'just', 'again', 'very', 'so',
+}
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_problem(text):
+    """Reduce a problem description to a stable cache key.
+
+    Case, punctuation and filler words are ignored, so "My printer is not
+    working!" and "printer not working" share a key. Word order is kept:
+    "laptop won't connect to monitor" is a different problem from "monitor
+    won't connect to laptop".
+    """
+    words = _WORD_RE.findall((text or '').lower())
+    return ' '.join(w for w in words if w not in STOPWORDS)
+
+
+class SQLiteCacheTier:
+    """Persistent cache tier shared by all workers through one SQLite file"""
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_response_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_llm_response_cache_last_access '
+                'ON llm_response_cache (last_access)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, ttl):
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value, created_at FROM llm_response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        now = time.time()
+        with conn:
+            if ttl and now - created_at > ttl:
+                conn.execute('DELETE FROM llm_response_cache WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE llm_response_cache SET last_access = ? WHERE key = ?', (now, key))
+        return value, created_at
+
+    def peek(self, key, ttl):
+        """Like ``get`` but leaves last_access and expired rows alone"""
+        row = self._connect().execute(
+            'SELECT value, created_at FROM llm_response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (ttl and time.time() - row[1] > ttl):
+            return None
+        return row[0], row[1]
+
+    def set(self, key, value, created_at):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_response_cache (key, value, created_at, last_access) '
+                'VALUES (?, ?, ?, ?)', (key, value, created_at, created_at)
+            )
+            conn.execute(
+                'DELETE FROM llm_response_cache WHERE key IN ('
+                'SELECT key FROM llm_response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM llm_response_cache')
+
+
+class ResponseCache:
+    def __init__(self, max_entries=512, ttl=24 * 3600, persistent_tier=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persistent_tier = persistent_tier
+        self._entries = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(problem, variant='primary'):
+        """Cache key for a problem, or None when it is only filler words ("help please")"""
+        normalized = normalize_problem(problem)
+        return f"{variant}:{normalized}" if normalized else None
+
+    def get(self, problem, variant='primary'):
+        key = self.make_key(problem, variant)
+        if key is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if self.ttl and now - created_at > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+        if self.persistent_tier is not None:
+            try:
+                entry = self.persistent_tier.get(key, self.ttl)
+            except sqlite3.Error as e:
+                print(f"Error reading persistent LLM cache: {str(e)}")
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self._store(key, entry[0], entry[1])
+                    self.hits += 1
+                    self.persistent_hits += 1
+                return entry[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def peek(self, problem, variant='primary'):
+        """The cached answer without counting a hit or miss or refreshing its LRU position"""
+        key = self.make_key(problem, variant)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and not (self.ttl and time.time() - entry[1] > self.ttl):
+            return entry[0]
+        if self.persistent_tier is not None:
+            try:
+                entry = self.persistent_tier.peek(key, self.ttl)
+            except sqlite3.Error as e:
+                print(f"Error reading persistent LLM cache: {str(e)}")
+                entry = None
+            if entry is not None:
+                return entry[0]
+        return None
+
+    def set(self, problem, value, variant='primary'):
+        key = self.make_key(problem, variant)
+        if key is None:
+            return
+        created_at = time.time()
+        with self._lock:
+            self._store(key, value, created_at)
+        if self.persistent_tier is not None:
+            try:
+                self.persistent_tier.set(key, value, created_at)
+            except sqlite3.Error as e:
+                print(f"Error writing persistent LLM cache: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.persistent_tier is not None:
+            self.persistent_tier.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'persistent_hits': self.persistent_hits,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'persistent': self.persistent_tier is not None,
+            }
+
+    def _store(self, key, value, created_at):
+        # Called with self._lock held
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,85 @@
+"""Full-text complaint search.
+
+On SQLite, migration ``0007_complaint_search`` builds ``complaint_search``, an
+FTS5 table with one row per complaint (rowid = complaint id). It holds the
+issue, the troubleshooting steps, the employee fields and the text of every
+comment, and triggers on ``complaint`` and ``comment`` keep it current in the
+same transaction as each write. A search is one MATCH against that index,
+ranked by bm25 with the column weights set in the migration. The old search
+scanned every loaded row in the browser, so it only ever saw the current page.
+
+Free text is turned into an FTS5 query here rather than passed through, so
+quotes, ``-`` or ``NEAR`` typed by a user are just words. Every word has to
+match, and each one matches as a prefix, so results show up while typing.
+
+Ranked results have no stable key to page on, so the cursor is an offset.
+FTS5 ranks every match before it returns the first row anyway, and people
+rarely go past the first few pages of a search.
+
+Other databases have no ``complaint_search`` table and fall back to ``LIKE``
+on the same complaint columns, with results ordered newest first.
+"""
+import re
+
+from sqlalchemy import column, inspect, literal_column, or_, table
+
+from pagination import InvalidCursor
+
+SEARCH_TABLE = 'complaint_search'
+MAX_TERMS = 8
+
+search_index = table(SEARCH_TABLE, column('rowid'), column('rank'))
+_WORD = re.compile(r'\w+')
+
+
+def search_terms(text):
+    return _WORD.findall((text or '').lower())[:MAX_TERMS]
+
+
+def like_pattern(term):
+    """``%term%`` with LIKE's own wildcards in ``term`` matched literally (escape ``\\``)"""
+    return '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+
+def match_expression(terms):
+    """Every term as a quoted prefix: ``"print"* "queu"*``"""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def has_search_index(engine):
+    return SEARCH_TABLE in inspect(engine).get_table_names()
+
+
+def decode_offset(cursor):
+    if not cursor:
+        return 0
+    if not cursor.isdigit():
+        raise InvalidCursor(f'Invalid cursor: {cursor}')
+    return int(cursor)
+
+
+def search_page(query, id_column, text, cursor=None, limit=25, fts=True, like_columns=(), newest_first=()):
+    """Return ``(rows, next_cursor)`` for one page of ``query`` rows matching ``text``
+
+    ``fts=False`` matches each term with LIKE against ``like_columns`` and
+    orders by ``newest_first`` instead of rank.
+    """
+    offset = decode_offset(cursor)
+    terms = search_terms(text)
+    if not terms:
+        return [], None
+
+    if fts:
+        query = (query.join(search_index, search_index.c.rowid == id_column)
+                 .filter(literal_column(SEARCH_TABLE).op('MATCH')(match_expression(terms)))
+                 .order_by(search_index.c.rank, id_column))
+    else:
+        for term in terms:
+            pattern = like_pattern(term)
+            query = query.filter(or_(*(col.ilike(pattern, escape='\\') for col in like_columns)))
+        query = query.order_by(*newest_first)
+
+    rows = query.offset(offset).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], str(offset + limit)
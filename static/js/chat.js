@@ -25,6 +25,66 @@ function addMessage(message, isUser = false) {
         isUser: isUser,
         timestamp: new Date().toISOString()
     });
+    
+    return contentDiv;
+}
+
+// Read a Server-Sent Events response from /api/chat/stream, calling onEvent
+// with each parsed event as it arrives. templates/chat.html uses it too.
+async function readChatEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            rawEvent.split('\n')
+                .filter(line => line.startsWith('data: '))
+                .forEach(line => onEvent(JSON.parse(line.slice(6))));
+        }
+    }
+}
+
+// Render a streamed response as it arrives
+async function readStreamedResponse(response, typingIndicator) {
+    const chatBox = document.querySelector('.chat-messages');
+    const historyEntry = { requiresComplaint: false };
+    let text = '';
+    let contentDiv = null;
+    
+    function handleEvent(event) {
+        if (event.type === 'reset') {
+            text = '';
+        }
+        if (event.type === 'chunk' || event.type === 'reset') {
+            text += event.text;
+            if (!contentDiv) {
+                removeTypingIndicator(typingIndicator);
+                contentDiv = addMessage(text);
+            } else {
+                contentDiv.textContent = text;
+                chatBox.scrollTop = chatBox.scrollHeight;
+            }
+        } else if (event.type === 'done') {
+            historyEntry.requiresComplaint = event.requiresComplaint;
+        }
+    }
+    
+    await readChatEvents(response, handleEvent);
+    removeTypingIndicator(typingIndicator);
+    
+    // Keep the history entry in sync with the fully streamed text
+    if (chatHistory.length && !chatHistory[chatHistory.length - 1].isUser) {
+        chatHistory[chatHistory.length - 1].message = text;
+    }
+    return { response: text, requiresComplaint: historyEntry.requiresComplaint };
 }
 
 function showTypingIndicator() {
@@ -59,7 +119,7 @@ async function handleUserInput(event) {
     const typingIndicator = showTypingIndicator();
     
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -71,9 +131,15 @@ async function handleUserInput(event) {
             throw new Error('Network response was not ok');
         }
         
-        const data = await response.json();
-        removeTypingIndicator(typingIndicator);
-        addMessage(data.response);
+        let data;
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.includes('text/event-stream')) {
+            data = await readStreamedResponse(response, typingIndicator);
+        } else {
+            data = await response.json();
+            removeTypingIndicator(typingIndicator);
+            addMessage(data.response);
+        }
         
         // If this is an unresolved issue, create a complaint
         if (data.requiresComplaint) {
@@ -94,7 +160,11 @@ async function handleUserInput(event) {
             
             const saveData = await saveResponse.json();
             if (saveData.complaintCreated) {
-                addMessage(`I've created a support ticket for you. Your complaint number is: ${saveData.complaintNo}`);
+                let message = `I've created a support ticket for you. Your complaint number is: ${saveData.complaintNo}`;
+                if (saveData.duplicateOf) {
+                    message += `. Others have reported the same problem, so it is linked to ticket ${saveData.duplicateOf}, which is already being worked on.`;
+                }
+                addMessage(message);
             }
         }
     } catch (error) {
@@ -106,12 +176,11 @@ async function handleUserInput(event) {
     }
 }
 
-// Initialize chat form
+// Initialize chat form; pages that only use readChatEvents have none
 document.addEventListener('DOMContentLoaded', function() {
     const chatForm = document.getElementById('chat-form');
-    if (chatForm) {
-        chatForm.addEventListener('submit', handleUserInput);
-    }
+    if (!chatForm) return;
+    chatForm.addEventListener('submit', handleUserInput);
     
     // Add initial bot message
     addMessage("Hello! I'm your IT Support Assistant. Please type 'Hi' to start the conversation.");
@@ -0,0 +1,206 @@
+// Pages a dashboard complaints table through /api/complaints.
+// The first page is rendered with the dashboard; "Load more" appends the next
+// page using the keyset cursor, and changing a filter reloads from the top.
+// When options.eventsUrl pushes a ticket event, the table asks
+// /api/complaints/changes for what changed since its version and patches
+// those rows in place. It also polls for changes when the server asks it to
+// (data-poll-interval), because events may not reach every worker, and falls
+// back to polling every data-fallback-poll-interval seconds when it has no
+// event stream or the server refused one.
+// Typing in options.searchInputId pages ranked results from
+// /api/complaints/search instead, with the same filters and "Load more".
+function initComplaintTable(options = {}) {
+    const table = document.getElementById(options.tableId || 'complaintsTable');
+    const tbody = table.querySelector('tbody');
+    const loadMoreButton = document.getElementById(options.loadMoreId || 'loadMoreComplaints');
+    const filterForm = options.filterFormId ? document.getElementById(options.filterFormId) : null;
+    const searchInput = options.searchInputId ? document.getElementById(options.searchInputId) : null;
+    let nextCursor = table.dataset.nextCursor || null;
+    let version = parseInt(table.dataset.version || '0', 10);
+    let syncing = false;
+    let syncTimer = null;
+    let searchQuery = '';
+    let searchTimer = null;
+    let loadCount = 0;
+
+    function currentFilters() {
+        const params = new URLSearchParams();
+        if (filterForm) {
+            new FormData(filterForm).forEach((value, name) => {
+                if (value) params.set(name, value);
+            });
+        }
+        return params;
+    }
+
+    function updateLoadMore() {
+        if (loadMoreButton) {
+            loadMoreButton.classList.toggle('d-none', !nextCursor);
+        }
+    }
+
+    function load(cursor) {
+        const params = currentFilters();
+        params.set('render', 'rows');
+        if (cursor) params.set('cursor', cursor);
+        if (searchQuery) params.set('q', searchQuery);
+        if (loadMoreButton) loadMoreButton.disabled = true;
+        // Only the latest request may fill the table; searches fire while typing
+        const request = ++loadCount;
+
+        return fetch(`${searchQuery ? '/api/complaints/search' : '/api/complaints'}?${params}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+                return response.json();
+            })
+            .then(data => {
+                if (request !== loadCount) return;
+                if (cursor) {
+                    tbody.insertAdjacentHTML('beforeend', data.html);
+                } else {
+                    tbody.innerHTML = data.html;
+                }
+                nextCursor = data.next_cursor;
+                updateLoadMore();
+                if (options.onRowsLoaded) options.onRowsLoaded(searchQuery);
+            })
+            .catch(error => console.error('Error loading complaints:', error))
+            .finally(() => {
+                if (loadMoreButton) loadMoreButton.disabled = false;
+            });
+    }
+
+    function rowFor(id) {
+        return tbody.querySelector(`tr[data-complaint-id="${id}"]`);
+    }
+
+    // Newest first, matching the server's (created_at, id) order
+    function isNewer(complaint, row) {
+        const createdAt = row.dataset.createdAt || '';
+        const rowId = parseInt(row.dataset.complaintId, 10);
+        return complaint.created_at > createdAt || (complaint.created_at === createdAt && complaint.id > rowId);
+    }
+
+    function upsertRow(complaint, html) {
+        const existing = rowFor(complaint.id);
+        if (existing) {
+            existing.outerHTML = html;
+            return;
+        }
+        const rows = Array.from(tbody.querySelectorAll('tr[data-complaint-id]'));
+        const before = rows.find(row => isNewer(complaint, row));
+        if (before) {
+            before.insertAdjacentHTML('beforebegin', html);
+        } else if (!nextCursor) {
+            // Older than every loaded row: only add it once the last page is loaded
+            tbody.insertAdjacentHTML('beforeend', html);
+        }
+    }
+
+    function applyChanges(data) {
+        if (data.reset) {
+            version = data.version;
+            return load(null);
+        }
+        if (searchQuery) {
+            // Results are in rank order, so rerun the search rather than place rows by date
+            version = data.version;
+            if (options.onChanges) options.onChanges(data);
+            return data.complaints.length || data.removed.length ? load(null) : undefined;
+        }
+        data.removed.forEach(id => {
+            const row = rowFor(id);
+            if (row) row.remove();
+        });
+        data.complaints.forEach(complaint => upsertRow(complaint, data.html[complaint.id]));
+        if (data.complaints.length) {
+            tbody.querySelectorAll('tr.empty-row').forEach(row => row.remove());
+        }
+        version = data.version;
+        if (data.complaints.length || data.removed.length) {
+            if (options.onRowsLoaded) options.onRowsLoaded(searchQuery);
+        }
+        if (options.onChanges) options.onChanges(data);
+    }
+
+    function sync() {
+        if (syncing || document.hidden) return Promise.resolve();
+        syncing = true;
+        const params = currentFilters();
+        params.set('render', 'rows');
+        params.set('since', version);
+        return fetch(`/api/complaints/changes?${params}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+                return response.json();
+            })
+            .then(data => {
+                if (data.version !== version) return applyChanges(data);
+            })
+            .catch(error => console.error('Error syncing complaints:', error))
+            .finally(() => {
+                syncing = false;
+            });
+    }
+
+    // Events often arrive in bursts (a priority change also adds a comment), so sync once per burst
+    function scheduleSync() {
+        clearTimeout(syncTimer);
+        syncTimer = setTimeout(sync, 250);
+    }
+
+    if (loadMoreButton) {
+        loadMoreButton.addEventListener('click', () => load(nextCursor));
+    }
+    // Without an event relay a stream only hears about changes made on its own
+    // server worker, so the dashboard also polls every data-poll-interval seconds
+    const pollInterval = parseFloat(table.dataset.pollInterval || '0');
+    const fallbackPollInterval = parseFloat(table.dataset.fallbackPollInterval || '30');
+    let pollTimer = null;
+    function startPolling(seconds) {
+        if (seconds > 0 && !pollTimer) pollTimer = setInterval(sync, seconds * 1000);
+    }
+
+    if (options.eventsUrl) {
+        const events = new EventSource(options.eventsUrl);
+        events.onmessage = scheduleSync;
+        // Catch up on anything missed while (re)connecting
+        events.onopen = scheduleSync;
+        // A refused stream (503 when the worker is at its stream cap) is not retried
+        events.onerror = () => {
+            if (events.readyState === EventSource.CLOSED) startPolling(pollInterval || fallbackPollInterval);
+        };
+        startPolling(pollInterval);
+    } else {
+        startPolling(pollInterval || fallbackPollInterval);
+    }
+    document.addEventListener('visibilitychange', scheduleSync);
+    if (filterForm) {
+        filterForm.addEventListener('change', () => {
+            // Keep filters in the URL so a refresh renders the same first page
+            const query = currentFilters().toString();
+            history.replaceState(null, '', query ? `?${query}` : window.location.pathname);
+            load(null);
+        });
+    }
+    function search(query) {
+        clearTimeout(searchTimer);
+        query = query.trim();
+        if (query === searchQuery) return Promise.resolve();
+        searchQuery = query;
+        return load(null);
+    }
+
+    if (searchInput) {
+        searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => search(searchInput.value), 300);
+        });
+        searchInput.addEventListener('keydown', event => {
+            if (event.key === 'Enter') search(searchInput.value);
+        });
+    }
+    updateLoadMore();
+
+    return { reload: () => load(null), sync: sync, search: search };
+}